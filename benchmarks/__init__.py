@@ -0,0 +1,374 @@
+"""Benchmarks of MikeDoc. Synthetic projects of configurable size are generated in a
+temporary directory, then browsing, docstring parsing, page building, and full builds
+are timed. Run `python -m benchmarks --help` from the project root directory."""
+import os
+import os.path
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+import mikedoc
+from mikedoc import misc, builder, templates
+from mikedoc.browser import browse, ENGINES
+
+
+__all__ = ["generate_project", "run_benchmarks", "save_results", "format_results"]
+
+
+PKG_NAME = "synthetic_project"
+PKG_DIR = "src/" + PKG_NAME
+# module imported by each module of the package, next to the package
+DEPENDENCY_NAME = "synthetic_dependency"
+API_DIR = "docs/api"
+# size of the default synthetic project
+DEFAULT_CONFIG = {"modules": 50,  # number of modules
+                  "classes": 5,  # classes per module
+                  "methods": 5,  # methods per class
+                  "depth": 4,  # length of the inheritance chain in each module
+                  "enum_size": 50,  # members of the enum of each module
+                  "doc_lines": 20,  # lines of the description of each docstring
+                  "import_ms": 500,  # milliseconds spent importing the dependency
+                  "repeat": 3}  # number of runs of each benchmark
+
+
+def generate_project(root_dir, modules=50, classes=5, methods=5, depth=4,
+                     enum_size=50, doc_lines=20, import_ms=0):
+    """Generate a synthetic project in `root_dir`. Its package is `src/synthetic_project`.
+
+    [param]
+    - root_dir: The directory in which the project is generated
+    - modules: Number of modules
+    - classes: Number of classes per module. They inherit from the end of the chain.
+    - methods: Number of methods per class
+    - depth: Length of the inheritance chain defined in each module
+    - enum_size: Number of members of the enum defined in each module
+    - doc_lines: Number of lines of the description of each docstring
+    - import_ms: Number of milliseconds that importing the dependency of the package
+    takes. The dependency (`src/synthetic_dependency.py`) stands for the third-party
+    packages that a real package imports, which the "ast" engine doesn't import.
+    With 0, the package has no dependency.
+
+    [return]
+    Return the relative path to the package directory"""
+    pkg_path = misc.build_absolute_path(root_dir, PKG_DIR)
+    misc.ensure_dir(pkg_path)
+    names = ["module_{:04}".format(i) for i in range(modules)]
+    init_text = _create_docstring("The synthetic package", doc_lines) + "\n"
+    _write_file(os.path.join(pkg_path, "__init__.py"), init_text)
+    if import_ms:
+        text = _create_dependency_text(import_ms)
+        _write_file(os.path.join(os.path.dirname(pkg_path), DEPENDENCY_NAME + ".py"), text)
+    for name in names:
+        text = _create_module_text(name, classes, methods, depth,
+                                   enum_size, doc_lines, import_ms > 0)
+        _write_file(os.path.join(pkg_path, name + ".py"), text)
+    return PKG_DIR
+
+
+def run_benchmarks(config=None, root_dir=None):
+    """Generate a synthetic project then run the benchmarks
+
+    [param]
+    - config: Dictionary to override `DEFAULT_CONFIG`
+    - root_dir: The directory in which the project is generated.
+    By default, a temporary directory is created then deleted.
+
+    [return]
+    Return a JSON-serializable dictionary with the keys "info", "config", and "results".
+    Each result is a dictionary with the keys "min", "median", and "max" (seconds).
+    Results of page benchmarks have the additional key "peak_kb": the peak size (in
+    kilobytes) of the memory allocated while pages are built one after the other.
+    Page benchmarks whose name ends with "[format]" build the same pages with
+    templates rendered by `str.format`, as pages were built before templates were
+    compiled, so that both ways can be compared."""
+    cfg = dict(DEFAULT_CONFIG)
+    cfg.update(config if config else dict())
+    repeat = cfg.pop("repeat")
+    tmp_dir = None
+    if root_dir is None:
+        root_dir = tmp_dir = tempfile.mkdtemp(prefix="mikedoc-benchmarks-")
+    try:
+        pkg_dir = generate_project(root_dir, **cfg)
+        results = _run(root_dir, pkg_dir, repeat)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    cfg["repeat"] = repeat
+    return {"info": _get_info(), "config": cfg, "results": results}
+
+
+def save_results(data, filename):
+    """Save the results returned by `run_benchmarks` in a JSON file"""
+    with open(filename, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+
+def format_results(data):
+    """Return the results returned by `run_benchmarks` as a human-readable table"""
+    lines = ["{:<36}{:>12}{:>12}{:>12}{:>12}".format("benchmark", "min (s)", "median (s)",
+                                                     "max (s)", "peak (KB)")]
+    for name, result in data["results"].items():
+        line = "{:<36}{:>12.4f}{:>12.4f}{:>12.4f}".format(name, result["min"],
+                                                         result["median"], result["max"])
+        if "peak_kb" in result:
+            line += "{:>12}".format(result["peak_kb"])
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _run(root_dir, pkg_dir, repeat):
+    results = dict()
+    for engine in ENGINES:
+        def task():
+            _unload_package()
+            for module_info, members in browse(root_dir, pkg_dir, engine=engine):
+                pass
+        results["browse[{}]".format(engine)] = _measure(task, repeat)
+    # everything below works on the modules browsed once
+    _unload_package()
+    modules = list(browse(root_dir, pkg_dir))
+    docstrings = _collect_docstrings(modules)
+
+    def task():
+        misc.clear_docstring_cache()
+        for docstring in docstrings:
+            misc.parse_docstring(docstring)
+    results["parse_docstring[cold]"] = _measure(task, repeat)
+
+    def task():
+        for docstring in docstrings:
+            misc.parse_docstring(docstring)
+    results["parse_docstring[warm]"] = _measure(task, repeat)
+    _measure_pages(root_dir, pkg_dir, modules, repeat, results)
+    for name, kwargs in (("build", {}), ("build[ast]", {"engine": "ast"}),
+                         ("build[incremental]", {"incremental": True})):
+        def task():
+            _unload_package()
+            misc.clear_docstring_cache()
+            mikedoc.build(root_dir, "SyntheticProject", "/README.md",
+                          pkg_dir, API_DIR, **kwargs)
+        # the first build of the incremental benchmark creates the manifest
+        if kwargs.get("incremental"):
+            task()
+        results[name] = _measure(task, repeat)
+    _unload_package()
+    return results
+
+
+def _measure_pages(root_dir, pkg_dir, modules, repeat, results):
+    instance = builder.Builder(root_dir, "SyntheticProject", "/README.md",
+                               pkg_dir, API_DIR)
+    # same pages, built with the templates rendered by str.format
+    format_instance = builder.Builder(root_dir, "SyntheticProject", "/README.md",
+                                      pkg_dir, API_DIR)
+    format_instance._templates = _FormatTemplateSet()
+    categorized = list()
+    for module_info, members in modules:
+        if not members:
+            continue
+        fields, funcs, classes = builder._categorize_module_members(members)
+        categorized.append((module_info, fields, funcs, classes))
+    pages = {
+        "HomePage": lambda b: [builder.HomePage(b, [x[0] for x in categorized])],
+        "ModuleOverviewPage": lambda b: (builder.ModuleOverviewPage(b, *x)
+                                         for x in categorized),
+        "FieldsDocPage": lambda b: (builder.FieldsDocPage(b, x[0], x[1])
+                                    for x in categorized),
+        "FuncsDocPage": lambda b: (builder.FuncsDocPage(b, x[0], x[2])
+                                   for x in categorized),
+        "ClassDocPage": lambda b: (builder.ClassDocPage(b, x[0], class_info)
+                                   for x in categorized for class_info in x[3])}
+    for name, create_pages in pages.items():
+        for suffix, page_builder in (("", instance), ("[format]", format_instance)):
+            def task():
+                # texts are dropped as soon as they are built, like in a real build
+                for page in create_pages(page_builder):
+                    page.build()
+            result = _measure(task, repeat)
+            result["peak_kb"] = _measure_peak_memory(task)
+            results["{}.build{}".format(name, suffix)] = result
+
+
+class _FormatTemplate:
+    """Template rendered by `str.format`. Fragments passed as values are joined into
+    strings first, so that the text of each section is copied into the text of the
+    section that contains it, like with the templates used before compiled templates."""
+    def __init__(self, template):
+        self._template = template
+
+    @property
+    def text(self):
+        return self._template.text
+
+    @property
+    def name(self):
+        return self._template.name
+
+    @property
+    def fields(self):
+        return self._template.fields
+
+    def render(self, buffer, **values):
+        buffer.append(self.format(**values))
+        return buffer
+
+    def format(self, **values):
+        for name, value in values.items():
+            if isinstance(value, list):
+                values[name] = "".join(value)
+        return self._template.text.format(**values)
+
+
+class _FormatTemplateSet:
+    """Set of the default templates, rendered by `str.format`"""
+    def __init__(self):
+        self._templates = templates.TemplateSet()
+        self._cache = dict()
+
+    @property
+    def custom(self):
+        return dict()
+
+    def get(self, name):
+        template = self._cache.get(name)
+        if template is None:
+            template = self._cache[name] = _FormatTemplate(self._templates.get(name))
+        return template
+
+
+def _measure(task, repeat):
+    timings = list()
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        task()
+        timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings),
+            "max": max(timings)}
+
+
+def _measure_peak_memory(task):
+    """Return the peak size (in kilobytes) of the memory allocated while the task runs"""
+    tracemalloc.start()
+    try:
+        task()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def _collect_docstrings(modules):
+    docstrings = list()
+    for module_info, members in modules:
+        docstrings.append(module_info.doc)
+        for member in members:
+            docstrings.append(member.doc)
+            for class_member in (member.members if member.members else ()):
+                docstrings.append(class_member.doc)
+    return docstrings
+
+
+def _unload_package():
+    # the dependency is imported again by each run, like in a new process
+    sys.modules.pop(DEPENDENCY_NAME, None)
+    for name in list(sys.modules.keys()):
+        if name == PKG_NAME or name.startswith(PKG_NAME + "."):
+            del sys.modules[name]
+
+
+def _get_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, universal_newlines=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError) as e:
+        commit = None
+    return {"python": platform.python_version(),
+            "platform": platform.platform(),
+            "commit": commit}
+
+
+def _write_file(filename, text):
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write(text)
+
+
+def _create_docstring(title, doc_lines, indent="", params=(), returns=False):
+    lines = [title, ""]
+    for i in range(doc_lines):
+        lines.append("Line {} of the description, with `code` and a *bit* of emphasis.".format(i))
+    if params:
+        lines.extend(("", "[param]"))
+        for param in params:
+            lines.append("- {}: Description of the parameter {}".format(param, param))
+    if returns:
+        lines.extend(("", "[return]", "Return a value"))
+    text = "\n".join((indent + line if line else line) for line in lines)
+    return '{}"""{}\n{}"""'.format(indent, text.lstrip(), indent)
+
+
+def _create_dependency_text(import_ms):
+    # busy loop, since importing a real dependency keeps the processor busy
+    lines = ['"""Stand-in for the third-party packages imported by the package"""',
+             "import time", "",
+             "_end = time.perf_counter() + {}".format(import_ms / 1000),
+             "while time.perf_counter() < _end:",
+             "    pass", ""]
+    return "\n".join(lines)
+
+
+def _create_module_text(name, classes, methods, depth, enum_size, doc_lines,
+                        dependency=False):
+    lines = [_create_docstring("Module {}".format(name), doc_lines)]
+    if dependency:
+        lines.append("import " + DEPENDENCY_NAME)
+    lines.extend(("from enum import Enum", "", "",
+                  "CONSTANT = {!r}".format(name),
+                  "NUMBERS = {!r}".format(list(range(10))), "", ""))
+    # a function
+    lines.append("def function_{}(a, b=1, *args, c=None, **kwargs):".format(name))
+    lines.append(_create_docstring("A function", doc_lines, " " * 4,
+                                   params=("a", "b", "args", "c", "kwargs"),
+                                   returns=True))
+    lines.extend(("", ""))
+    # a big enum
+    lines.append("class Color(Enum):")
+    lines.append(_create_docstring("An enum", doc_lines, " " * 4))
+    for i in range(enum_size):
+        lines.append("    MEMBER_{} = {}".format(i, i))
+    lines.extend(("", ""))
+    # the inheritance chain
+    base = "object"
+    for level in range(depth):
+        lines.extend(_create_class_text("Level{}".format(level), base,
+                                        methods, doc_lines))
+        base = "Level{}".format(level)
+    for i in range(classes):
+        lines.extend(_create_class_text("Class{}".format(i), base,
+                                        methods, doc_lines))
+    return "\n".join(lines)
+
+
+def _create_class_text(name, base, methods, doc_lines):
+    lines = ["class {}({}):".format(name, base),
+             _create_docstring("Class {}".format(name), doc_lines, " " * 4),
+             "    FIELD = 42", "",
+             "    def __init__(self, value=None):",
+             _create_docstring("Init", doc_lines, " " * 8, params=("value",)),
+             "        self._value = value", "",
+             "    @property",
+             "    def value(self):",
+             _create_docstring("The value", 1, " " * 8),
+             "        return self._value", ""]
+    for i in range(methods):
+        lines.extend(("    def method_{}(self, x, y=2):".format(i),
+                      _create_docstring("Method {}".format(i), doc_lines, " " * 8,
+                                        params=("x", "y"), returns=True),
+                      "        return x", ""))
+    lines.append("")
+    return lines
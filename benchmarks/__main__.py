@@ -0,0 +1,46 @@
+import sys
+from mikedoc.cli import parse_options
+from benchmarks import DEFAULT_CONFIG, run_benchmarks, save_results, format_results
+
+
+HELP_TEXT = """\
+Run the benchmarks of MikeDoc on a synthetic project
+
+OPTIONS:
+    --modules N         Number of modules (default: {modules})
+    --classes N         Number of classes per module (default: {classes})
+    --methods N         Number of methods per class (default: {methods})
+    --depth N           Length of the inheritance chain of each module (default: {depth})
+    --enum-size N       Number of members of the enum of each module (default: {enum_size})
+    --doc-lines N       Number of lines of each docstring (default: {doc_lines})
+    --import-ms N       Milliseconds spent importing the dependency (default: {import_ms})
+    --repeat N          Number of runs of each benchmark (default: {repeat})
+    --output FILE       Save the results in a JSON file""".format(**DEFAULT_CONFIG)
+
+
+def main(*args):
+    options = parse_options(args)
+    if options is None or "help" in args or "--help" in args:
+        print(HELP_TEXT)
+        return False
+    output = options.pop("output", None)
+    config = dict()
+    for name, value in options.items():
+        if name not in DEFAULT_CONFIG:
+            print(HELP_TEXT)
+            return False
+        try:
+            config[name] = int(value)
+        except ValueError as e:
+            print("Invalid value '{}' for option '--{}'.".format(value, name))
+            return False
+    data = run_benchmarks(config)
+    print(format_results(data))
+    if output:
+        save_results(data, output)
+        print("Results saved in '{}'.".format(output))
+    return True
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -1,9 +1,10 @@
 """This module exposes public functions and classes useful for most cases."""
-from mikedoc.builder import build
+from mikedoc.builder import build, render
 from mikedoc.browser import browse, ModuleInfo, MemberInfo, ClassMemberInfo
 from mikedoc.cli import Cli
+from mikedoc.output import OutputStats
 from mikedoc.misc import parse_docstring
 
 
-__all__ = ["build", "browse", "Cli", "parse_docstring",
-           "ModuleInfo", "MemberInfo", "ClassMemberInfo"]
+__all__ = ["build", "render", "browse", "Cli", "parse_docstring",
+           "ModuleInfo", "MemberInfo", "ClassMemberInfo", "OutputStats"]
@@ -1,14 +1,27 @@
 """This module exposes function for browsing the codebase, and iterating/inspecting modules"""
+import gc
+import sys
+import types
 import inspect
 import importlib
 import importlib.util
 from collections import namedtuple
-from mikedoc import misc
+from mikedoc import misc, errors, profiler
 
 
 __all__ = ["browse", "iter_modules", "inspect_module", "ModuleInfo",
            "MemberInfo", "ClassMemberInfo"]
 
+
+# "import" imports modules, "ast" builds stand-ins from the source text,
+# and "isolated" imports modules in worker processes
+ENGINES = ("import", "ast", "isolated")
+# number of modules released between two garbage collections
+GC_INTERVAL = 10
+# type of the class methods of builtin types (types.ClassMethodDescriptorType
+# only exists from Python 3.7)
+_CLASSMETHOD_DESCRIPTOR = type(dict.__dict__["fromkeys"])
+
 ModuleInfo = namedtuple("ModuleInfo", ["name", "obj", "doc"])
 MemberInfo = namedtuple("MemberInfo", ["name", "obj",  "doc", "signature", "bases", "members",
                                        "is_field", "is_class", "is_func"])
@@ -54,54 +67,117 @@ ClassMemberInfo.is_property.__doc__ = """Boolean to tells whether the member is
 ClassMemberInfo.is_method.__doc__ = """Boolean to tells whether the member is a method or not"""
 
 
-def browse(root_dir, pkg_dir):
+def browse(root_dir, pkg_dir, modules=None, engine="import", lazy=False,
+           workers=1, timeout=None, memory_limit=None, evict=False, value_repr=None):
     """Generator to iterate through each module info and the associated members' info.
 
     [param]
     - root_dir: Project root directory path
     - pkg_dir: Relative path to the root_dir indicating the package directory.
     Slash is the only allowed separator. Example: "my_package" or "src/my_package".
+    - modules: Optional collection of dotted module names to restrict browsing to.
+    Modules that aren't part of this collection are neither imported nor yielded.
+    - engine: Either "import" (default) to import modules, or "ast" to build
+    the same info from the source text with `mikedoc.scanner.Scanner`, without importing anything,
+    or "isolated" to import modules in worker processes with `mikedoc.isolation.browse_isolated`.
+    - lazy: Boolean to tell whether members should be enumerated lazily.
+    See `mikedoc.browser.inspect_module`.
+    - workers: Number of worker processes of the "isolated" engine
+    - timeout: Maximum number of seconds to import a module with the "isolated" engine, or None
+    - memory_limit: Maximum memory (in megabytes) of a worker process of the
+    "isolated" engine, or None
+    - evict: Boolean to tell whether each module should be released once the consumer
+    asks for the next one. See `mikedoc.browser.unload_module`.
+    - value_repr: Optional `mikedoc.reprs.ValueRepr` instance with which worker
+    processes of the "isolated" engine represent values
 
     [yield]
     Yields a 2-tuple made of a `mikedoc.ModuleInfo` instance and an iterator representing
     members of the current module. The members are `mikedoc.MemberInfo` info
     """
-    for module_obj, members in iter_modules(root_dir, pkg_dir):
+    if engine == "isolated":
+        # imported here since mikedoc.isolation depends on this module
+        from mikedoc.isolation import browse_isolated
+        yield from browse_isolated(root_dir, pkg_dir, modules, lazy, workers,
+                                   timeout, memory_limit, evict, value_repr)
+        return
+    # attribute tables of classes, shared by the modules of the build
+    cache = dict()
+    for module_obj, members in iter_modules(root_dir, pkg_dir, modules, engine,
+                                            lazy, evict, cache):
         module_name = module_obj.__name__
         module_doc = get_printable_doc(module_obj)
         module_info = ModuleInfo(module_name, module_obj, module_doc)
-        members = [create_member_info(member) for member in members]
+        with profiler.measure("introspect", module_name):
+            members = [create_member_info(member, cache) for member in members]
         yield module_info, members
+        module_obj = module_info = members = None
 
 
-def iter_modules(root_dir, pkg_dir):
+def iter_modules(root_dir, pkg_dir, modules=None, engine="import", lazy=False,
+                 evict=False, cache=None):
     """Generator for iterating over modules
 
     [param]
     - root_dir: The project root directory
     - pkg_dir: Relative path to the root_dir indicating the package directory.
     Slash is the only allowed separator. Example: "my_package" or "src/my_package".
+    - modules: Optional collection of dotted module names to restrict iteration to.
+    - engine: Either "import" or "ast". With "ast", modules are stand-ins built
+    from the source text. The "isolated" engine is only supported by `mikedoc.browse`.
+    - lazy: Boolean to tell whether members should be enumerated lazily.
+    See `mikedoc.browser.inspect_module`.
+    - evict: Boolean to tell whether each module should be released once the consumer
+    asks for the next one. See `mikedoc.browser.unload_module`.
+    - cache: Optional dictionary of attribute tables from which the classes of
+    released modules are removed. See `mikedoc.browser.get_class_attrs`.
 
     [yield]
     Yields a 2-tuple made of a module and the list of 2-tuples (name and object)
     representing its members.
-    """
-    with misc.mount_project(root_dir, pkg_dir):
-        yield from _iter_modules(root_dir, pkg_dir)
 
-
-def inspect_module(module):
+    [raise]
+    - mikedoc.errors.Error: Raised when the engine is unknown
+    """
+    if engine == "import":
+        unloader = (lambda name: unload_module(name, cache)) if evict else None
+        with misc.mount_project(root_dir, pkg_dir):
+            yield from _iter_modules(root_dir, pkg_dir, modules, lazy=lazy,
+                                     unloader=unloader)
+    elif engine == "ast":
+        # imported here, so that only the "ast" engine depends on the scanner
+        from mikedoc.scanner import Scanner
+        scanner = Scanner(root_dir, pkg_dir)
+
+        def unload(module_name):
+            scanner.unload(module_name)
+            uncache_module(module_name, cache)
+        unloader = unload if evict else None
+        yield from _iter_modules(root_dir, pkg_dir, modules, scanner.load, lazy, unloader)
+    else:
+        raise errors.Error("Unknown engine '{}'".format(engine))
+
+
+def inspect_module(module, lazy=False):
     """Inspect a module object and returns a list of 2-tuples representing the module's members
 
     [param]
     - module: a Python module object
+    - lazy: Boolean to tell whether the module `__dict__` and `__all__` should be taken
+    as authoritative. By default, members are enumerated with `inspect.getmembers`,
+    which gets every attribute listed by `dir`, so a module-level `__getattr__` (PEP 562)
+    would load every lazy attribute. In lazy mode, only the names of `__all__` that are
+    missing from the module `__dict__` are resolved with `getattr`.
 
     [return]
     A list of 2-tuples. Each tuple is made of the name of a module member and the member itself."""
     module_name = module.__name__
     data = []
-    members = inspect.getmembers(module)
-    members = {name: obj for name, obj in members} if members else dict()
+    if lazy:
+        members = _get_lazy_members(module)
+    else:
+        members = inspect.getmembers(module)
+        members = {name: obj for name, obj in members} if members else dict()
     if "__all__" in members:
         return restrict_members(members, members["__all__"])
     for name in sorted(members):
@@ -117,16 +193,78 @@ def inspect_module(module):
     return data
 
 
-def _iter_modules(root_dir, pkg_dir):
+def _get_lazy_members(module):
+    members = dict(vars(module))
+    names = members.get("__all__")
+    if names is None:
+        return members
+    for name in names:
+        if name in members:
+            continue
+        try:
+            members[name] = getattr(module, name)
+        except AttributeError as e:
+            continue
+    return members
+
+
+def unload_module(module_name, cache=None):
+    """Release a module imported by `iter_modules`, so that its objects can be
+    garbage collected once the caller drops its own references to them.
+    The module is removed from `sys.modules` and from its parent package,
+    and its classes are removed from the cache of attribute tables.
+    A project module that is imported again afterwards (for example by another module
+    that depends on it) is executed again. Parent packages are kept.
+    Module objects are part of reference cycles (functions refer to the namespace
+    of their module), so their memory is reclaimed by the next garbage collection.
+
+    [param]
+    - module_name: The dotted name of the module, as yielded by `iter_modules`.
+    Example: "package.module" or "package.__init__".
+    - cache: Optional dictionary of attribute tables. See `mikedoc.browser.get_class_attrs`."""
+    module = sys.modules.pop(module_name, None)
+    parent_name, _, name = module_name.rpartition(".")
+    parent = sys.modules.get(parent_name)
+    if module is not None and parent is not None:
+        if parent.__dict__.get(name) is module:
+            delattr(parent, name)
+    uncache_module(module_name, cache)
+
+
+def uncache_module(module_name, cache):
+    """Remove the classes of a module from a cache of attribute tables
+
+    [param]
+    - module_name: The dotted name of the module
+    - cache: Dictionary of attribute tables, or None. See `mikedoc.browser.get_class_attrs`."""
+    if cache:
+        for cls in [cls for cls in cache if cls.__module__ == module_name]:
+            del cache[cls]
+
+
+def _iter_modules(root_dir, pkg_dir, modules=None, loader=importlib.import_module,
+                  lazy=False, unloader=None):
     path = misc.build_absolute_path(root_dir, pkg_dir)
+    released = 0
     for py_filename in misc.iter_py_files(path):
         dotted_name = misc.build_module_name(root_dir, pkg_dir, py_filename)
-        module = importlib.import_module(dotted_name)
-        members = inspect_module(module)
+        if modules is not None and dotted_name not in modules:
+            continue
+        with profiler.measure("import", dotted_name):
+            module = loader(dotted_name)
+        with profiler.measure("introspect", dotted_name):
+            members = inspect_module(module, lazy)
         yield module, members
+        if unloader:
+            # the consumer is done with this module
+            module = members = None
+            unloader(dotted_name)
+            released += 1
+            if released % GC_INTERVAL == 0:
+                gc.collect()
 
 
-def create_member_info(member):
+def create_member_info(member, cache=None):
     name, obj = member
     is_class = is_func = is_field = False
     bases = None
@@ -139,14 +277,14 @@ def create_member_info(member):
         is_field = True
     doc = get_printable_doc(obj)
     signature = _get_signature(obj)
-    class_members = get_class_members(obj) if is_class else None
+    class_members = get_class_members(obj, cache) if is_class else None
     return MemberInfo(name, obj, doc, signature, bases, class_members,
                       is_field, is_class, is_func)
 
 
-def get_class_members(obj):
+def get_class_members(obj, cache=None):
     result = list()
-    attrs = sort_class_attrs(get_class_attrs(obj))
+    attrs = sort_class_attrs(get_class_attrs(obj, cache))
     for attr, value in attrs.items():
         if attr.startswith("__") and attr != "__init__":
             continue
@@ -170,24 +308,112 @@ def get_class_members(obj):
     return sort_class_members(result)
 
 
-def get_class_attrs(obj):
-    attrs = {}
-    reversed_mro = list(obj.__mro__)
-    reversed_mro.reverse()
-    for cls in reversed_mro:
-        if cls is object:
-            continue
-        lineage = list()
+def get_class_attrs(obj, cache=None):
+    """Get the attributes of a class, including inherited ones
+
+    [param]
+    - obj: The class object
+    - cache: Optional dictionary in which the attribute table of each class is stored,
+    so that the tables of bases are computed once and reused by their subclasses
+
+    [return]
+    Return a dictionary whose keys are attribute names and whose values are 2-tuples
+    made of the attribute and its lineage (list of the classes of the MRO that
+    define the attribute, from the most recent definition to the first one)"""
+    cache = dict() if cache is None else cache
+    # tables are computed from the root of the MRO so that bases are always cached
+    for cls in reversed(obj.__mro__):
+        table = _get_attrs_table(cls, cache)
+    return {name: (attr, list(lineage)) for name, (attr, lineage) in table.items()}
+
+
+def _get_attrs_table(cls, cache):
+    table = cache.get(cls)
+    if table is not None:
+        return table
+    table = dict()
+    if cls is not object:
+        bases = cls.__bases__
+        mro = cls.__mro__
+        if len(bases) == 1 and mro[1:] == bases[0].__mro__:
+            # single inheritance: the table of the base is reused as is
+            table.update(cache[bases[0]])
+        else:
+            for base in reversed(mro[1:]):
+                for name, (attr, lineage) in cache[base].items():
+                    if lineage[0] is not base:
+                        continue
+                    previous = table.get(name)
+                    table[name] = (attr, (base,) + (previous[1] if previous else ()))
         for name in cls.__dict__.keys():
+            if name.startswith("__") and name != "__init__":
+                continue
             try:
-                obj = getattr(cls, name)
+                attr = get_static_attr(cls, name)
             except AttributeError as e:
                 continue
-            if name.startswith("__") and name != "__init__":
-                continue
-            lineage.insert(0, cls)
-            attrs[name] = (obj, lineage)
-    return attrs
+            previous = table.get(name)
+            table[name] = (attr, (cls,) + (previous[1] if previous else ()))
+    cache[cls] = table
+    return table
+
+
+def get_static_attr(cls, name):
+    """Get an attribute defined in the `__dict__` of a class without running
+    its descriptors, unlike `getattr`. Static methods are unwrapped, and class
+    methods are bound to the class, like `getattr` would do.
+
+    [param]
+    - cls: The class object
+    - name: The name of an attribute of `cls.__dict__`
+
+    [return]
+    Return the attribute
+
+    [raise]
+    - AttributeError: Raised for attributes that can't be accessed from the class,
+    such as `types.DynamicClassAttribute` descriptors
+    """
+    attr = cls.__dict__[name]
+    if isinstance(attr, staticmethod):
+        return attr.__func__
+    if isinstance(attr, classmethod):
+        func = attr.__func__
+        return types.MethodType(func, cls) if callable(func) else func
+    if isinstance(attr, _CLASSMETHOD_DESCRIPTOR):
+        # class methods of builtin types are bound without side effect
+        return attr.__get__(None, cls)
+    if isinstance(attr, types.DynamicClassAttribute):
+        # enum members whose name clashes with an attribute of enum.Enum
+        member = getattr(attr, "member", None)
+        if member is None:
+            raise AttributeError(name)
+        return member
+    return attr
+
+
+def get_method_decorator(cls, name):
+    """Get the decorator of a method as displayed on the class page
+
+    [param]
+    - cls: The class object
+    - name: The name of the method
+
+    [return]
+    Return "@staticmethod", "@classmethod", or an empty string"""
+    decorator = ""
+    obj = None
+    for klass in cls.__mro__:
+        try:
+            obj = klass.__dict__[name]
+        except KeyError as e:
+            continue
+    if obj:
+        if isinstance(obj, staticmethod):
+            decorator = "@staticmethod"
+        if isinstance(obj, classmethod):
+            decorator = "@classmethod"
+    return decorator
 
 
 def sort_class_attrs(attrs):
@@ -1,20 +1,41 @@
 """The `Builder` class and the `build` function are defined in this module."""
 import os
 import os.path
+import json
+import hashlib
 from enum import Enum
-from mikedoc.browser import browse
-from mikedoc import templates, misc
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from mikedoc.browser import browse, get_method_decorator, ModuleInfo
+from mikedoc.output import DirectoryOutput, StagedOutput, ArchiveOutput, MemoryOutput
+from mikedoc.profiler import Profiler, activate, measure
+from mikedoc.symbols import SymbolIndex, find_refs
+from mikedoc.search import SearchIndex
+from mikedoc.templates import TemplateSet, load_templates
+from mikedoc.reprs import ValueRepr
+from mikedoc import misc, manifest, ir, vcs
 
 
-__all__ = ["build", "Builder"]
+__all__ = ["build", "render", "Builder", "find_module_deps"]
 
 
 MODULE_DESC_LEN_ON_HOME_PAGE = 256
 MEMBER_DESC_LEN_ON_MODULE_PAGE = 128
 DEFAULT_INTRO_FOR_EXCEPTIONS_SECTION = "The table below outlines exceptions that may occur."
+MIKEDOC_TEXT = ("API Reference generated with "
+                "[MikeDoc](https://github.com/pyrustic/mikedoc).\n")
+# number of chunks of modules per worker in a parallel build
+CHUNKS_PER_WORKER = 4
+
 
+# pages are lists of 2-tuples (basename and text), symbols is a dictionary
+# (dotted name and URL), refs a set of dotted names written between backticks,
+# and search_docs a list of search documents
+_RenderedModule = namedtuple("_RenderedModule", ["name", "doc", "pages", "deps",
+                                                 "symbols", "refs", "search_docs"])
 
-def build(root_dir, project_name, project_url, pkg_dir, api_dir):
+
+def build(root_dir, project_name, project_url, pkg_dir, api_dir, **options):
     """Build the API reference (Markdown files) in the api directory
 
     [param]
@@ -27,15 +48,55 @@ def build(root_dir, project_name, project_url, pkg_dir, api_dir):
     Slash is the only allowed separator. Example: "my_package" or "src/my_package
     - api_dir: Relative path to the root_dir indicating the api reference directory.
     Slash is the only allowed separator. Example: "docs/api".
+    - **options: Keyword arguments of `mikedoc.Builder`, such as `incremental`,
+    `engine`, or `workers`
+
+    [return]
+    Return a `mikedoc.OutputStats` named tuple with the numbers of files written,
+    skipped because unchanged, and deleted because obsolete.
     """
-    builder = Builder(root_dir, project_name, project_url, pkg_dir, api_dir)
+    builder = Builder(root_dir, project_name, project_url, pkg_dir, api_dir, **options)
     return builder.build()
 
 
+def render(root_dir, project_name, project_url, pkg_dir, api_dir, callback=None,
+           **options):
+    """Build the API reference in memory, without writing anything
+
+    [param]
+    - root_dir: The project root directory
+    - project_name: The public (stylized or not) name of the project
+    - project_url: The url to the project, it might be the relative url to the README.md file
+    - pkg_dir: Relative path to the root_dir indicating the package directory.
+    Slash is the only allowed separator. Example: "my_package" or "src/my_package
+    - api_dir: Relative path to the root_dir indicating the api reference directory.
+    Nothing is written there, but links in pages point to it. Example: "docs/api".
+    - callback: Optional function called with the path and the text of each page
+    as soon as it is produced. See `mikedoc.output.MemoryOutput`.
+    - **options: Keyword arguments of `mikedoc.Builder`, such as `engine` or `workers`.
+    Options about the api directory (incremental, atomic, since, writers, archive, and
+    output) don't apply.
+
+    [return]
+    Return a dictionary whose keys are paths of pages relative to the api directory
+    (with slash as separator, for example "modules/my_package/my_module/README.md")
+    and whose values are texts
+    """
+    options["output"] = MemoryOutput(callback)
+    builder = Builder(root_dir, project_name, project_url, pkg_dir, api_dir, **options)
+    builder.build()
+    return options["output"].pages
+
+
 class Builder:
     """Class to build the API reference"""
     def __init__(self, root_dir, project_name,
-                 project_url, pkg_dir, api_dir):
+                 project_url, pkg_dir, api_dir, incremental=False,
+                 engine="import", workers=1, atomic=False, profiler=None,
+                 lazy=False, timeout=None, memory_limit=None, ir_file=None,
+                 autolink=False, search=False, evict=False, templates_dir=None,
+                 repr_depth=None, repr_items=None, repr_length=None, since=None,
+                 writers=0, archive=None, output=None):
         """Init
 
         [param]
@@ -48,12 +109,134 @@ class Builder:
         Slash is the only allowed separator. Example: "my_package" or "src/my_package
         - api_dir: Relative path to the root_dir indicating the api reference directory.
         Slash is the only allowed separator. Example: "docs/api".
+        - incremental: Boolean to tell whether the build should be incremental.
+        The source file hash and the generated pages of each module are recorded
+        in a manifest stored next to the MIKEDOC file. An incremental build neither
+        imports nor renders modules that didn't change since the previous build,
+        and it prunes the pages of deleted modules.
+        - engine: Either "import" (default) to import the modules of the package,
+        or "ast" to build the same info from the source text with the `ast` module.
+        The "ast" engine doesn't import the dependencies of the package and is free of
+        import side effects, but it can't evaluate values that aren't literals, nor resolve
+        objects from modules outside the package, except a few modules of the standard
+        library. Members inherited from unresolved base classes aren't documented
+        (`mikedoc.scanner.UnresolvedBaseWarning`).
+        The "isolated" engine imports each module in a worker process, so that a module
+        that hangs, exhausts memory, or crashes the interpreter is skipped with a warning
+        (`mikedoc.isolation.ImportFailureWarning`) instead of stopping the build.
+        Skipped modules have no pages and are retried by the next incremental build.
+        - workers: Number of worker processes. With more than one worker, modules are
+        split into chunks that worker processes browse and render in parallel, while
+        the main process writes the pages and builds the home page. The output is
+        the same as the output of a serial build. With the "isolated" engine, worker
+        processes import the modules, while the main process renders them.
+        - atomic: Boolean to tell whether the build should happen in a staging directory
+        placed next to the api directory. The staging directory replaces the api directory
+        only when the build succeeds, so that readers never see a partial reference.
+        Unchanged files are hard-linked from the api directory instead of being written.
+        - profiler: Optional `mikedoc.profiler.Profiler` instance in which the time spent
+        importing, introspecting, parsing, rendering, and writing is accumulated,
+        per module and per page. Measures taken in worker processes are merged into it.
+        - lazy: Boolean to tell whether the members of a module should be enumerated from its
+        `__dict__` and its `__all__` only, instead of every attribute listed by `dir`.
+        Packages that load submodules on demand with a module-level `__getattr__` (PEP 562)
+        are then documented without loading every lazy attribute.
+        See `mikedoc.browser.inspect_module`.
+        - timeout: Maximum number of seconds to import and introspect a module
+        with the "isolated" engine, or None for no limit
+        - memory_limit: Maximum size (in megabytes) of the address space of each worker
+        process of the "isolated" engine, or None for no limit. This limit is only
+        supported on Unix.
+        - ir_file: Optional path (relative to the root_dir, with slash as separator,
+        or absolute) to an IR file created with `mikedoc.ir.save_ir`. The reference is
+        then built from the IR file, without importing nor reading the package, and the
+        engine is ignored. The hashes of source files recorded in the IR file support
+        incremental builds.
+        - autolink: Boolean to tell whether dotted names written between backticks in
+        pages (for example `my_package.my_module.MyClass`) should be linked to the pages
+        documenting them. The symbol index that maps the names of documented modules, fields,
+        functions, classes, and class members to their URLs is built once per build, then
+        pages are linked in a single pass each. Base classes are linked with the index too.
+        Pages are held in memory until every module is rendered.
+        - search: Boolean to tell whether a search index of the modules, classes,
+        functions, methods, and properties should be generated in the `search` directory
+        of the api directory. Documents are collected while pages are rendered, and the
+        index is sharded so that a static page can search the reference without a server.
+        See `mikedoc.search`.
+        - evict: Boolean to tell whether the objects of each module should be released
+        as soon as its pages are rendered. Modules are always rendered one at a time
+        and only the short summary needed by the home page is kept, but imported modules
+        stay in `sys.modules`, and the "ast" engine keeps the stand-ins it builds.
+        With eviction, each module is removed from `sys.modules` (or from the cache of
+        the "ast" engine) once rendered, so that peak memory no longer grows with the
+        size of the package. A module that is imported again by another module is
+        executed again. See `mikedoc.browser.unload_module`.
+        - templates_dir: Optional relative path to the root_dir indicating a directory
+        of custom templates. Slash is the only allowed separator. Each file of the
+        directory replaces the template of `mikedoc.templates` it is named after,
+        for example `CLASS_DOC_PAGE.md`. See `mikedoc.templates.load_templates`.
+        - repr_depth: Maximum depth of nested containers in the representations of
+        field values, enum members, and default values of parameters, or None
+        for `mikedoc.reprs.DEFAULT_DEPTH`
+        - repr_items: Maximum number of items of a container in representations,
+        or None for `mikedoc.reprs.DEFAULT_ITEMS`
+        - repr_length: Maximum length of a representation, or None for
+        `mikedoc.reprs.DEFAULT_LENGTH`. Longer representations are shortened in
+        the middle. See `mikedoc.reprs.ValueRepr`.
+        - since: Optional git reference (a commit, a branch, or a tag) to build
+        incrementally from the files that the local git repository reports as changed
+        since this reference, instead of checking the state of every source file.
+        Only the changed modules, the modules that depend on them (for example
+        through inherited classes), and the home page are rendered again. The
+        reference should be the commit that the API reference was last built from.
+        This option implies an incremental build, and it is ignored with an ir_file.
+        See `mikedoc.vcs.find_changed_modules`.
+        - writers: Number of writer threads. With 0 (default), each page is written
+        as soon as it is rendered. Otherwise, rendered pages are put on a bounded
+        queue that writer threads drain while the next modules are rendered, which
+        pays off on file systems with slow syscalls such as network file systems.
+        The build waits for every page to be written before it returns.
+        See `mikedoc.output.DirectoryOutput`.
+        - archive: Optional path (relative to the root_dir, with slash as separator,
+        or absolute) to a ".zip", ".tar.gz", or ".tgz" archive. Pages are then streamed
+        into this archive, with the layout of the api directory, and nothing is written
+        to the api directory. Links in pages still point to the api_dir, where the
+        archive is meant to be unpacked. The archive is reproducible, so it can be
+        hashed for caching. Builds into an archive are never incremental, and the
+        atomic and writers options don't apply. See `mikedoc.output.ArchiveOutput`.
+        - output: Optional output object that receives the pages instead of the api
+        directory, for example a `mikedoc.output.MemoryOutput` instance. It takes
+        precedence over the archive, atomic, and writers options. See `mikedoc.output`
+        for the interface of outputs.
         """
         self._root_dir = root_dir
         self._project_name = project_name
         self._project_url = project_url
         self._pkg_dir = pkg_dir
         self._api_dir = api_dir
+        self._incremental = incremental
+        self._engine = engine
+        self._workers = workers
+        self._atomic = atomic
+        self._profiler = profiler
+        self._lazy = lazy
+        self._timeout = timeout
+        self._memory_limit = memory_limit
+        self._ir_file = ir_file
+        self._autolink = autolink
+        self._search = search
+        self._evict = evict
+        self._templates_dir = templates_dir
+        self._repr_depth = repr_depth
+        self._repr_items = repr_items
+        self._repr_length = repr_length
+        self._since = since
+        self._writers = writers
+        self._archive = archive
+        self._output = output
+        self._templates = None
+        self._value_repr = None
+        self._ir_data = None
 
     @property
     def root_dir(self):
@@ -75,69 +258,414 @@ class Builder:
     def api_dir(self):
         return self._api_dir
 
+    @property
+    def incremental(self):
+        return self._incremental
+
+    @property
+    def engine(self):
+        return self._engine
+
+    @property
+    def workers(self):
+        return self._workers
+
+    @property
+    def atomic(self):
+        return self._atomic
+
+    @property
+    def profiler(self):
+        return self._profiler
+
+    @property
+    def lazy(self):
+        return self._lazy
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @property
+    def memory_limit(self):
+        return self._memory_limit
+
+    @property
+    def ir_file(self):
+        return self._ir_file
+
+    @property
+    def autolink(self):
+        return self._autolink
+
+    @property
+    def search(self):
+        return self._search
+
+    @property
+    def evict(self):
+        return self._evict
+
+    @property
+    def templates_dir(self):
+        return self._templates_dir
+
+    @property
+    def repr_depth(self):
+        return self._repr_depth
+
+    @property
+    def repr_items(self):
+        return self._repr_items
+
+    @property
+    def repr_length(self):
+        return self._repr_length
+
+    @property
+    def since(self):
+        return self._since
+
+    @property
+    def writers(self):
+        return self._writers
+
+    @property
+    def archive(self):
+        return self._archive
+
+    @property
+    def output(self):
+        return self._output
+
+    @property
+    def templates(self):
+        """The `mikedoc.templates.TemplateSet` instance used to build pages.
+        Custom templates are loaded from the templates_dir on first access."""
+        if self._templates is None:
+            custom = None
+            if self._templates_dir:
+                path = misc.build_absolute_path(self._root_dir, self._templates_dir)
+                custom = load_templates(path)
+            self._templates = TemplateSet(custom)
+        return self._templates
+
+    @property
+    def value_repr(self):
+        """The `mikedoc.reprs.ValueRepr` instance used to represent values.
+        Representations are memoized for the duration of the build, or of
+        the rendering of a module when modules are evicted."""
+        if self._value_repr is None:
+            self._value_repr = ValueRepr(self._repr_depth, self._repr_items,
+                                         self._repr_length)
+        return self._value_repr
+
     def build(self):
-        """Build the API reference"""
-        cached_modules = list()
-        _ensure_api_dir(self._root_dir, self._api_dir)
-        for module_info, members in browse(self._root_dir, self._pkg_dir):
-            if not members:
+        """Build the API reference. Files whose contents didn't change aren't
+        written again, and pages that are no longer part of the reference are deleted.
+
+        [return]
+        Return a `mikedoc.OutputStats` named tuple"""
+        if self._profiler is None:
+            return self._build_api_reference()
+        with activate(self._profiler):
+            return self._build_api_reference()
+
+    def render_module(self, module_info, members):
+        """Render the pages of a single module, without writing them.
+        Names aren't linked, even with autolink.
+
+        [param]
+        - module_info: The `mikedoc.ModuleInfo` instance yielded by `mikedoc.browse`
+        - members: The list of `mikedoc.MemberInfo` instances of the module
+
+        [return]
+        Return a list of 2-tuples made of the basename of a page (for example
+        "README.md" or "class-MyClass.md") and its text. The list is empty
+        when the module has no members."""
+        return self._create_module_pages(module_info, members)
+
+    def render_home_page(self, modules):
+        """Render the home page, without writing it
+
+        [param]
+        - modules: List of `mikedoc.ModuleInfo` instances of the modules that have pages.
+        Only their names and docstrings are used.
+
+        [return]
+        Return the text of the home page, or None if there are no modules"""
+        return self._create_home_page(modules)
+
+    def _build_api_reference(self):
+        fingerprint = self._get_fingerprint()
+        output = self._create_output()
+        previous = None
+        # an output without a work directory doesn't keep pages between builds
+        if (self._incremental or self._since) and output.work_dir is not None:
+            previous = manifest.load_manifest(self._root_dir, self._api_dir, fingerprint)
+        output.open()
+        try:
+            self._build(output, fingerprint, previous)
+        except BaseException as e:
+            output.abort()
+            raise
+        return output.close()
+
+    def _build(self, output, fingerprint, previous):
+        with measure("write"):
+            output.write("MIKEDOC", MIKEDOC_TEXT)
+        old_entries = previous["modules"] if previous else dict()
+        if self._ir_file:
+            states = {item["name"]: _create_ir_state(item)
+                      for item in self._get_ir_data()["modules"]}
+        else:
+            states = self._get_file_states(old_entries)
+        if previous:
+            stale = manifest.find_stale_modules(previous, states,
+                                                self._root_dir, self._api_dir)
+        else:
+            stale = set(states.keys())
+        new_entries = dict()
+        module_names = [module_name for module_name in states if module_name in stale]
+        rendered_modules = self._render_modules(module_names, list(states.keys()))
+        index = None
+        if self._autolink:
+            rendered_modules, index = self._link_modules(rendered_modules, states,
+                                                         stale, old_entries)
+        for rendered in rendered_modules:
+            pages = list()
+            for basename, text in rendered.pages:
+                with measure("write", rendered.name, basename):
+                    output.write(_build_page_path(rendered.name, basename), text)
+                pages.append(basename)
+            new_entries[rendered.name] = manifest.create_entry(states[rendered.name],
+                                                               rendered.doc, pages,
+                                                               rendered.deps,
+                                                               rendered.symbols,
+                                                               rendered.refs,
+                                                               rendered.search_docs)
+        entries = dict()
+        for module_name in states:
+            if module_name in new_entries:
+                entries[module_name] = new_entries[module_name]
+            elif module_name in stale:
+                # module skipped by the "isolated" engine
                 continue
-            cached_modules.append(module_info)
-            fields, funcs, classes = _categorize_module_members(members)
-            # create overview page
-            self._create_overview_page(module_info, fields, funcs, classes)
-            # create fields page
-            self._create_fields_page(module_info, fields)
-            # create functions page
-            self._create_funcs_page(module_info, funcs)
-            # create class pages
-            for class_info in classes:
-                self._create_class_page(module_info, class_info)
+            else:
+                entries[module_name] = old_entries[module_name]
+                for basename in entries[module_name]["pages"]:
+                    output.keep(_build_page_path(module_name, basename))
         # create home page
-        self._create_home_page(cached_modules)
+        modules = [ModuleInfo(module_name, None, entry["doc"])
+                   for module_name, entry in entries.items() if entry["pages"]]
+        with measure("render", page="README.md"):
+            text = self._create_home_page(modules)
+            if text and index is not None:
+                text = index.link(text)
+        # there is no home page without documented modules
+        if text:
+            with measure("write", page="README.md"):
+                output.write("README.md", text)
+        if self._search:
+            self._write_search_index(output, entries)
+        # the manifest is saved once every page is written
+        with measure("write"):
+            output.flush()
+        if output.work_dir is None:
+            return
+        # the manifest is only read by incremental builds, and a manifest left by
+        # a previous incremental build would be obsolete
+        if not (self._incremental or self._since):
+            manifest.delete_manifest(self._root_dir, output.work_dir)
+            return
+        data = manifest.create_manifest(fingerprint, entries)
+        manifest.save_manifest(data, self._root_dir, output.work_dir)
+
+    def _create_output(self):
+        if self._output is not None:
+            return self._output
+        if self._archive:
+            return ArchiveOutput(self._root_dir, self._archive)
+        if self._atomic:
+            return StagedOutput(self._root_dir, self._api_dir, self._writers)
+        return DirectoryOutput(self._root_dir, self._api_dir, self._writers)
+
+    def _render_modules(self, module_names, project_modules):
+        # with the "isolated" engine, worker processes import modules instead
+        isolated = self._engine == "isolated" and not self._ir_file
+        if self._workers <= 1 or len(module_names) <= 1 or isolated:
+            yield from _render_chunk(self, module_names, project_modules)
+            return
+        config = (self._root_dir, self._project_name, self._project_url,
+                  self._pkg_dir, self._api_dir)
+        n = min(len(module_names), self._workers * CHUNKS_PER_WORKER)
+        size = -(-len(module_names) // n)
+        profile = self._profiler is not None
+        options = {"engine": self._engine, "lazy": self._lazy, "ir_file": self._ir_file,
+                   "autolink": self._autolink, "search": self._search,
+                   "evict": self._evict, "templates_dir": self._templates_dir,
+                   "repr_depth": self._repr_depth, "repr_items": self._repr_items,
+                   "repr_length": self._repr_length}
+        tasks = [(config, options, module_names[i:i+size], project_modules, profile)
+                 for i in range(0, len(module_names), size)]
+        with ProcessPoolExecutor(max_workers=self._workers) as executor:
+            for results, data in executor.map(_render_chunk_task, tasks):
+                if data:
+                    self._profiler.merge(data)
+                yield from results
+
+    def _link_modules(self, rendered_modules, states, stale, old_entries):
+        """Build the symbol index, render again the unchanged modules that refer
+        to symbols that changed, then link the pages of the rendered modules.
+        Return the list of linked modules and the `mikedoc.symbols.SymbolIndex`."""
+        rendered_modules = list(rendered_modules)
+        rendered_names = {rendered.name for rendered in rendered_modules}
+        # modules neither rendered nor skipped keep the symbols of the previous build
+        unchanged = [module_name for module_name in states
+                     if module_name not in rendered_names and module_name not in stale]
+        index = SymbolIndex()
+        for module_name in unchanged:
+            index.update(old_entries[module_name].get("symbols", dict()))
+        for rendered in rendered_modules:
+            index.update(rendered.symbols)
+        old_symbols = dict()
+        for entry in old_entries.values():
+            old_symbols.update(entry.get("symbols", dict()))
+        changed = {name for name in old_symbols.keys() | index.symbols.keys()
+                   if old_symbols.get(name) != index.get(name)}
+        if changed:
+            module_names = [module_name for module_name in unchanged
+                            if not changed.isdisjoint(old_entries[module_name].get("refs", ()))]
+            rendered_modules.extend(self._render_modules(module_names, list(states.keys())))
+        linked_modules = list()
+        for rendered in rendered_modules:
+            pages = list()
+            for basename, text in rendered.pages:
+                with measure("render", rendered.name, basename):
+                    pages.append((basename, index.link(text)))
+            linked_modules.append(rendered._replace(pages=pages))
+        return linked_modules, index
+
+    def _write_search_index(self, output, entries):
+        with measure("render", page="search"):
+            index = SearchIndex()
+            for entry in entries.values():
+                for kind, name, url, description in entry.get("search", ()):
+                    index.add(kind, name, url, description)
+            files = index.create_files()
+        for path, text in files:
+            with measure("write", page="search"):
+                output.write(path, text)
+
+    def _create_module_pages(self, module_info, members):
+        pages = list()
+        if not members:
+            return pages
+        fields, funcs, classes = _categorize_module_members(members)
+        name = module_info.name
+        # create overview page
+        with measure("render", name, "README.md"):
+            text = self._create_overview_page(module_info, fields, funcs, classes)
+        pages.append(("README.md", text))
+        # create fields page
+        with measure("render", name, "fields.md"):
+            text = self._create_fields_page(module_info, fields)
+        pages.append(("fields.md", text))
+        # create functions page
+        with measure("render", name, "funcs.md"):
+            text = self._create_funcs_page(module_info, funcs)
+        pages.append(("funcs.md", text))
+        # create class pages
+        for class_info in classes:
+            basename = "class-{}.md".format(class_info.name)
+            with measure("render", name, basename):
+                text = self._create_class_page(module_info, class_info)
+            pages.append((basename, text))
+        return [(basename, text) for basename, text in pages
+                if text and not text.isspace()]
 
     def _create_home_page(self, modules):
         if not modules:
             return
         home_page = HomePage(self, modules)
-        text = home_page.build()
-        misc.save_api_page(text, self._root_dir, self._api_dir)
+        return home_page.build()
 
     def _create_overview_page(self, module_info, fields, funcs, classes):
         overview_page = ModuleOverviewPage(self, module_info, fields, funcs, classes)
-        text = overview_page.build()
-        basename = "README.md"
-        modules_api_dir = self._api_dir + "/modules"
-        misc.save_api_page(text, self._root_dir, modules_api_dir,
-                           module_info.name, basename)
+        return overview_page.build()
 
     def _create_fields_page(self, module_info, fields):
         if not fields:
             return
         fields_doc_page = FieldsDocPage(self, module_info, fields)
-        text = fields_doc_page.build()
-        basename = "fields.md"
-        modules_api_dir = self._api_dir + "/modules"
-        misc.save_api_page(text, self._root_dir, modules_api_dir,
-                           module_info.name, basename)
+        return fields_doc_page.build()
 
     def _create_funcs_page(self, module_info, funcs):
         if not funcs:
             return
         funcs_doc_page = FuncsDocPage(self, module_info, funcs)
-        text = funcs_doc_page.build()
-        basename = "funcs.md"
-        modules_api_dir = self._api_dir + "/modules"
-        misc.save_api_page(text, self._root_dir, modules_api_dir,
-                           module_info.name, basename)
+        return funcs_doc_page.build()
 
     def _create_class_page(self, module_info, class_info):
         class_doc_page = ClassDocPage(self, module_info, class_info)
-        text = class_doc_page.build()
-        basename = "class-{}.md".format(class_info.name)
-        modules_api_dir = self._api_dir + "/modules"
-        misc.save_api_page(text, self._root_dir, modules_api_dir,
-                           module_info.name, basename)
+        return class_doc_page.build()
+
+    def _browse(self, module_names):
+        if self._ir_file:
+            return ir.iter_ir_modules(self._get_ir_data(), module_names)
+        return browse(self._root_dir, self._pkg_dir, module_names, self._engine,
+                      self._lazy, self._workers, self._timeout, self._memory_limit,
+                      self._evict, self.value_repr)
+
+    def _get_ir_data(self):
+        if self._ir_data is None:
+            if os.path.isabs(self._ir_file):
+                filename = self._ir_file
+            else:
+                filename = misc.build_absolute_path(self._root_dir, self._ir_file)
+            with measure("import"):
+                self._ir_data = ir.load_ir(filename)
+        return self._ir_data
+
+    def _get_file_states(self, old_entries):
+        sources = self._collect_sources()
+        changed = None
+        if self._since and old_entries:
+            changed = vcs.find_changed_modules(self._root_dir, self._pkg_dir,
+                                               self._since)
+        states = dict()
+        for module_name, filename in sources.items():
+            entry = old_entries.get(module_name)
+            if changed is not None and entry and module_name not in changed:
+                # unchanged since the git reference, so the recorded state holds
+                states[module_name] = _create_recorded_state(entry)
+            else:
+                states[module_name] = manifest.get_file_state(filename, entry)
+        return states
+
+    def _collect_sources(self):
+        sources = dict()
+        path = misc.build_absolute_path(self._root_dir, self._pkg_dir)
+        for py_filename in misc.iter_py_files(path):
+            module_name = misc.build_module_name(self._root_dir, self._pkg_dir,
+                                                 py_filename)
+            sources[module_name] = py_filename
+        return sources
+
+    def _get_fingerprint(self):
+        # custom templates change every page, so their texts are part of the fingerprint
+        custom = self.templates.custom
+        templates_hash = ""
+        if custom:
+            data = json.dumps(custom, sort_keys=True).encode("utf-8")
+            templates_hash = hashlib.sha256(data).hexdigest()
+        value_repr = self.value_repr
+        limits = "{} {} {}".format(value_repr.depth, value_repr.items, value_repr.length)
+        return "\n".join((self._project_name, self._project_url,
+                          self._pkg_dir, self._api_dir, self._engine,
+                          str(self._lazy), self._ir_file if self._ir_file else "",
+                          str(self._autolink), str(self._search), templates_hash,
+                          limits))
 
 
 class HomePage:
@@ -157,8 +685,10 @@ class HomePage:
         return self._modules
 
     def build(self):
+        templates = self._builder.templates
+        render_module_line = templates.get("MODULE_LINE").render
         contents = list()
-        for module_info in self._modules:
+        for i, module_info in enumerate(self._modules):
             name = module_info.name
             docstring_dict = misc.parse_docstring(module_info.doc)
             description = docstring_dict.get("", "No docstring.")
@@ -166,17 +696,18 @@ class HomePage:
                                                            length=MODULE_DESC_LEN_ON_HOME_PAGE)
             api_url = misc.build_api_url(self._api_dir, name, "README.md")
             escaped_module_name = misc.escape_emphasis(name)
-            module_entry = templates.MODULE_LINE.format(module_name=escaped_module_name,
-                                                        api_url=api_url,
-                                                        short_description=short_description)
-            contents.append(module_entry)
+            if i:
+                contents.append("\n\n")
+            render_module_line(contents, module_name=escaped_module_name,
+                               api_url=api_url, short_description=short_description)
         escaped_project_name = misc.escape_emphasis(self._project_name)
-        back_to_top = _create_back_to_top(self._project_name)
-        text = templates.HOME_PAGE.format(project_name=escaped_project_name,
-                                          project_url=self._project_url,
-                                          contents="\n\n".join(contents),
-                                          back_to_top=back_to_top)
-        return text
+        back_to_top = _create_back_to_top(templates, self._project_name)
+        buffer = templates.get("HOME_PAGE").render(list(),
+                                                   project_name=escaped_project_name,
+                                                   project_url=self._project_url,
+                                                   contents=contents,
+                                                   back_to_top=back_to_top)
+        return "".join(buffer)
 
 
 class ModuleOverviewPage:
@@ -191,6 +722,8 @@ class ModuleOverviewPage:
         self._project_url = builder.project_url
         self._pkg_dir = builder.pkg_dir
         self._api_dir = builder.api_dir
+        self._templates = builder.templates
+        self._value_repr = builder.value_repr
 
     @property
     def builder(self):
@@ -213,52 +746,52 @@ class ModuleOverviewPage:
         return self._classes
 
     def build(self):
-        text = templates.OVERVIEW_PAGE
         members_section = self._create_members_section()
         # source url
-        header_div = _create_header_div_1(self._project_name, self._project_url,
-                                          self._pkg_dir, self._api_dir, self._module_name)
-        back_to_top = _create_back_to_top(self._project_name)
+        header_div = _create_header_div_1(self._templates, self._project_name,
+                                          self._project_url, self._pkg_dir,
+                                          self._api_dir, self._module_name)
         docstring_dict = misc.parse_docstring(self._module_info.doc)
-        text = text.format(header_div=header_div,
-                           module_name=misc.escape_emphasis(self._module_name),
-                           description=docstring_dict.get("", "No docstring."),
-                           members=members_section,
-                           back_to_top=back_to_top)
-        return text
+        buffer = self._templates.get("OVERVIEW_PAGE").render(
+            list(), header_div=header_div,
+            module_name=misc.escape_emphasis(self._module_name),
+            description=docstring_dict.get("", "No docstring."),
+            members=members_section)
+        return "".join(buffer)
 
     def _create_members_section(self):
         sections = list()
-        for text in (self._create_fields_section(),
-                     self._create_funcs_section(),
-                     self._create_classes_section()):
-            if not text:
+        for fragment in (self._create_fields_section(),
+                         self._create_funcs_section(),
+                         self._create_classes_section()):
+            if not fragment:
                 continue
-            sections.append(text)
-        return "\n\n".join(sections)
+            sections.append(fragment)
+        return _join("\n\n", sections)
 
     def _create_fields_section(self):
         if not self._fields:
             return
         fields_page_url = misc.build_api_url(self._api_dir, self._module_name, "fields.md")
+        render_line = self._templates.get("FIELD_LINE").render
         contents = list()
-        for field_info in self._fields:
-            value = "`{}`".format(repr(field_info.obj))
-            line = templates.FIELD_LINE.format(name=misc.escape_emphasis(field_info.name),
-                                               value=value)
-            contents.append(line)
-        back_to_top = _create_back_to_top(self._project_name)
-        text = templates.ALL_FIELDS_SECTION.format(fields_page_url=fields_page_url,
-                                                   contents="\n".join(contents),
-                                                   back_to_top=back_to_top)
-        return text
+        for i, field_info in enumerate(self._fields):
+            value = "`{}`".format(self._value_repr.repr(field_info.obj))
+            if i:
+                contents.append("\n")
+            render_line(contents, name=misc.escape_emphasis(field_info.name), value=value)
+        back_to_top = _create_back_to_top(self._templates, self._project_name)
+        return self._templates.get("ALL_FIELDS_SECTION").render(
+            list(), fields_page_url=fields_page_url, contents=contents,
+            back_to_top=back_to_top)
 
     def _create_funcs_section(self):
         if not self._funcs:
             return
         funcs_page_url = misc.build_api_url(self._api_dir, self._module_name, "funcs.md")
+        render_line = self._templates.get("FUNC_LINE").render
         contents = list()
-        for func_info in self._funcs:
+        for i, func_info in enumerate(self._funcs):
             docstring_dict = misc.parse_docstring(func_info.doc)
             func_description = docstring_dict.get("", "No docstring.")
             length = MEMBER_DESC_LEN_ON_MODULE_PAGE
@@ -266,21 +799,21 @@ class ModuleOverviewPage:
                                                                 length=length)
             urlified_func_name = misc.urlify_section_title(func_info.name)
             func_doc_url = funcs_page_url + urlified_func_name
-            line = templates.FUNC_LINE.format(name=misc.escape_emphasis(func_info.name),
-                                              doc_url=func_doc_url,
-                                              short_description=func_short_description)
-            contents.append(line)
-        back_to_top = _create_back_to_top(self._project_name)
-        text = templates.ALL_FUNCTIONS_SECTION.format(funcs_page_url=funcs_page_url,
-                                                      contents="\n".join(contents),
-                                                      back_to_top=back_to_top)
-        return text
+            if i:
+                contents.append("\n")
+            render_line(contents, name=misc.escape_emphasis(func_info.name),
+                        doc_url=func_doc_url, short_description=func_short_description)
+        back_to_top = _create_back_to_top(self._templates, self._project_name)
+        return self._templates.get("ALL_FUNCTIONS_SECTION").render(
+            list(), funcs_page_url=funcs_page_url, contents=contents,
+            back_to_top=back_to_top)
 
     def _create_classes_section(self):
         if not self._classes:
             return
+        render_section = self._templates.get("CLASS_SECTION").render
         contents = list()
-        for class_info in self._classes:
+        for i, class_info in enumerate(self._classes):
             docstring_dict = misc.parse_docstring(class_info.doc)
             class_description = docstring_dict.get("", "No docstring.")
             length = MEMBER_DESC_LEN_ON_MODULE_PAGE
@@ -295,21 +828,21 @@ class ModuleOverviewPage:
             else:
                 sub_contents = self._create_class_members_section(class_info.members, 
                                                                   class_page_url)
-            sub_text = templates.CLASS_SECTION.format(name=misc.escape_emphasis(class_info.name),
-                                                      doc_url=class_page_url,
-                                                      short_description=class_short_description,
-                                                      contents=sub_contents)
-            contents.append(sub_text)
-        back_to_top = _create_back_to_top(self._project_name)
-        text = templates.ALL_CLASSES_SECTION.format(contents="\n".join(contents),
-                                                    back_to_top=back_to_top)
-        return text
+            if i:
+                contents.append("\n")
+            render_section(contents, name=misc.escape_emphasis(class_info.name),
+                           doc_url=class_page_url,
+                           short_description=class_short_description,
+                           contents=sub_contents)
+        back_to_top = _create_back_to_top(self._templates, self._project_name)
+        return self._templates.get("ALL_CLASSES_SECTION").render(
+            list(), contents=contents, back_to_top=back_to_top)
 
     def _create_class_members_section(self, members, class_page_link):
-        contents = list()
+        render_line = self._templates.get("CLASS_MEMBER_LINE").render
+        members = [member for member in members if member.name != "__init__"]
+        lines = list()
         for member in members:
-            if member.name == "__init__":
-                continue
             kv_sign = ":"
             if member.is_property:
                 urlified_member_name = misc.urlify_section_title("Properties table")
@@ -319,7 +852,7 @@ class ModuleOverviewPage:
             elif member.is_field:
                 urlified_member_name = misc.urlify_section_title("Fields table")
                 kv_sign = " ="
-                description = "`{}`".format(repr(member.obj))
+                description = "`{}`".format(self._value_repr.repr(member.obj))
             else:
                 urlified_member_name = misc.urlify_section_title(member.name)
                 docstring_dict = misc.parse_docstring(member.doc)
@@ -328,21 +861,21 @@ class ModuleOverviewPage:
             short_description = misc.get_short_description(description, length=length)
 
             member_doc_url = class_page_link + urlified_member_name
-            line = templates.CLASS_MEMBER_LINE.format(name=misc.escape_emphasis(member.name),
-                                                      doc_url=member_doc_url, kv_sign=kv_sign,
-                                                      short_description=short_description)
-            contents.append(line)
-        return "\n".join(contents)
+            lines.append(render_line(list(), name=misc.escape_emphasis(member.name),
+                                     doc_url=member_doc_url, kv_sign=kv_sign,
+                                     short_description=short_description))
+        return _join("\n", lines)
 
     def _create_enum_members_section(self, obj):
+        render_line = self._templates.get("FIELD_LINE").render
         contents = list()
-        for item in obj:
+        for i, item in enumerate(obj):
             name, value = item.name, item.value
-            value = "`{}`".format(repr(value))
-            line = templates.FIELD_LINE.format(name=misc.escape_emphasis(name),
-                                               value=value)
-            contents.append(line)
-        return "\n".join(contents)
+            value = "`{}`".format(self._value_repr.repr(value))
+            if i:
+                contents.append("\n")
+            render_line(contents, name=misc.escape_emphasis(name), value=value)
+        return contents
 
     def _create_namedtuple_members_section(self, obj):
         contents = list()
@@ -364,6 +897,8 @@ class FieldsDocPage:
         self._project_url = builder.project_url
         self._pkg_dir = builder.pkg_dir
         self._api_dir = builder.api_dir
+        self._templates = builder.templates
+        self._value_repr = builder.value_repr
 
     @property
     def builder(self):
@@ -380,22 +915,26 @@ class FieldsDocPage:
     def build(self):
         if not self._fields:
             return
+        render_entry = self._templates.get("TWO_COLUMNS_TABLE_ENTRY").render
         entries = list()
-        for field_info in self._fields:
-            col1, col2 = misc.escape_emphasis(field_info.name), "`{}`".format(repr(field_info.obj))
-            line = templates.TWO_COLUMNS_TABLE_ENTRY.format(col1=col1, col2=col2)
-            entries.append(line)
+        for i, field_info in enumerate(self._fields):
+            col1 = misc.escape_emphasis(field_info.name)
+            col2 = "`{}`".format(self._value_repr.repr(field_info.obj))
+            if i:
+                entries.append("\n")
+            render_entry(entries, col1=col1, col2=col2)
         module_api_url = misc.build_api_url(self._api_dir, self._module_name, "README.md")
-        header_div = _create_header_div_2(self._project_name, self._project_url,
-                                          self._pkg_dir, self._api_dir, self._module_name)
+        header_div = _create_header_div_2(self._templates, self._project_name,
+                                          self._project_url, self._pkg_dir,
+                                          self._api_dir, self._module_name)
         escaped_module_name = misc.escape_emphasis(self._module_name)
-        back_to_top = _create_back_to_top(self._project_name)
-        text = templates.FIELDS_PAGE.format(header_div=header_div,
-                                            module_name=escaped_module_name,
-                                            module_api_url=module_api_url,
-                                            entries="\n".join(entries),
-                                            back_to_top=back_to_top)
-        return text
+        back_to_top = _create_back_to_top(self._templates, self._project_name)
+        buffer = self._templates.get("FIELDS_PAGE").render(list(), header_div=header_div,
+                                                           module_name=escaped_module_name,
+                                                           module_api_url=module_api_url,
+                                                           entries=entries,
+                                                           back_to_top=back_to_top)
+        return "".join(buffer)
 
 
 class FuncsDocPage:
@@ -408,6 +947,8 @@ class FuncsDocPage:
         self._project_url = builder.project_url
         self._pkg_dir = builder.pkg_dir
         self._api_dir = builder.api_dir
+        self._templates = builder.templates
+        self._value_repr = builder.value_repr
 
     @property
     def builder(self):
@@ -422,27 +963,30 @@ class FuncsDocPage:
         return self._funcs
 
     def build(self):
+        back_to_top = _create_back_to_top(self._templates, self._project_name)
         contents = list()
         index_of_funcs = list()
-        for func_info in self._funcs:
-            func_section = _create_func_doc(self._project_name, func_info)
-            contents.append(func_section)
+        for i, func_info in enumerate(self._funcs):
+            if i:
+                contents.append("\n\n")
+            _render_func_doc(contents, self._templates, self._value_repr, func_info,
+                             back_to_top)
             # update index of funcs
             line = "- [{func_name}]({url})"
             line = line.format(func_name=misc.escape_emphasis(func_info.name),
                                url=misc.urlify_section_title(func_info.name))
             index_of_funcs.append(line)
-        contents = "\n\n".join(contents)
         module_api_url = misc.build_api_url(self._api_dir, self._module_name, "README.md")
-        header_div = _create_header_div_2(self._project_name, self._project_url,
-                                          self._pkg_dir, self._api_dir, self._module_name)
+        header_div = _create_header_div_2(self._templates, self._project_name,
+                                          self._project_url, self._pkg_dir,
+                                          self._api_dir, self._module_name)
         # text of funcs_doc_page
         escaped_module_name = misc.escape_emphasis(self._module_name)
-        text = templates.FUNCS_DOC_PAGE.format(header_div=header_div,
-                                               index_of_funcs="\n".join(index_of_funcs),
-                                               module_name=escaped_module_name,
-                                               module_api_url=module_api_url, contents=contents)
-        return text
+        buffer = self._templates.get("FUNCS_DOC_PAGE").render(
+            list(), header_div=header_div, index_of_funcs="\n".join(index_of_funcs),
+            module_name=escaped_module_name, module_api_url=module_api_url,
+            contents=contents)
+        return "".join(buffer)
 
 
 class ClassDocPage:
@@ -455,6 +999,8 @@ class ClassDocPage:
         self._project_url = builder.project_url
         self._pkg_dir = builder.pkg_dir
         self._api_dir = builder.api_dir
+        self._templates = builder.templates
+        self._value_repr = builder.value_repr
 
     @property
     def builder(self):
@@ -471,151 +1017,278 @@ class ClassDocPage:
     def build(self):
         contents = list()
         fields, properties, methods = _categorize_class_members(self._class_info.members)
+        back_to_top = _create_back_to_top(self._templates, self._project_name)
         if misc.is_namedtuple_class(self._class_info.obj):
-            fields_section = self._create_namedtuple_fields_doc(self._class_info.obj)
+            fields_section = self._create_namedtuple_fields_doc(self._class_info.obj,
+                                                                back_to_top)
         elif issubclass(self._class_info.obj, Enum):
-            fields_section = self._create_enum_fields_doc(self._class_info.obj)
+            fields_section = self._create_enum_fields_doc(self._class_info.obj,
+                                                          back_to_top)
         else:
-            fields_section = self._create_fields_doc(fields)
-        properties_section = self._create_properties_doc(properties)
-        methods_section = self._create_methods_doc(methods)
+            fields_section = self._create_fields_doc(fields, back_to_top)
+        properties_section = self._create_properties_doc(properties, back_to_top)
+        methods_section = self._create_methods_doc(methods, back_to_top)
         # update contents
         for section in (fields_section, properties_section, methods_section):
             if section:
                 contents.append(section)
         #
         module_api_url = misc.build_api_url(self._api_dir, self._module_name, "README.md")
-        header_div = _create_header_div_2(self._project_name, self._project_url,
-                                          self._pkg_dir, self._api_dir, self._module_name)
+        header_div = _create_header_div_2(self._templates, self._project_name,
+                                          self._project_url, self._pkg_dir,
+                                          self._api_dir, self._module_name)
         inheritance = _create_inheritance_segment(self._class_info.bases,
-                                                  self._pkg_dir, self._api_dir)
+                                                  self._pkg_dir, self._api_dir,
+                                                  self._builder.autolink)
         escaped_module_name = misc.escape_emphasis(self._module_name)
         docstring_dict = misc.parse_docstring(self._class_info.doc)
         description = docstring_dict.get("", "No class docstring.")
         escaped_class_name = misc.escape_emphasis(self._class_info.name)
-        text = templates.CLASS_DOC_PAGE.format(header_div=header_div,
-                                               class_name=escaped_class_name,
-                                               module_name=escaped_module_name,
-                                               module_api_url=module_api_url,
-                                               inheritance=inheritance,
-                                               description=description,
-                                               contents="\n\n".join(contents))
-        return text
-
-    def _create_fields_doc(self, fields):
+        buffer = self._templates.get("CLASS_DOC_PAGE").render(
+            list(), header_div=header_div, class_name=escaped_class_name,
+            module_name=escaped_module_name, module_api_url=module_api_url,
+            inheritance=inheritance, description=description,
+            contents=_join("\n\n", contents))
+        return "".join(buffer)
+
+    def _create_fields_doc(self, fields, back_to_top):
         if not fields:
             return
+        render_entry = self._templates.get("TWO_COLUMNS_TABLE_ENTRY").render
         entries = list()
-        for field in fields:
+        for i, field in enumerate(fields):
             key = misc.escape_emphasis(field.name)
-            val = "`{}`".format(repr(field.obj))
-            entry = templates.TWO_COLUMNS_TABLE_ENTRY.format(col1=key, col2=val)
-            entries.append(entry)
-        back_to_top = _create_back_to_top(self._project_name)
-        text = templates.FIELDS_EXPOSED_IN_CLASS.format(contents="\n".join(entries),
-                                                        back_to_top=back_to_top)
-        return text
-
-    def _create_namedtuple_fields_doc(self, obj):
+            val = "`{}`".format(self._value_repr.repr(field.obj))
+            if i:
+                entries.append("\n")
+            render_entry(entries, col1=key, col2=val)
+        return self._templates.get("FIELDS_EXPOSED_IN_CLASS").render(
+            list(), contents=entries, back_to_top=back_to_top)
+
+    def _create_namedtuple_fields_doc(self, obj, back_to_top):
         if not obj._fields:
             return
+        render_entry = self._templates.get("TWO_COLUMNS_TABLE_ENTRY").render
         contents = list()
-        for name in obj._fields:
+        for i, name in enumerate(obj._fields):
             description = getattr(obj, name).__doc__
             description = description if description else "No description."
             description = description.replace("\n", " ")
-            line = templates.TWO_COLUMNS_TABLE_ENTRY.format(col1=misc.escape_emphasis(name),
-                                                            col2=description)
-            contents.append(line)
-        back_to_top = _create_back_to_top(self._project_name)
-        text = templates.FIELDS_EXPOSED_IN_NAMEDTUPLE.format(contents="\n".join(contents),
-                                                             back_to_top=back_to_top)
-        return text
+            if i:
+                contents.append("\n")
+            render_entry(contents, col1=misc.escape_emphasis(name), col2=description)
+        return self._templates.get("FIELDS_EXPOSED_IN_NAMEDTUPLE").render(
+            list(), contents=contents, back_to_top=back_to_top)
 
-    def _create_enum_fields_doc(self, obj):
+    def _create_enum_fields_doc(self, obj, back_to_top):
         if not obj.__members__:
             return
+        render_entry = self._templates.get("TWO_COLUMNS_TABLE_ENTRY").render
         contents = list()
-        for item in obj:
+        for i, item in enumerate(obj):
             name, value = item.name, item.value
-            value = "`{}`".format(repr(value))
-            line = templates.TWO_COLUMNS_TABLE_ENTRY.format(col1=misc.escape_emphasis(name),
-                                                            col2=value)
-            contents.append(line)
-        back_to_top = _create_back_to_top(self._project_name)
-        text = templates.FIELDS_EXPOSED_IN_ENUM.format(contents="\n".join(contents),
-                                                       back_to_top=back_to_top)
-        return text
-
-    def _create_properties_doc(self, properties):
+            value = "`{}`".format(self._value_repr.repr(value))
+            if i:
+                contents.append("\n")
+            render_entry(contents, col1=misc.escape_emphasis(name), col2=value)
+        return self._templates.get("FIELDS_EXPOSED_IN_ENUM").render(
+            list(), contents=contents, back_to_top=back_to_top)
+
+    def _create_properties_doc(self, properties, back_to_top):
         if not properties:
             return
+        render_entry = self._templates.get("THREE_COLUMNS_TABLE_ENTRY").render
         entries = list()
-        for prop in properties:
+        for i, prop in enumerate(properties):
             property_methods = _name_property_methods(prop)
             methods_as_str = "_{}_".format(", ".join(property_methods))
             docstring_dict = misc.parse_docstring(prop.doc)
             doc = docstring_dict.get("", "No docstring.")
             escaped_property_name = misc.escape_emphasis(prop.name)
-            entry = templates.THREE_COLUMNS_TABLE_ENTRY.format(col1=escaped_property_name,
-                                                               col2=methods_as_str,
-                                                               col3=doc)
-            entries.append(entry)
-        back_to_top = _create_back_to_top(self._project_name)
-        text = templates.PROPERTIES_EXPOSED_IN_CLASS.format(contents="\n".join(entries),
-                                                            back_to_top=back_to_top)
-        return text
-
-    def _create_methods_doc(self, methods):
+            if i:
+                entries.append("\n")
+            render_entry(entries, col1=escaped_property_name, col2=methods_as_str,
+                         col3=doc)
+        return self._templates.get("PROPERTIES_EXPOSED_IN_CLASS").render(
+            list(), contents=entries, back_to_top=back_to_top)
+
+    def _create_methods_doc(self, methods, back_to_top):
         if not methods:
             return
         contents = list()
         index_of_methods = list()
-        for method_info in methods:
+        for i, method_info in enumerate(methods):
             decorator = _get_decorator(self._class_info, method_info)
-            func_section = _create_func_doc(self._project_name, method_info,
-                                            decorator=decorator)
-            contents.append(func_section)
+            if i:
+                contents.append("\n\n")
+            _render_func_doc(contents, self._templates, self._value_repr, method_info,
+                             back_to_top, decorator=decorator)
             # update index of funcs
             line = "- [{func_name}]({url})"
             line = line.format(func_name=misc.escape_emphasis(method_info.name),
                                url=misc.urlify_section_title(method_info.name))
             index_of_methods.append(line)
         index_of_methods = "\n".join(index_of_methods)
-        methods_section = templates.METHODS_SECTION.format(index_of_methods=index_of_methods,
-                                                           contents="\n\n".join(contents))
-        return methods_section
+        return self._templates.get("METHODS_SECTION").render(
+            list(), index_of_methods=index_of_methods, contents=contents)
 
 
 def _get_decorator(class_info, method_info):
-    decorator = ""
-    obj = None
-    for cls in class_info.obj.__mro__:
-        try:
-            obj = cls.__dict__[method_info.name]
-        except KeyError as e:
+    return get_method_decorator(class_info.obj, method_info.name)
+
+
+def _create_ir_state(data):
+    # modules of an IR file have no source file to stat
+    return {"size": None, "mtime_ns": None, "sha256": data["sha256"]}
+
+
+def _create_recorded_state(entry):
+    return {"size": entry.get("size"), "mtime_ns": entry.get("mtime_ns"),
+            "sha256": entry.get("sha256")}
+
+
+def _build_page_path(module_name, basename):
+    return "/".join(("modules", *module_name.split("."), basename))
+
+
+def _render_chunk(builder, module_names, project_modules):
+    for module_info, members in builder._browse(set(module_names)):
+        pages = builder._create_module_pages(module_info, members)
+        deps = find_module_deps(module_info.name, members, project_modules)
+        basenames = [basename for basename, _ in pages]
+        symbols, refs, search_docs = dict(), set(), list()
+        if builder.autolink:
+            symbols = _collect_symbols(builder.api_dir, module_info, members, basenames)
+            for _, text in pages:
+                refs.update(find_refs(text))
+        if builder.search:
+            search_docs = _collect_search_docs(builder.api_dir, module_info,
+                                               members, basenames)
+        yield _RenderedModule(module_info.name, module_info.doc, pages, deps,
+                              symbols, refs, search_docs)
+        module_info = members = None
+        if builder.evict:
+            builder.value_repr.clear()
+
+
+def _render_chunk_task(task):
+    # runs in a worker process
+    config, options, module_names, project_modules, profile = task
+    builder = Builder(*config, **options)
+    if not profile:
+        return list(_render_chunk(builder, module_names, project_modules)), None
+    profiler = Profiler()
+    with activate(profiler):
+        results = list(_render_chunk(builder, module_names, project_modules))
+    return results, profiler.get_data()
+
+
+def find_module_deps(module_name, members, project_modules):
+    """Find the project modules that the pages of a module depend on, that is, the
+    modules that define members exposed in the module or classes inherited by its classes
+
+    [param]
+    - module_name: The dotted name of the module
+    - members: The list of `mikedoc.MemberInfo` instances of the module
+    - project_modules: Collection of the dotted names of the modules of the package
+
+    [return]
+    Return a set of dotted module names, `module_name` excluded"""
+    aliases = dict()
+    for name in project_modules:
+        aliases[name] = name
+        if name.endswith(".__init__"):
+            aliases[name[:-len(".__init__")]] = name
+    deps = set()
+    for member in members:
+        objs = list(member.obj.__mro__) if member.is_class else [member.obj]
+        for obj in objs:
+            dep = aliases.get(getattr(obj, "__module__", None))
+            if dep and dep != module_name:
+                deps.add(dep)
+    return deps
+
+
+def _collect_symbols(api_dir, module_info, members, basenames):
+    """Return the dictionary of the symbols (dotted names and URLs) documented
+    in the pages of a module. Members of a `__init__` module are indexed under
+    the package name too."""
+    urls = dict()
+    for kind, name, url, info in _iter_module_symbols(api_dir, module_info,
+                                                       members, basenames):
+        urls.setdefault(name, url)
+    module_name = module_info.name
+    prefixes = [module_name]
+    if module_name.endswith(".__init__"):
+        prefixes.append(module_name[:-len(".__init__")])
+    symbols = dict()
+    for prefix in prefixes:
+        for name, url in urls.items():
+            symbols["{}.{}".format(prefix, name) if name else prefix] = url
+    return symbols
+
+
+def _collect_search_docs(api_dir, module_info, members, basenames):
+    """Return the list of the search documents (kind, dotted name, URL, and short
+    description) of the module and of the functions, classes, methods, and properties
+    documented in its pages. See `mikedoc.search`."""
+    docs = list()
+    module_name = module_info.name
+    if module_name.endswith(".__init__"):
+        prefix = module_name[:-len(".__init__")]
+    else:
+        prefix = module_name
+    for kind, name, url, info in _iter_module_symbols(api_dir, module_info,
+                                                       members, basenames):
+        if kind == "field":
             continue
-    if obj:
-        if isinstance(obj, staticmethod):
-            decorator = "@staticmethod"
-        if isinstance(obj, classmethod):
-            decorator = "@classmethod"
-    return decorator
-
-
-def _ensure_api_dir(root_dir, api_dir):
-    misc.delete_api_dir(root_dir, api_dir)
-    api_dir_parts = misc.split_relative_path(api_dir)
-    content_path = os.path.join(root_dir, *api_dir_parts, "modules")
-    misc.ensure_dir(content_path)
-    mikedoc_filename = os.path.join(root_dir, *api_dir_parts, "MIKEDOC")
-    with open(mikedoc_filename, "w", encoding="utf-8") as file:
-        text = ("API Reference generated with "
-                "[MikeDoc](https://github.com/pyrustic/mikedoc).\n")
-        file.write(text)
-    readme_filename = os.path.join(root_dir, *api_dir_parts, "README.md")
-    with open(readme_filename, "w") as file:
-        pass
+        doc = misc.parse_docstring(info.doc).get("")
+        description = misc.get_short_description(doc, length=MEMBER_DESC_LEN_ON_MODULE_PAGE)
+        docs.append([kind, "{}.{}".format(prefix, name) if name else prefix,
+                     url, description])
+    return docs
+
+
+def _iter_module_symbols(api_dir, module_info, members, basenames):
+    """Yield 4-tuples made of the kind, the name (relative to the module), the URL,
+    and the info (or None) of the module and of each member documented in the
+    pages of the module. The name of the module itself is an empty string."""
+    if not basenames:
+        return
+    module_name = module_info.name
+    fields, funcs, classes = _categorize_module_members(members)
+    yield "module", "", misc.build_api_url(api_dir, module_name, "README.md"), module_info
+    fields_page_url = misc.build_api_url(api_dir, module_name, "fields.md")
+    for field_info in fields:
+        yield "field", field_info.name, fields_page_url, field_info
+    funcs_page_url = misc.build_api_url(api_dir, module_name, "funcs.md")
+    for func_info in funcs:
+        url = funcs_page_url + misc.urlify_section_title(func_info.name)
+        yield "function", func_info.name, url, func_info
+    for class_info in classes:
+        basename = "class-{}.md".format(class_info.name)
+        if basename not in basenames:
+            continue
+        class_page_url = misc.build_api_url(api_dir, module_name, basename)
+        yield "class", class_info.name, class_page_url, class_info
+        fields_table_url = class_page_url + misc.urlify_section_title("Fields table")
+        if issubclass(class_info.obj, Enum):
+            names = [item.name for item in class_info.obj]
+        elif misc.is_namedtuple_class(class_info.obj):
+            names = list(class_info.obj._fields)
+        else:
+            names = list()
+        for name in names:
+            yield "field", "{}.{}".format(class_info.name, name), fields_table_url, None
+        for member in class_info.members:
+            if member.is_property:
+                kind, anchor = "property", "Properties table"
+            elif member.is_field:
+                kind, anchor = "field", "Fields table"
+            else:
+                kind, anchor = "method", member.name
+            url = class_page_url + misc.urlify_section_title(anchor)
+            yield kind, "{}.{}".format(class_info.name, member.name), url, member
 
 
 def _categorize_module_members(members):
@@ -646,31 +1319,31 @@ def _categorize_class_members(members):
     return all_fields, all_properties, all_methods
 
 
-def _create_header_div_1(project_name, project_url, pkg_dir, api_dir, module_name):
+def _create_header_div_1(templates, project_name, project_url, pkg_dir, api_dir,
+                         module_name):
     src_url = misc.build_src_url(pkg_dir, module_name)
     escaped_project_name = misc.escape_emphasis(project_name)
     home_url = misc.build_api_url(api_dir)
-    header_div = templates.HEADER_DIV_1.format(project_name=escaped_project_name,
-                                               project_url=project_url,
-                                               home_url=home_url, src_url=src_url)
-    return header_div
+    return templates.get("HEADER_DIV_1").render(list(), project_name=escaped_project_name,
+                                                project_url=project_url,
+                                                home_url=home_url, src_url=src_url)
 
 
-def _create_header_div_2(project_name, project_url, pkg_dir, api_dir, module_name):
+def _create_header_div_2(templates, project_name, project_url, pkg_dir, api_dir,
+                         module_name):
     src_url = misc.build_src_url(pkg_dir, module_name)
     api_url = misc.build_api_url(api_dir, module_name, "README.md")
     escaped_project_name = misc.escape_emphasis(project_name)
     home_url = misc.build_api_url(api_dir)
-    header_div = templates.HEADER_DIV_2.format(project_name=escaped_project_name,
-                                               project_url=project_url,
-                                               home_url=home_url,
-                                               api_url=api_url, src_url=src_url)
-    return header_div
+    return templates.get("HEADER_DIV_2").render(list(), project_name=escaped_project_name,
+                                                project_url=project_url,
+                                                home_url=home_url,
+                                                api_url=api_url, src_url=src_url)
 
 
-def _create_back_to_top(project_name):
+def _create_back_to_top(templates, project_name):
     href = misc.urlify_section_title("{} API Reference".format(project_name))
-    return templates.BACK_TO_TOP.format(href=href)
+    return templates.get("BACK_TO_TOP").format(href=href)
 
 
 def _name_property_methods(prop):
@@ -683,7 +1356,8 @@ def _name_property_methods(prop):
     return property_methods
 
 
-def _create_func_doc(project_name, func_info, decorator=None):
+def _render_func_doc(buffer, templates, value_repr, func_info, back_to_top,
+                     decorator=None):
     decorator = decorator + "\n" if decorator else ""
     func_name = func_info.name
     docstring_dict = misc.parse_docstring(func_info.doc)
@@ -692,86 +1366,96 @@ def _create_func_doc(project_name, func_info, decorator=None):
     # params
     params = docstring_dict.get("params")
     if params:
-        table = _create_func_params_table(params)
+        table = _create_func_params_table(templates, params)
         contents.append(table)
     # returns
     returns_note = docstring_dict.get("returns", "")
     returns_note = returns_note.strip()
     if returns_note:
-        section = _create_func_returns_section(returns_note)
+        section = _create_func_returns_section(templates, returns_note)
         contents.append(section)
     # yields
     yields_note = docstring_dict.get("yields", "")
     yields_note = yields_note.strip()
     if yields_note:
-        section = _create_func_yields_section(yields_note)
+        section = _create_func_yields_section(templates, yields_note)
         contents.append(section)
     # exceptions
     exceptions = docstring_dict.get("raises")
     if exceptions:
-        table = _create_func_exceptions_section(exceptions)
+        table = _create_func_exceptions_section(templates, exceptions)
         contents.append(table)
     # append 'back to top' link
-    back_to_top = _create_back_to_top(project_name)
-    contents.append(back_to_top)
+    contents.append([back_to_top])
     escaped_func_name = misc.escape_emphasis(func_name)
-    text = templates.FUNC_DOC_SECTION.format(func_name_1=escaped_func_name,
-                                             func_name_2=func_name,
-                                             description=description,
-                                             decorator=decorator,
-                                             signature=func_info.signature,
-                                             contents="\n\n".join(contents))
-    return text
+    return templates.get("FUNC_DOC_SECTION").render(buffer, func_name_1=escaped_func_name,
+                                                    func_name_2=func_name,
+                                                    description=description,
+                                                    decorator=decorator,
+                                                    signature=value_repr.format_signature(func_info.signature),
+                                                    contents=_join("\n\n", contents))
 
 
-def _create_func_params_table(data):
+def _create_func_params_table(templates, data):
     if not data:
         return
     contents = list()
     intro = data.get("")
     if intro is not None:
-        contents.append(intro)
+        contents.append([intro])
         del data[""]
+    render_entry = templates.get("TWO_COLUMNS_TABLE_ENTRY").render
     entries = list()
-    for key, value in data.items():
-        x = templates.TWO_COLUMNS_TABLE_ENTRY.format(col1=misc.escape_emphasis(key),
-                                                     col2=value)
-        entries.append(x)
-    text = templates.FUNC_PARAMS_TABLE.format(contents="\n".join(entries))
-    contents.append(text)
-    return "\n\n".join(contents)
+    for i, (key, value) in enumerate(data.items()):
+        if i:
+            entries.append("\n")
+        render_entry(entries, col1=misc.escape_emphasis(key), col2=value)
+    contents.append(templates.get("FUNC_PARAMS_TABLE").render(list(), contents=entries))
+    return _join("\n\n", contents)
 
 
-def _create_func_exceptions_section(data):
+def _create_func_exceptions_section(templates, data):
     if not data:
         return
     contents = list()
     intro = data.get("")
     intro = intro if intro else DEFAULT_INTRO_FOR_EXCEPTIONS_SECTION
-    contents.append(intro)
+    contents.append([intro])
     try:
         del data[""]
     except KeyError as e:
         pass
+    render_entry = templates.get("TWO_COLUMNS_TABLE_ENTRY").render
     entries = list()
-    for key, value in data.items():
-        x = templates.TWO_COLUMNS_TABLE_ENTRY.format(col1=key, col2=value)
-        entries.append(x)
-    text = templates.FUNC_EXCEPTIONS_TABLE.format(contents="\n".join(entries))
-    contents.append(text)
-    text = templates.FUNC_EXCEPTIONS_SECTION.format(contents="\n\n".join(contents))
-    return text
+    for i, (key, value) in enumerate(data.items()):
+        if i:
+            entries.append("\n")
+        render_entry(entries, col1=key, col2=value)
+    contents.append(templates.get("FUNC_EXCEPTIONS_TABLE").render(list(), contents=entries))
+    return templates.get("FUNC_EXCEPTIONS_SECTION").render(list(),
+                                                           contents=_join("\n\n", contents))
 
 
-def _create_func_returns_section(text):
-    return templates.FUNC_RETURNS_LINE.format(text=text.strip())
+def _create_func_returns_section(templates, text):
+    return templates.get("FUNC_RETURNS_LINE").render(list(), text=text.strip())
 
 
-def _create_func_yields_section(text):
-    return templates.FUNC_YIELDS_LINE.format(text=text.strip())
+def _create_func_yields_section(templates, text):
+    return templates.get("FUNC_YIELDS_LINE").render(list(), text=text.strip())
 
 
-def _create_inheritance_segment(bases, pkg_dir, api_dir):
+def _join(separator, fragments):
+    """Join fragments (lists of strings) with a separator into a new fragment,
+    without joining their strings"""
+    buffer = list()
+    for i, fragment in enumerate(fragments):
+        if i:
+            buffer.append(separator)
+        buffer.extend(fragment)
+    return buffer
+
+
+def _create_inheritance_segment(bases, pkg_dir, api_dir, autolink=False):
     cache = list()
     for base in bases:
         class_dotted_name = misc.get_class_dotted_name(base, escape_md=False)
@@ -781,6 +1465,10 @@ def _create_inheritance_segment(bases, pkg_dir, api_dir):
         class_name = parts[-1]
         edited_class_name = class_dotted_name.replace(".__init__.", ".")
         escaped_class_name = misc.escape_emphasis(edited_class_name)
+        # with autolink, the symbol index links the base class if it is documented
+        if autolink:
+            cache.append("`{}`".format(edited_class_name))
+            continue
         # if the base class is part of the project, we will turn it into a link
         if pkg_name == misc.split_relative_path(pkg_dir)[-1]:
             basename = "class-{}.md".format(class_name)
@@ -4,6 +4,11 @@ import os.path
 import kvf
 import paradict
 import mikedoc
+from mikedoc import ir, errors
+from mikedoc.watcher import Watcher
+from mikedoc.daemon import Daemon, request_build, request_stop
+from mikedoc.profiler import Profiler
+from mikedoc.reprs import ValueRepr
 
 
 __all__ = ["Cli"]
@@ -15,7 +20,34 @@ https://github.com/pyrustic/mikedoc
 
 COMMANDS:
     init        Create the config file
-    build       Build the API reference"""
+    build       Build the API reference
+    watch       Build the API reference, then rebuild it on changes
+    serve       Preview the API reference over HTTP, rendering pages on demand
+    daemon      Keep the package imported and build on request of 'build --daemon'
+    dump        Save the description of the package in an IR file
+
+BUILD OPTIONS:
+    --workers N     Render modules with N worker processes
+    --profile       Print the time spent in each phase of the build
+    --profile FILE  Same, and save the detailed report in a JSON file
+    --ir FILE       Build from an IR file instead of importing the package
+    --since REF     Rebuild only the modules changed since the git reference REF
+    --archive FILE  Build into a zip or tar.gz archive instead of the api directory
+    --daemon        Ask the daemon of the project to build the API reference
+
+WATCH OPTIONS:
+    --workers N     Render modules with N worker processes
+    --interval S    Scan source files every S seconds (default: 0.1)
+
+SERVE OPTIONS:
+    --host HOST     Address to listen on (default: 127.0.0.1)
+    --port N        Port to listen on (default: 8000)
+
+DAEMON OPTIONS:
+    --stop          Stop the daemon of the project
+
+DUMP OPTIONS:
+    --output FILE   Path to the IR file (default: mikedoc-ir.json)"""
 
 
 CONFIG_TEXT = """\
@@ -36,7 +68,41 @@ api_dir = 'docs/api'
 CONFIG_SCHEMA = {"project_name": "str",
                  "project_url": "str",
                  "pkg_dir": "str",
-                 "api_dir": "str"}
+                 "api_dir": "str",
+                 "incremental": "bool",
+                 "engine": "str",
+                 "workers": "int",
+                 "atomic": "bool",
+                 "lazy": "bool",
+                 "timeout": "int",
+                 "memory_limit": "int",
+                 "autolink": "bool",
+                 "search": "bool",
+                 "evict": "bool",
+                 "templates_dir": "str",
+                 "repr_depth": "int",
+                 "repr_items": "int",
+                 "repr_length": "int",
+                 "writers": "int"}
+
+
+# options of the build command and their converters
+BUILD_OPTIONS = {"workers": int, "profile": str, "ir": str, "since": str,
+                 "archive": str, "daemon": str}
+# options of the watch command and their converters
+WATCH_OPTIONS = {"workers": int, "interval": float}
+# options of the serve command and their converters
+SERVE_OPTIONS = {"workers": int, "host": str, "port": int}
+# settings of the config file used by the serve command
+SERVE_SETTINGS = ("project_name", "project_url", "pkg_dir", "api_dir", "engine",
+                  "workers", "lazy", "timeout", "memory_limit", "templates_dir",
+                  "repr_depth", "repr_items", "repr_length")
+# options of the daemon command and their converters
+DAEMON_OPTIONS = {"stop": str}
+# options of the dump command and their converters
+DUMP_OPTIONS = {"output": str}
+# default path to the IR file created by the dump command
+IR_FILENAME = "mikedoc-ir.json"
 
 
 class Cli:
@@ -63,15 +129,29 @@ class Cli:
         self._silent_mode = val
 
     def run(self, *args):
-        """Run a command. Valid commands are `init`, `build` and `help`."""
-        if not args or len(args) > 1:
+        """Run a command. Valid commands are `init`, `build`, `watch`, `serve`, `daemon`,
+        `dump` and `help`.
+        Options follow the command, either as `--name value` or `--name=value`."""
+        if not args:
             self.echo(HELP_TEXT)
             return False
         command = args[0].lower()
-        if command == "init":
+        options = parse_options(args[1:])
+        if options is None:
+            self.echo(HELP_TEXT)
+            return False
+        if command == "init" and not options:
             return self._create_config_file()
         elif command == "build":
-            return self._build_api_reference()
+            return self._build_api_reference(options)
+        elif command == "watch":
+            return self._watch_api_reference(options)
+        elif command == "serve":
+            return self._serve_api_reference(options)
+        elif command == "daemon":
+            return self._run_daemon(options)
+        elif command == "dump":
+            return self._dump_ir(options)
         else:
             self.echo(HELP_TEXT)
             return False
@@ -94,14 +174,167 @@ class Cli:
         self.echo("Config file 'mikedoc.kvf' created !")
         return True
 
-    def _build_api_reference(self):
+    def _build_api_reference(self, options):
+        config = self._load_config()
+        if not config:
+            return False
+        if not self._apply_options(config, options, BUILD_OPTIONS):
+            return False
+        ir_filename = config.pop("ir", None)
+        if ir_filename:
+            config["ir_file"] = os.path.abspath(ir_filename)
+        if config.get("archive"):
+            config["archive"] = os.path.abspath(config["archive"])
+        report_filename = config.pop("profile", None)
+        if config.pop("daemon", None) is not None:
+            return self._request_build(config, report_filename)
+        if report_filename is not None:
+            config["profiler"] = Profiler()
+        try:
+            stats = build_api_reference(self._root_dir, config)
+        except errors.Error as e:
+            self.echo("Build failed: {}".format(e))
+            return False
+        self._echo_stats(config, stats)
+        if report_filename is not None:
+            self.echo(config["profiler"].create_summary())
+        if report_filename:
+            config["profiler"].save_report(report_filename)
+            self.echo("Profile report saved in '{}'.".format(report_filename))
+        return True
+
+    def _watch_api_reference(self, options):
         config = self._load_config()
         if not config:
             return False
-        build_api_reference(self._root_dir, config)
-        self.echo("API reference built in '{}' !".format(config.get("api_dir")))
+        if not self._apply_options(config, options, WATCH_OPTIONS):
+            return False
+        # builds of the watcher are always incremental
+        config.pop("incremental", None)
+        watcher = Watcher(self._root_dir, **config)
+        self.echo("Watching '{}' for changes. Press Ctrl+C to stop.".format(watcher.pkg_dir))
+
+        def on_build(stats, error):
+            if error is None:
+                self._echo_stats(config, stats)
+            else:
+                self.echo("Build failed: {}: {}".format(type(error).__name__, error))
+        try:
+            watcher.watch(on_build)
+        except KeyboardInterrupt as e:
+            pass
+        return True
+
+    def _serve_api_reference(self, options):
+        config = self._load_config()
+        if not config:
+            return False
+        if not self._apply_options(config, options, SERVE_OPTIONS):
+            return False
+        # imported here, since the http modules are only needed by this command
+        from mikedoc.server import Server, HOST, PORT
+        settings = {name: config[name] for name in SERVE_SETTINGS if name in config}
+        server = Server(self._root_dir, **settings)
+        host = config.get("host") or HOST
+        port = config.get("port", PORT)
+
+        def on_listen(url):
+            self.echo("Serving the API reference at {} . Press Ctrl+C to stop.".format(url))
+        try:
+            server.serve(host, port, on_listen)
+        except KeyboardInterrupt as e:
+            pass
+        except OSError as e:
+            self.echo("Failed to serve on {}:{}: {}".format(host, port, e))
+            return False
         return True
 
+    def _run_daemon(self, options):
+        if not self._apply_options(dict(), options, DAEMON_OPTIONS):
+            return False
+        if "stop" in options:
+            try:
+                request_stop(self._root_dir)
+            except errors.Error as e:
+                self.echo(str(e))
+                return False
+            self.echo("Daemon stopped !")
+            return True
+        config = self._load_config()
+        if not config:
+            return False
+        daemon = Daemon(self._root_dir)
+
+        def on_build(stats, error):
+            if error is None:
+                self._echo_stats(config, stats)
+            else:
+                self.echo("Build failed: {}: {}".format(type(error).__name__, error))
+        self.echo("Starting the daemon on '{}'. Press Ctrl+C to stop.".format(daemon.socket_path))
+        try:
+            daemon.serve(on_build, config)
+        except KeyboardInterrupt as e:
+            pass
+        except errors.Error as e:
+            self.echo(str(e))
+            return False
+        return True
+
+    def _request_build(self, config, report_filename):
+        if report_filename is not None:
+            self.echo("The '--profile' option isn't available with '--daemon'.")
+            return False
+        try:
+            stats = request_build(self._root_dir, config)
+        except errors.Error as e:
+            self.echo("Build failed: {}".format(e))
+            return False
+        self._echo_stats(config, stats)
+        return True
+
+    def _dump_ir(self, options):
+        config = self._load_config()
+        if not config:
+            return False
+        if not self._apply_options(config, options, DUMP_OPTIONS):
+            return False
+        filename = config.get("output") or IR_FILENAME
+        value_repr = ValueRepr(config.get("repr_depth"), config.get("repr_items"),
+                               config.get("repr_length"))
+        try:
+            data = ir.create_ir(self._root_dir, config["pkg_dir"],
+                                engine=config.get("engine", "import"),
+                                lazy=config.get("lazy", False),
+                                workers=config.get("workers", 1),
+                                timeout=config.get("timeout"),
+                                memory_limit=config.get("memory_limit"),
+                                evict=config.get("evict", False),
+                                value_repr=value_repr)
+            ir.save_ir(data, filename)
+        except errors.Error as e:
+            self.echo("Dump failed: {}".format(e))
+            return False
+        self.echo("IR of {} modules saved in '{}' !".format(len(data["modules"]), filename))
+        return True
+
+    def _apply_options(self, config, options, allowed):
+        for name, value in options.items():
+            converter = allowed.get(name)
+            if converter is None:
+                self.echo(HELP_TEXT)
+                return False
+            try:
+                config[name] = converter(value)
+            except ValueError as e:
+                self.echo("Invalid value '{}' for option '--{}'.".format(value, name))
+                return False
+        return True
+
+    def _echo_stats(self, config, stats):
+        target = config.get("archive") or config.get("api_dir")
+        self.echo("API reference built in '{}' !".format(target))
+        self.echo("{} files written, {} unchanged, {} deleted.".format(*stats))
+
     def _load_config(self):
         filename = os.path.join(self._root_dir, "mikedoc.kvf")
         if not os.path.exists(filename):
@@ -126,6 +359,23 @@ def create_config_text(root_dir):
                               pkg_dir=pkg_dir)
 
 
+def parse_options(args):
+    """Parse options such as `--name value` or `--name=value`. An option
+    followed by another option (or by nothing) gets an empty string as value.
+    Return a dictionary or None if an argument isn't a valid option"""
+    options = dict()
+    args = list(args)
+    while args:
+        arg = args.pop(0)
+        if not arg.startswith("--") or len(arg) == 2:
+            return
+        name, sep, value = arg[2:].partition("=")
+        if not sep:
+            value = args.pop(0) if args and not args[0].startswith("--") else ""
+        options[name.replace("-", "_")] = value
+    return options
+
+
 def load_config(filename):
     config = kvf.get_config(filename).get("")
     if not paradict.is_valid(config, CONFIG_SCHEMA):
@@ -134,4 +384,4 @@ def load_config(filename):
 
 
 def build_api_reference(root_dir, config):
-    mikedoc.build(root_dir, **config)
+    return mikedoc.build(root_dir, **config)
@@ -0,0 +1,373 @@
+"""Build daemon. A daemon is a long-lived process that keeps the package imported
+between builds, so that a build only imports again the modules whose source files
+changed (and the modules importing them), then renders their pages incrementally.
+Clients ask the daemon of a project to build over a Unix domain socket, with one
+JSON request per connection. The socket lives in a directory that only its owner
+can access. Unix domain sockets aren't available on Windows."""
+import os
+import os.path
+import sys
+import json
+import types
+import stat
+import socket
+import hashlib
+import tempfile
+import importlib
+from mikedoc import misc, errors
+from mikedoc.builder import Builder
+from mikedoc.browser import unload_module
+from mikedoc.output import OutputStats
+
+
+__all__ = ["Daemon", "get_socket_path", "request_build", "request_stop"]
+
+
+# name of the private directory of the sockets of a user
+SOCKET_DIRNAME = "mikedoc"
+SOCKET_SUFFIX = ".sock"
+# keyword arguments of `mikedoc.build` accepted from clients
+CONFIG_KEYS = ("project_name", "project_url", "pkg_dir", "api_dir", "incremental",
+               "engine", "workers", "atomic", "lazy", "timeout", "memory_limit",
+               "ir_file", "autolink", "search", "evict", "templates_dir", "repr_depth",
+               "repr_items", "repr_length", "since", "writers", "archive")
+# maximum number of pending connections
+BACKLOG = 8
+ENCODING = "utf-8"
+
+
+def get_socket_path(root_dir):
+    """Get the default path to the socket of the daemon of a project. Sockets live in
+    a private directory of the user, either in the runtime directory of the user
+    (`XDG_RUNTIME_DIR`) or in the temporary directory, since the length of their
+    paths is limited. The directory isn't created by this function.
+
+    [param]
+    - root_dir: The project root directory
+
+    [return]
+    Return the absolute path to the socket"""
+    key = os.path.realpath(root_dir).encode(ENCODING, "surrogateescape")
+    basename = hashlib.sha1(key).hexdigest()[:16] + SOCKET_SUFFIX
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isabs(runtime_dir):
+        path = os.path.join(runtime_dir, SOCKET_DIRNAME)
+    else:
+        uid = os.getuid() if hasattr(os, "getuid") else 0
+        dirname = "{}-{}".format(SOCKET_DIRNAME, uid)
+        path = os.path.join(tempfile.gettempdir(), dirname)
+    return os.path.join(path, basename)
+
+
+def request_build(root_dir, config, socket_path=None):
+    """Ask the daemon of a project to build the API reference
+
+    [param]
+    - root_dir: The project root directory
+    - config: Dictionary of the keyword arguments of `mikedoc.build` (except `root_dir`).
+    Values must be JSON serializable. Builds of the daemon are always incremental.
+    - socket_path: Path to the socket of the daemon, defaults to `get_socket_path(root_dir)`
+
+    [return]
+    Return the `mikedoc.OutputStats` of the build
+
+    [raise]
+    - mikedoc.errors.Error: Raised when no daemon is listening, or when the build failed"""
+    response = _send_request(root_dir, socket_path, {"command": "build",
+                                                     "config": config})
+    return OutputStats(*response["stats"])
+
+
+def request_stop(root_dir, socket_path=None):
+    """Ask the daemon of a project to stop once the current build is done
+
+    [param]
+    - root_dir: The project root directory
+    - socket_path: Path to the socket of the daemon, defaults to `get_socket_path(root_dir)`
+
+    [raise]
+    - mikedoc.errors.Error: Raised when no daemon is listening"""
+    _send_request(root_dir, socket_path, {"command": "stop"})
+
+
+class Daemon:
+    """Class to build the API reference of a project on request, keeping its package
+    imported between builds. Before each build, the source files of the package are
+    checked by modification time and size. With the "import" engine, the modules whose
+    source files changed are removed from `sys.modules`, along with the modules of the
+    package that refer to them or to their objects, so that only these modules are
+    imported again. Builds are incremental, so only the pages of the modules that changed
+    (and of the modules depending on them) are rendered again, along with the home page.
+    Requests are handled one at a time."""
+    def __init__(self, root_dir, socket_path=None):
+        """Init
+
+        [param]
+        - root_dir: The project root directory
+        - socket_path: Path to the socket to listen on, defaults to
+        `get_socket_path(root_dir)`"""
+        self._root_dir = root_dir
+        self._socket_path = socket_path if socket_path else get_socket_path(root_dir)
+        # module name -> (modification time, size) of the source file
+        self._states = None
+        self._pkg_dir = None
+
+    @property
+    def root_dir(self):
+        return self._root_dir
+
+    @property
+    def socket_path(self):
+        return self._socket_path
+
+    def build(self, config):
+        """Build the API reference incrementally. The first build with the "import"
+        engine imports every module of the package, so that the next builds find
+        them in `sys.modules`.
+
+        [param]
+        - config: Dictionary of the keyword arguments of `mikedoc.build`
+        (except `root_dir`) whose names are listed in CONFIG_KEYS.
+        The `incremental` argument is ignored.
+
+        [return]
+        Return a `mikedoc.OutputStats` named tuple
+
+        [raise]
+        - mikedoc.errors.Error: Raised when an argument isn't accepted"""
+        for name in config:
+            if name not in CONFIG_KEYS:
+                raise errors.Error("Unknown setting '{}'".format(name))
+        config = dict(config)
+        config["incremental"] = True
+        engine = config.get("engine", "import")
+        if engine == "import" and not config.get("ir_file"):
+            self._refresh(config["pkg_dir"])
+        builder = Builder(self._root_dir, **config)
+        return builder.build()
+
+    def serve(self, callback=None, config=None):
+        """Listen on the socket and build on request until a stop request is received
+        or until interrupted (KeyboardInterrupt). The socket file is removed at the end.
+
+        [param]
+        - callback: Function called after each build with two arguments: the
+        `mikedoc.OutputStats` of the build (or None) and the exception raised
+        during the build (or None). Exceptions are sent to the client anyway.
+        - config: Optional configuration of a first build, made once the socket
+        listens, so that the package is imported before the first request.
+        See the `build` method.
+
+        [raise]
+        - mikedoc.errors.Error: Raised when Unix domain sockets aren't available,
+        or when a daemon is already listening on the socket"""
+        server = self._listen()
+        try:
+            if config is not None:
+                self._run(config, callback)
+            while True:
+                connection, _ = server.accept()
+                with connection:
+                    try:
+                        if not self._handle(connection, callback):
+                            break
+                    except OSError as e:
+                        # the client left
+                        continue
+        finally:
+            server.close()
+            try:
+                os.remove(self._socket_path)
+            except OSError as e:
+                pass
+
+    def _listen(self):
+        if not hasattr(socket, "AF_UNIX"):
+            raise errors.Error("Unix domain sockets aren't available on this platform")
+        _ensure_private_dir(os.path.dirname(self._socket_path))
+        if os.path.exists(self._socket_path):
+            try:
+                _connect(self._socket_path).close()
+            except errors.Error as e:
+                # socket left by a daemon that didn't stop properly
+                os.remove(self._socket_path)
+            else:
+                msg = "A daemon is already listening on '{}'".format(self._socket_path)
+                raise errors.Error(msg)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # only the owner can connect to the daemon, from the moment the socket exists
+        umask = os.umask(0o177)
+        try:
+            server.bind(self._socket_path)
+            server.listen(BACKLOG)
+        except BaseException as e:
+            server.close()
+            raise
+        finally:
+            os.umask(umask)
+        return server
+
+    def _handle(self, connection, callback):
+        with connection.makefile("rwb") as stream:
+            line = stream.readline()
+            if not line:
+                # connection made to check whether the daemon is listening
+                return True
+            try:
+                request = json.loads(line.decode(ENCODING))
+                command = request["command"]
+            except (ValueError, KeyError, TypeError) as e:
+                _write_message(stream, {"error": "Invalid request"})
+                return True
+            if command == "stop":
+                _write_message(stream, dict())
+                return False
+            if command != "build":
+                msg = "Unknown command '{}'".format(command)
+                _write_message(stream, {"error": msg})
+                return True
+            stats, error = self._run(request.get("config") or dict(), callback)
+            if error is None:
+                _write_message(stream, {"stats": list(stats)})
+            else:
+                msg = "{}: {}".format(type(error).__name__, error)
+                _write_message(stream, {"error": msg})
+        return True
+
+    def _run(self, config, callback):
+        try:
+            stats = self.build(config)
+        except Exception as e:
+            if callback is not None:
+                callback(None, e)
+            return None, e
+        if callback is not None:
+            callback(stats, None)
+        return stats, None
+
+    def _refresh(self, pkg_dir):
+        states = self._scan(pkg_dir)
+        if self._states is None or pkg_dir != self._pkg_dir:
+            if self._pkg_dir is not None:
+                self._unload(set(self._states.keys()))
+            self._pkg_dir = pkg_dir
+            self._states = states
+            self._import(states.keys())
+            return
+        changed = {module_name for module_name, state in states.items()
+                   if self._states.get(module_name) != state}
+        changed.update(set(self._states.keys()) - set(states.keys()))
+        self._states = states
+        if changed:
+            self._unload(changed)
+
+    def _scan(self, pkg_dir):
+        states = dict()
+        path = misc.build_absolute_path(self._root_dir, pkg_dir)
+        for filename in misc.iter_py_files(path):
+            module_name = misc.build_module_name(self._root_dir, pkg_dir, filename)
+            try:
+                stat = os.stat(filename)
+            except FileNotFoundError as e:
+                continue
+            states[module_name] = (stat.st_mtime_ns, stat.st_size)
+        return states
+
+    def _import(self, module_names):
+        with misc.mount_project(self._root_dir, self._pkg_dir):
+            for module_name in module_names:
+                try:
+                    importlib.import_module(module_name)
+                except Exception as e:
+                    # the build reports it
+                    pass
+
+    def _unload(self, module_names):
+        pkg_name = misc.split_relative_path(self._pkg_dir)[-1]
+        stale = set()
+        for module_name in module_names:
+            stale.add(module_name)
+            # "package.__init__" is also imported as "package"
+            if module_name.endswith(".__init__"):
+                stale.add(module_name[:-len(".__init__")])
+        loaded = [name for name in sys.modules
+                  if name == pkg_name or name.startswith(pkg_name + ".")]
+        # modules referring to stale modules are stale too
+        found = True
+        while found:
+            found = False
+            for name in loaded:
+                if name not in stale and _refers_to(sys.modules.get(name), stale):
+                    stale.add(name)
+                    found = True
+        for name in stale:
+            unload_module(name)
+        importlib.invalidate_caches()
+
+
+def _refers_to(module, module_names):
+    if module is None:
+        return False
+    for obj in list(vars(module).values()):
+        try:
+            if isinstance(obj, types.ModuleType) and obj.__name__ in module_names:
+                return True
+            if getattr(obj, "__module__", None) in module_names:
+                return True
+        except Exception as e:
+            continue
+    return False
+
+
+def _send_request(root_dir, socket_path, request):
+    socket_path = socket_path if socket_path else get_socket_path(root_dir)
+    with _connect(socket_path) as client:
+        with client.makefile("rwb") as stream:
+            _write_message(stream, request)
+            line = stream.readline()
+    if not line:
+        raise errors.Error("The daemon closed the connection")
+    response = json.loads(line.decode(ENCODING))
+    if "error" in response:
+        raise errors.Error(response["error"])
+    return response
+
+
+def _connect(socket_path):
+    if not hasattr(socket, "AF_UNIX"):
+        raise errors.Error("Unix domain sockets aren't available on this platform")
+    _check_private_dir(os.path.dirname(socket_path))
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError as e:
+        client.close()
+        msg = "No daemon is listening on '{}'".format(socket_path)
+        raise errors.Error(msg)
+    return client
+
+
+def _ensure_private_dir(path):
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError as e:
+        pass
+    _check_private_dir(path)
+
+
+def _check_private_dir(path):
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError as e:
+        # nobody listens there
+        return
+    uid = os.getuid() if hasattr(os, "getuid") else info.st_uid
+    if (not stat.S_ISDIR(info.st_mode) or info.st_uid != uid
+            or stat.S_IMODE(info.st_mode) & 0o077):
+        msg = "The socket directory '{}' must be a directory that only its owner can access"
+        raise errors.Error(msg.format(path))
+
+
+def _write_message(stream, data):
+    stream.write(json.dumps(data).encode(ENCODING) + b"\n")
+    stream.flush()
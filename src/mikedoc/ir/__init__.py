@@ -0,0 +1,344 @@
+"""Serializable intermediate representation (IR) of the data yielded by `mikedoc.browse`.
+An IR is made of dictionaries, lists, strings, booleans, and None only, so it can be
+sent to another process or saved as JSON. Restored objects are stand-ins (see
+`mikedoc.stubs`) that render the same pages as the live objects they describe.
+
+An IR file holds the description of every module of a package. It is created once
+in the runtime environment of the package, then the API reference can be built from
+it anywhere, without importing anything (see the `ir_file` parameter of `mikedoc.Builder`)."""
+import os
+import enum
+import json
+import collections
+from mikedoc import misc, stubs, errors, manifest
+from mikedoc.reprs import ValueRepr
+from mikedoc.browser import (browse, ModuleInfo, MemberInfo, ClassMemberInfo,
+                             get_method_decorator)
+
+
+__all__ = ["create_ir", "save_ir", "load_ir", "iter_ir_modules",
+           "describe_module", "restore_module"]
+
+
+IR_VERSION = 1
+# modules whose classes aren't restored in the MRO of stand-in classes
+_SKIPPED_MODULES = ("builtins", "enum")
+
+
+def create_ir(root_dir, pkg_dir, engine="import", lazy=False, workers=1,
+              timeout=None, memory_limit=None, evict=False, value_repr=None):
+    """Browse a package and describe each of its modules
+
+    [param]
+    - root_dir: The project root directory
+    - pkg_dir: Relative path to the root_dir indicating the package directory.
+    Slash is the only allowed separator. Example: "my_package" or "src/my_package".
+    - engine: Either "import", "ast", or "isolated". See `mikedoc.browse`.
+    - lazy: Boolean to tell whether members should be enumerated lazily. See `mikedoc.browse`.
+    - workers: Number of worker processes of the "isolated" engine
+    - timeout: Maximum number of seconds to import a module with the "isolated" engine
+    - memory_limit: Maximum memory (in megabytes) of a worker process of the "isolated" engine
+    - evict: Boolean to tell whether each module should be released once described.
+    See `mikedoc.browse`.
+    - value_repr: Optional `mikedoc.reprs.ValueRepr` instance to represent values with.
+    See `describe_module`.
+
+    [return]
+    Return a JSON-serializable dictionary with the keys "version", "pkg_dir", and "modules".
+    Modules are listed in the order of `mikedoc.browse`. Each module description has
+    the additional key "sha256" holding the hash of its source file."""
+    path = misc.build_absolute_path(root_dir, pkg_dir)
+    filenames = {misc.build_module_name(root_dir, pkg_dir, filename): filename
+                 for filename in misc.iter_py_files(path)}
+    value_repr = ValueRepr() if value_repr is None else value_repr
+    modules = list()
+    for module_info, members in browse(root_dir, pkg_dir, engine=engine, lazy=lazy,
+                                       workers=workers, timeout=timeout,
+                                       memory_limit=memory_limit, evict=evict,
+                                       value_repr=value_repr):
+        data = describe_module(module_info, members, value_repr)
+        data["sha256"] = manifest.hash_file(filenames[module_info.name])
+        modules.append(data)
+    return {"version": IR_VERSION, "pkg_dir": pkg_dir, "modules": modules}
+
+
+def save_ir(data, filename):
+    """Save an IR in a JSON file. Keys are sorted so that two IR files can be diffed.
+
+    [param]
+    - data: The dictionary returned by `create_ir`
+    - filename: The path to the JSON file
+
+    [raise]
+    - mikedoc.errors.Error: Raised when the file can't be written"""
+    dirname = os.path.dirname(filename)
+    try:
+        if dirname:
+            misc.ensure_dir(dirname)
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=1, sort_keys=True)
+            file.write("\n")
+    except OSError as e:
+        raise errors.Error("Failed to save the IR file '{}': {}".format(filename, e))
+
+
+def load_ir(filename):
+    """Load an IR file
+
+    [param]
+    - filename: The path to the JSON file created with `save_ir`
+
+    [return]
+    Return the dictionary returned by `create_ir`
+
+    [raise]
+    - mikedoc.errors.Error: Raised when the file can't be read, isn't an IR file,
+    or was created by an incompatible version of MikeDoc"""
+    try:
+        with open(filename, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError) as e:
+        raise errors.Error("Failed to load the IR file '{}': {}".format(filename, e))
+    if not isinstance(data, dict) or not isinstance(data.get("modules"), list):
+        raise errors.Error("Invalid IR file '{}'".format(filename))
+    if data.get("version") != IR_VERSION:
+        msg = "Unsupported version of the IR file '{}'".format(filename)
+        raise errors.Error(msg)
+    return data
+
+
+def iter_ir_modules(data, modules=None):
+    """Generator to iterate through the modules of an IR like `mikedoc.browse` does
+
+    [param]
+    - data: The dictionary returned by `create_ir` or `load_ir`
+    - modules: Optional collection of dotted module names to restrict iteration to
+
+    [yield]
+    Yields a 2-tuple made of a `mikedoc.ModuleInfo` instance and the list of
+    `mikedoc.MemberInfo` instances of the module. See `restore_module`."""
+    cache = dict()
+    for item in data["modules"]:
+        if modules is not None and item["name"] not in modules:
+            continue
+        yield restore_module(item, cache)
+
+
+def describe_module(module_info, members, value_repr=None):
+    """Describe a module and its members as serializable data
+
+    [param]
+    - module_info: The `mikedoc.ModuleInfo` instance yielded by `mikedoc.browse`
+    - members: The list of `mikedoc.MemberInfo` instances of the module
+    - value_repr: Optional `mikedoc.reprs.ValueRepr` instance to represent field values,
+    enum members, and default values of parameters with. Defaults to a `ValueRepr`
+    instance with the default limits.
+
+    [return]
+    Return a dictionary"""
+    value_repr = ValueRepr() if value_repr is None else value_repr
+    return {"name": module_info.name, "doc": module_info.doc,
+            "members": [_describe_member(member, value_repr) for member in members]}
+
+
+def restore_module(data, cache=None):
+    """Restore a module described with `describe_module`
+
+    [param]
+    - data: The dictionary returned by `describe_module`
+    - cache: Optional dictionary to share stand-ins (such as placeholders of
+    base classes) between the modules of a build
+
+    [return]
+    Return a 2-tuple made of a `mikedoc.ModuleInfo` instance and the list
+    of `mikedoc.MemberInfo` instances, like `mikedoc.browse` would yield"""
+    cache = dict() if cache is None else cache
+    module = stubs.create_module(data["name"], data["doc"])
+    module_info = ModuleInfo(data["name"], module, data["doc"])
+    members = [_restore_member(item, cache) for item in data["members"]]
+    return module_info, members
+
+
+def _describe_member(member, value_repr):
+    obj = member.obj
+    data = {"name": member.name, "doc": member.doc,
+            "signature": value_repr.format_signature(member.signature),
+            "module": _get_module_name(obj)}
+    if member.is_func:
+        data["kind"] = "func"
+        data["qualname"] = getattr(obj, "__qualname__", member.name)
+    elif member.is_class:
+        data["kind"] = "class"
+        data["qualname"] = obj.__qualname__
+        data["bases"] = [_describe_class(base) for base in member.bases]
+        data["mro"] = [_describe_class(cls) for cls in obj.__mro__[1:]
+                       if cls.__module__ not in _SKIPPED_MODULES]
+        if issubclass(obj, enum.Enum):
+            data["flavor"] = "enum"
+            data["enum_members"] = [[item.name, value_repr.repr(item.value)]
+                                  for item in obj]
+        elif misc.is_namedtuple_class(obj):
+            data["flavor"] = "namedtuple"
+            data["fields"] = [[name, getattr(obj, name).__doc__] for name in obj._fields]
+        else:
+            data["flavor"] = "class"
+        data["members"] = [_describe_class_member(obj, item, value_repr)
+                           for item in member.members]
+    else:
+        data["kind"] = "field"
+        data["repr"] = value_repr.repr(obj)
+    return data
+
+
+def _describe_class_member(cls, member, value_repr):
+    obj = member.obj
+    data = {"name": member.name, "doc": member.doc,
+            "signature": value_repr.format_signature(member.signature),
+            "lineage": [_describe_class(item) for item in member.lineage]}
+    if member.is_property:
+        data["kind"] = "property"
+        data["accessors"] = [bool(obj.fget), bool(obj.fset), bool(obj.fdel)]
+    elif member.is_method:
+        data["kind"] = "method"
+        data["qualname"] = getattr(obj, "__qualname__", member.name)
+        data["decorator"] = get_method_decorator(cls, member.name)
+    else:
+        data["kind"] = "field"
+        data["repr"] = value_repr.repr(obj)
+    return data
+
+
+def _describe_class(cls):
+    return [cls.__module__, cls.__qualname__]
+
+
+def _get_module_name(obj):
+    name = getattr(obj, "__module__", None)
+    return name if isinstance(name, str) else None
+
+
+def _restore_member(data, cache):
+    kind = data["kind"]
+    is_field = is_class = is_func = False
+    bases = members = None
+    if kind == "func":
+        is_func = True
+        obj = stubs.create_function(data["name"], data["qualname"],
+                                    data["module"], data["doc"])
+    elif kind == "class":
+        is_class = True
+        obj = _restore_class(data, cache)
+        bases = tuple(_get_placeholder(item, cache) for item in data["bases"])
+        members = [_restore_class_member(item, data, cache) for item in data["members"]]
+    else:
+        is_field = True
+        obj = _restore_value(data["repr"], data["module"], cache)
+    return MemberInfo(data["name"], obj, data["doc"], data["signature"], bases,
+                      members, is_field, is_class, is_func)
+
+
+def _restore_class_member(data, class_data, cache):
+    kind = data["kind"]
+    is_field = is_property = is_method = False
+    if kind == "property":
+        is_property = True
+        accessors = [_create_accessor(name, flag, class_data)
+                     for name, flag in zip(("fget", "fset", "fdel"), data["accessors"])]
+        obj = property(*accessors, doc=data["doc"])
+    elif kind == "method":
+        is_method = True
+        obj = stubs.create_function(data["name"], data["qualname"],
+                                    class_data["module"], data["doc"])
+    else:
+        is_field = True
+        obj = _restore_value(data["repr"], None, cache)
+    lineage = [_get_placeholder(item, cache) for item in data["lineage"]]
+    return ClassMemberInfo(data["name"], obj, data["doc"], data["signature"], lineage,
+                           is_field, is_property, is_method)
+
+
+def _restore_class(data, cache):
+    """Create a stand-in class whose MRO holds stand-ins of the classes of the
+    original MRO (classes of the builtins and enum modules aside), whose kind
+    (enum, named tuple or class) is the original one, and whose decorated methods
+    are decorated like the original ones"""
+    module_name, qualname = data["module"], data["qualname"]
+    name = qualname.split(".")[-1]
+    chain = list(reversed(data["mro"]))
+    flavor = data["flavor"]
+    if flavor == "enum":
+        base = enum.Enum
+        for item_module, item_qualname in chain:
+            base = base(item_qualname.split(".")[-1], [], module=item_module,
+                        qualname=item_qualname)
+        names = [(item_name, _restore_value(text, None, cache))
+                 for item_name, text in data["enum_members"]]
+        cls = base(name, names, module=module_name, qualname=qualname)
+    elif flavor == "namedtuple":
+        fields = [field_name for field_name, _ in data["fields"]]
+        if chain:
+            root_module, root_qualname = chain.pop(0)
+        else:
+            root_module, root_qualname = module_name, qualname
+        base = collections.namedtuple(root_qualname.split(".")[-1], fields,
+                                      module=root_module)
+        base.__qualname__ = root_qualname
+        for field_name, doc in data["fields"]:
+            getattr(base, field_name).__doc__ = doc
+        cls = _create_class_chain(base, chain, module_name, qualname,
+                                  final=bool(data["mro"]))
+    else:
+        cls = _create_class_chain(None, chain, module_name, qualname, final=True)
+    for item in data["members"]:
+        decorator = item.get("decorator")
+        if not decorator:
+            continue
+        func = stubs.create_function(item["name"], item["qualname"],
+                                     module_name, item["doc"])
+        wrapper = staticmethod if decorator == "@staticmethod" else classmethod
+        type.__setattr__(cls, item["name"], wrapper(func))
+    cls.__doc__ = data["doc"]
+    return cls
+
+
+def _create_class_chain(base, chain, module_name, qualname, final):
+    for item_module, item_qualname in chain:
+        base = _create_class(item_module, item_qualname, base)
+    if not final:
+        return base
+    return _create_class(module_name, qualname, base)
+
+
+def _create_class(module_name, qualname, base):
+    name = qualname.split(".")[-1]
+    bases = (base, ) if base else ()
+    return type(name, bases, {"__module__": module_name,
+                              "__qualname__": qualname,
+                              "__doc__": None})
+
+
+def _create_accessor(name, flag, class_data):
+    if not flag:
+        return None
+    qualname = "{}.{}".format(class_data["qualname"], name)
+    return stubs.create_function(name, qualname, class_data["module"])
+
+
+def _get_placeholder(item, cache):
+    module_name, qualname = item
+    placeholders = cache.setdefault("placeholders", dict())
+    return stubs.create_placeholder_class(module_name, qualname, placeholders)
+
+
+def _restore_value(text, module_name, cache):
+    """Restore a value whose representation is `text`. The `__module__` attribute
+    of the value is `module_name`, like the attribute of the original object."""
+    if module_name is None:
+        return stubs.StaticValue(text)
+    classes = cache.setdefault("values", dict())
+    cls = classes.get(module_name)
+    if cls is None:
+        cls = type("StaticValue", (stubs.StaticValue, ),
+                   {"__module__": module_name, "__slots__": ()})
+        classes[module_name] = cls
+    return cls(text)
@@ -0,0 +1,208 @@
+"""Import modules in worker processes. Each module is imported by one of a pool of
+worker processes, which sends back the description (see `mikedoc.ir`) of the module.
+A module that takes too long to import, exceeds the memory limit, raises an exception
+or crashes its worker is skipped with a warning, and the build goes on."""
+import gc
+import time
+import warnings
+import importlib
+import multiprocessing
+import multiprocessing.connection
+from mikedoc import misc, ir, browser
+try:
+    import resource
+except ImportError as e:  # not available on Windows
+    resource = None
+
+
+__all__ = ["browse_isolated", "ImportFailureWarning"]
+
+
+class ImportFailureWarning(UserWarning):
+    """Warning issued when a module can't be imported in a worker process"""
+    pass
+
+
+def browse_isolated(root_dir, pkg_dir, modules=None, lazy=False, workers=1,
+                    timeout=None, memory_limit=None, evict=False, value_repr=None):
+    """Generator to iterate through each module info and the associated members' info,
+    like `mikedoc.browse` does, except that modules are imported in worker processes
+
+    [param]
+    - root_dir: Project root directory path
+    - pkg_dir: Relative path to the root_dir indicating the package directory.
+    Slash is the only allowed separator. Example: "my_package" or "src/my_package".
+    - modules: Optional collection of dotted module names to restrict browsing to
+    - lazy: Boolean to tell whether members should be enumerated lazily.
+    See `mikedoc.browser.inspect_module`.
+    - workers: Number of worker processes
+    - timeout: Maximum number of seconds to import and describe a module, or None
+    - memory_limit: Maximum size (in megabytes) of the address space of a worker
+    process, or None. This limit is only supported on Unix.
+    - evict: Boolean to tell whether worker processes should release each module
+    once it is described. See `mikedoc.browser.unload_module`.
+    - value_repr: Optional `mikedoc.reprs.ValueRepr` instance with which worker
+    processes represent values. See `mikedoc.ir.describe_module`.
+
+    [yield]
+    Yields a 2-tuple made of a `mikedoc.ModuleInfo` instance and the list of
+    `mikedoc.MemberInfo` instances of the module. Objects are stand-ins restored
+    with `mikedoc.ir.restore_module`. Modules are yielded in the same order as
+    with `mikedoc.browse`.
+    """
+    path = misc.build_absolute_path(root_dir, pkg_dir)
+    module_names = list()
+    for py_filename in misc.iter_py_files(path):
+        module_name = misc.build_module_name(root_dir, pkg_dir, py_filename)
+        if modules is None or module_name in modules:
+            module_names.append(module_name)
+    if not module_names:
+        return
+    cache = dict()
+    pool = _WorkerPool(root_dir, pkg_dir, lazy, min(max(1, workers), len(module_names)),
+                       timeout, memory_limit, evict, value_repr)
+    try:
+        for module_name, status, data in pool.run(module_names):
+            if status != "ok":
+                msg = "Module '{}' skipped: {}".format(module_name, data)
+                warnings.warn(msg, ImportFailureWarning)
+                continue
+            yield ir.restore_module(data, cache)
+    finally:
+        pool.close()
+
+
+class _WorkerPool:
+    def __init__(self, root_dir, pkg_dir, lazy, size, timeout, memory_limit, evict,
+                 value_repr):
+        self._args = (root_dir, pkg_dir, lazy, memory_limit, evict, value_repr)
+        self._timeout = timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [self._start_worker() for _ in range(size)]
+
+    def run(self, module_names):
+        """Yield (module_name, status, data) 3-tuples in the order of `module_names`"""
+        pending = list(reversed(module_names))
+        results = dict()
+        # worker -> (module_name, start time)
+        tasks = dict()
+        for module_name in module_names:
+            while module_name not in results:
+                self._dispatch(pending, tasks)
+                self._collect(tasks, results)
+            yield (module_name, ) + results.pop(module_name)
+
+    def close(self):
+        for worker in self._workers:
+            self._stop_worker(worker)
+        self._workers = list()
+
+    def _dispatch(self, pending, tasks):
+        for i, worker in enumerate(self._workers):
+            if not pending:
+                return
+            if worker in tasks:
+                continue
+            module_name = pending.pop()
+            try:
+                worker[1].send(module_name)
+            except OSError as e:
+                # the worker died between two tasks
+                self._stop_worker(worker)
+                worker = self._workers[i] = self._start_worker()
+                worker[1].send(module_name)
+            tasks[worker] = (module_name, time.monotonic())
+
+    def _collect(self, tasks, results):
+        conns = {worker[1]: worker for worker in tasks}
+        wait_timeout = None
+        if self._timeout is not None:
+            deadline = min(start for _, start in tasks.values()) + self._timeout
+            wait_timeout = max(0, deadline - time.monotonic())
+        ready = multiprocessing.connection.wait(list(conns.keys()), wait_timeout)
+        for conn in ready:
+            worker = conns[conn]
+            module_name, _ = tasks.pop(worker)
+            try:
+                results[module_name] = conn.recv()
+            except (EOFError, OSError) as e:
+                worker[0].join(1)
+                msg = "worker process crashed (exit code {})".format(worker[0].exitcode)
+                results[module_name] = ("error", msg)
+                self._replace_worker(worker)
+        if self._timeout is None:
+            return
+        now = time.monotonic()
+        for worker, (module_name, start) in list(tasks.items()):
+            if now - start < self._timeout:
+                continue
+            del tasks[worker]
+            results[module_name] = ("error", "timeout after {} seconds".format(self._timeout))
+            self._replace_worker(worker)
+
+    def _start_worker(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_work, args=(child_conn, ) + self._args,
+                                        daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _replace_worker(self, worker):
+        i = self._workers.index(worker)
+        self._stop_worker(worker, kill=True)
+        self._workers[i] = self._start_worker()
+
+    def _stop_worker(self, worker, kill=False):
+        process, conn = worker
+        if not kill:
+            try:
+                conn.send(None)
+            except OSError as e:
+                pass
+            process.join(1)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        conn.close()
+
+
+def _work(conn, root_dir, pkg_dir, lazy, memory_limit, evict, value_repr):
+    # runs in a worker process
+    if memory_limit and resource is not None:
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    cache = dict()
+    released = 0
+    with misc.mount_project(root_dir, pkg_dir):
+        while True:
+            try:
+                module_name = conn.recv()
+            except EOFError as e:
+                return
+            if module_name is None:
+                return
+            try:
+                data = _describe(module_name, lazy, cache, value_repr)
+            except BaseException as e:
+                msg = ": ".join(x for x in (type(e).__name__, str(e)) if x)
+                conn.send(("error", msg))
+            else:
+                conn.send(("ok", data))
+            if evict:
+                data = None
+                browser.unload_module(module_name, cache)
+                if value_repr is not None:
+                    value_repr.clear()
+                released += 1
+                if released % browser.GC_INTERVAL == 0:
+                    gc.collect()
+
+
+def _describe(module_name, lazy, cache, value_repr):
+    module = importlib.import_module(module_name)
+    members = browser.inspect_module(module, lazy)
+    module_info = browser.ModuleInfo(module.__name__, module,
+                                     browser.get_printable_doc(module))
+    members = [browser.create_member_info(member, cache) for member in members]
+    return ir.describe_module(module_info, members, value_repr)
@@ -0,0 +1,195 @@
+"""The manifest stored in the api directory to support incremental builds"""
+import os
+import os.path
+import json
+import hashlib
+from mikedoc import misc, output
+
+
+__all__ = ["load_manifest", "save_manifest", "delete_manifest", "create_manifest",
+           "create_entry", "get_file_state", "find_stale_modules"]
+
+
+MANIFEST_FILENAME = misc.MANIFEST_FILENAME
+MANIFEST_VERSION = 1
+
+
+def create_manifest(fingerprint, modules=None):
+    """Create a new manifest dictionary
+
+    [param]
+    - fingerprint: String that identifies the configuration of the build.
+    A manifest whose fingerprint differs from the current one is obsolete.
+    - modules: Dictionary whose keys are dotted module names and whose values are entries
+    created with `mikedoc.manifest.create_entry`
+
+    [return]
+    Return the manifest dictionary"""
+    return {"version": MANIFEST_VERSION,
+            "fingerprint": fingerprint,
+            "modules": modules if modules else dict()}
+
+
+def create_entry(state, doc, pages, deps, symbols=None, refs=None, search_docs=None):
+    """Create the manifest entry of a module
+
+    [param]
+    - state: The file state returned by `mikedoc.manifest.get_file_state`
+    - doc: The docstring of the module
+    - pages: List of basenames of the pages generated for the module.
+    An empty list means that the module isn't listed on the home page.
+    - deps: List of dotted names of the project modules that the pages depend on
+    - symbols: Optional dictionary of the symbols documented in the pages
+    (dotted names and URLs). See `mikedoc.symbols.SymbolIndex`.
+    - refs: Optional collection of the dotted names written between backticks
+    in the pages. See `mikedoc.symbols.find_refs`.
+    - search_docs: Optional list of the search documents of the module. See `mikedoc.search`.
+
+    [return]
+    Return the entry dictionary"""
+    return {"size": state["size"], "mtime_ns": state["mtime_ns"],
+            "sha256": state["sha256"], "doc": doc,
+            "pages": list(pages), "deps": sorted(deps),
+            "symbols": dict(symbols) if symbols else dict(),
+            "refs": sorted(refs) if refs else list(),
+            "search": list(search_docs) if search_docs else list()}
+
+
+def load_manifest(root_dir, api_dir, fingerprint):
+    """Load the manifest stored in the api directory
+
+    [param]
+    - root_dir: The project root directory
+    - api_dir: Relative path to the root_dir indicating the api reference directory
+    - fingerprint: The fingerprint of the current build
+
+    [return]
+    Return the manifest dictionary, or None if the manifest is missing, invalid or obsolete"""
+    path = misc.build_absolute_path(root_dir, api_dir)
+    if not os.path.isfile(os.path.join(path, "MIKEDOC")):
+        return
+    filename = os.path.join(path, MANIFEST_FILENAME)
+    try:
+        with open(filename, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError) as e:
+        return
+    if not isinstance(data, dict):
+        return
+    if data.get("version") != MANIFEST_VERSION:
+        return
+    if data.get("fingerprint") != fingerprint:
+        return
+    if not isinstance(data.get("modules"), dict):
+        return
+    return data
+
+
+def save_manifest(data, root_dir, api_dir):
+    """Save the manifest in the api directory
+
+    [param]
+    - data: The manifest dictionary
+    - root_dir: The project root directory
+    - api_dir: Relative path to the root_dir indicating the api reference directory"""
+    path = misc.build_absolute_path(root_dir, api_dir)
+    filename = os.path.join(path, MANIFEST_FILENAME)
+    text = json.dumps(data, indent=1, sort_keys=True) + "\n"
+    data = output.encode_text(text)
+    if output.has_contents(filename, data):
+        return
+    with open(filename, "wb") as file:
+        file.write(data)
+
+
+def delete_manifest(root_dir, api_dir):
+    """Delete the manifest of the api directory, if any
+
+    [param]
+    - root_dir: The project root directory
+    - api_dir: Relative path to the root_dir indicating the api reference directory
+
+    [return]
+    Return True if the manifest has been deleted, else False"""
+    path = misc.build_absolute_path(root_dir, api_dir)
+    try:
+        os.remove(os.path.join(path, MANIFEST_FILENAME))
+    except FileNotFoundError as e:
+        return False
+    return True
+
+
+def get_file_state(filename, entry=None):
+    """Get the state (size, modification time and hash) of a source file.
+    The hash is reused from the manifest entry when the size and the
+    modification time didn't change.
+
+    [param]
+    - filename: Absolute path to the source file
+    - entry: The previous manifest entry of the module or None
+
+    [return]
+    Return a dictionary with the keys "size", "mtime_ns" and "sha256"."""
+    stat = os.stat(filename)
+    state = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if (entry and entry.get("size") == stat.st_size
+            and entry.get("mtime_ns") == stat.st_mtime_ns):
+        state["sha256"] = entry.get("sha256")
+    else:
+        state["sha256"] = hash_file(filename)
+    return state
+
+
+def hash_file(filename):
+    digest = hashlib.sha256()
+    with open(filename, "rb") as file:
+        for chunk in iter(lambda: file.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_stale_modules(manifest, states, root_dir, api_dir):
+    """Find modules whose pages must be rebuilt
+
+    [param]
+    - manifest: The previous manifest dictionary
+    - states: Dictionary whose keys are dotted module names and whose values are file states
+    - root_dir: The project root directory
+    - api_dir: Relative path to the root_dir indicating the api reference directory
+
+    [return]
+    Return the set of dotted names of the modules to rebuild. A module is stale
+    when its source file changed, when it is new, when one of its pages is missing,
+    or when one of the project modules it depends on is stale itself."""
+    entries = manifest["modules"]
+    changed = set()
+    stale = set()
+    for module_name, state in states.items():
+        entry = entries.get(module_name)
+        if not entry or entry.get("sha256") != state["sha256"]:
+            changed.add(module_name)
+        elif not _pages_exist(root_dir, api_dir, module_name, entry["pages"]):
+            stale.add(module_name)
+    # deleted modules invalidate their dependents too
+    changed.update(name for name in entries if name not in states)
+    stale.update(changed)
+    for module_name in states:
+        if module_name in stale:
+            continue
+        deps = entries[module_name].get("deps", ())
+        if any(dep in changed for dep in deps):
+            stale.add(module_name)
+    return {module_name for module_name in stale if module_name in states}
+
+
+def _pages_exist(root_dir, api_dir, module_name, pages):
+    dirname = build_module_dir(root_dir, api_dir, module_name)
+    for basename in pages:
+        if not os.path.isfile(os.path.join(dirname, basename)):
+            return False
+    return True
+
+
+def build_module_dir(root_dir, api_dir, module_name):
+    api_dir_parts = misc.split_relative_path(api_dir)
+    return os.path.join(root_dir, *api_dir_parts, "modules", *module_name.split("."))
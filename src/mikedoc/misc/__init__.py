@@ -4,9 +4,10 @@ import os.path
 import sys
 import shutil
 import pathlib
+import functools
 import braq
 from contextlib import contextmanager
-from mikedoc import errors
+from mikedoc import errors, profiler
 
 
 __all__ = ["parse_docstring"]
@@ -14,6 +15,12 @@ __all__ = ["parse_docstring"]
 
 SRC_URL_TEMPLATE = "/{pkg_dir}/{path}"
 API_URL_TEMPLATE = "/{api_dir}/{path}"
+MANIFEST_FILENAME = "MANIFEST.json"
+SEARCH_DIRNAME = "search"
+# maximum number of parsed docstrings kept in memory
+DOCSTRING_CACHE_SIZE = 4096
+# maximum number of section anchors kept in memory
+ANCHOR_CACHE_SIZE = 4096
 
 
 def parse_docstring(docstring):
@@ -35,8 +42,30 @@ def parse_docstring(docstring):
     Therefore, the value of the dictionary key "param" or "except" is not a string
     but a dictionary whose keys represent the parameters/exception classes and whose
     values are description/circumstance strings. The empty key represents the intro.
+
+    Parsed docstrings are cached (see `docstring_cache_info`), and each call returns
+    a new dictionary that can be modified without altering the cache.
     """
     docstring = docstring if docstring else ""
+    with profiler.measure("parse"):
+        data = _parse_docstring(docstring)
+    return {key: dict(value) if isinstance(value, dict) else value
+            for key, value in data.items()}
+
+
+def docstring_cache_info():
+    """Return the statistics of the cache of parsed docstrings, as a named tuple
+    with the fields `hits`, `misses`, `maxsize`, and `currsize`"""
+    return _parse_docstring.cache_info()
+
+
+def clear_docstring_cache():
+    """Clear the cache of parsed docstrings and its statistics"""
+    _parse_docstring.cache_clear()
+
+
+@functools.lru_cache(maxsize=DOCSTRING_CACHE_SIZE)
+def _parse_docstring(docstring):
     doc = braq.decode(docstring)
     new_doc = dict()
     for key in doc.keys():
@@ -125,9 +154,22 @@ def build_src_url(pkg_dir, module_name):
 
 def delete_api_dir(root_dir, api_dir):
     path = os.path.join(root_dir, *split_relative_path(api_dir))
-    if not os.path.exists(path):
+    if not is_api_dir(path):
+        return False
+    shutil.rmtree(path)
+    return True
+
+
+def is_api_dir(path):
+    """Tell whether the directory only contains files generated by MikeDoc"""
+    if not os.path.isdir(path):
         return False
-    n = len(os.listdir(path))
+    names = set(os.listdir(path))
+    # the manifest of incremental builds and the search index are optional
+    names.discard(MANIFEST_FILENAME)
+    if os.path.isdir(os.path.join(path, SEARCH_DIRNAME)):
+        names.discard(SEARCH_DIRNAME)
+    n = len(names)
     if n == 0:
         return False
     if n != 3:
@@ -138,10 +180,24 @@ def delete_api_dir(root_dir, api_dir):
         return False
     if not os.path.isdir(os.path.join(path, "modules")):
         return False
-    shutil.rmtree(path)
     return True
 
 
+def remove_empty_dirs(path, root_dir, api_dir):
+    """Remove the directory `path` if it is empty, then its parents,
+    up to the `modules` directory of the api directory"""
+    api_dir_parts = split_relative_path(api_dir)
+    stop = os.path.join(root_dir, *api_dir_parts, "modules")
+    path = os.path.normpath(path)
+    stop = os.path.normpath(stop)
+    while path != stop and path.startswith(stop + os.sep):
+        try:
+            os.rmdir(path)
+        except OSError as e:
+            return
+        path = os.path.dirname(path)
+
+
 def escape_emphasis(text):
     """Cancel emphasis by escaping characters such as hyphen, asterisk, and backtick."""
     # escape *
@@ -174,20 +230,6 @@ def is_printable(char):
         return char.isprintable()
 
 
-def save_api_page(text, root_dir, api_dir, module_name=None,
-                  basename="README.md"):
-    if not text or text.isspace():
-        return False
-    api_dir_parts = split_relative_path(api_dir)
-    module_name_parts = module_name.split(".") if module_name else list()
-    dirname = os.path.join(root_dir, *api_dir_parts, *module_name_parts)
-    ensure_dir(dirname)
-    filename = os.path.join(dirname, basename)
-    with open(filename, "w", encoding="utf-8") as file:
-        file.write(text)
-    return True
-
-
 def iter_py_files(location):
     for root, dirs, filenames in os.walk(location):
         dirs.sort()
@@ -222,7 +264,10 @@ def get_class_dotted_name(klass, escape_md=False):
     return cache
 
 
+@functools.lru_cache(maxsize=ANCHOR_CACHE_SIZE)
 def urlify_section_title(s, prefix="#"):
+    # anchors are cached since the same titles (method names, "Fields table", etc)
+    # come back on every class page
     c = list()
     if prefix:
         c.append(prefix)
@@ -0,0 +1,690 @@
+"""Output layer of the builder. Pages are written to the api directory only when
+their contents changed, and obsolete pages are deleted at the end of the build.
+Writes can be handed over to writer threads, so that rendering goes on while
+files are written (see the `writers` parameter of the outputs).
+
+Pages can also be streamed into a single archive with `ArchiveOutput`, or kept in
+memory with `MemoryOutput`. An output whose `work_dir` is None doesn't store pages
+in a directory, so builds made with it are never incremental and don't save a manifest.
+
+Any object with the same interface can be given to `mikedoc.Builder` as output:
+the `work_dir` and `stats` properties, and the `open`, `write`, `keep`, `flush`,
+`close`, and `abort` methods (see `DirectoryOutput`)."""
+import io
+import os
+import os.path
+import gzip
+import queue
+import shutil
+import tarfile
+import zipfile
+import threading
+from collections import namedtuple
+from mikedoc import misc, errors
+
+
+__all__ = ["DirectoryOutput", "StagedOutput", "ArchiveOutput", "MemoryOutput",
+           "OutputStats"]
+
+
+STAGING_SUFFIX = ".mikedoc-staging"
+BACKUP_SUFFIX = ".mikedoc-backup"
+# directories of the api directory whose obsolete files are deleted
+PRUNED_DIRS = ("modules", misc.SEARCH_DIRNAME)
+# number of queued writes per writer thread
+QUEUE_SIZE_PER_WRITER = 32
+# archive formats by filename extension
+ARCHIVE_FORMATS = {".zip": "zip", ".tar.gz": "tar.gz", ".tgz": "tar.gz"}
+# timestamp of archive members (the earliest date of the zip format)
+ARCHIVE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ARCHIVE_MTIME = 315532800
+
+
+OutputStats = namedtuple("OutputStats", ["written", "skipped", "deleted"])
+
+OutputStats.__doc__ = """Named tuple returned by `mikedoc.build`.
+It contains statistics about the files of the api directory"""
+OutputStats.written.__doc__ = """Number of files written because they were new or changed"""
+OutputStats.skipped.__doc__ = """Number of files left untouched because their contents didn't change,
+pages of unchanged modules kept from the previous build included"""
+OutputStats.deleted.__doc__ = """Number of obsolete files deleted"""
+
+
+class DirectoryOutput:
+    """Write pages to the api directory. A file whose contents are identical to the page
+    isn't written again, so its modification time is preserved."""
+    def __init__(self, root_dir, api_dir, writers=0):
+        """Init
+
+        [param]
+        - root_dir: The project root directory
+        - api_dir: Relative path to the root_dir indicating the api reference directory.
+        Slash is the only allowed separator. Example: "docs/api".
+        - writers: Number of writer threads. With 0, pages are written as soon as
+        `write` is called. Otherwise, pages are put on a bounded queue that writer
+        threads drain, and `flush` waits for them to be written.
+        """
+        self._root_dir = root_dir
+        self._api_dir = api_dir
+        self._writers = writers
+        self._path = misc.build_absolute_path(root_dir, api_dir)
+        self._paths = set()
+        self._dirs = set()
+        self._prune = False
+        self._queue = None
+        self._lock = threading.Lock()
+        self._written = 0
+        self._skipped = 0
+        self._deleted = 0
+
+    @property
+    def root_dir(self):
+        return self._root_dir
+
+    @property
+    def api_dir(self):
+        return self._api_dir
+
+    @property
+    def writers(self):
+        return self._writers
+
+    @property
+    def work_dir(self):
+        """Relative path to the root_dir indicating the directory in which
+        files are being written. It is the api directory itself."""
+        return self._api_dir
+
+    @property
+    def stats(self):
+        """The `mikedoc.OutputStats` of the current build"""
+        return OutputStats(self._written, self._skipped, self._deleted)
+
+    def open(self):
+        """Start a build. Obsolete pages will be deleted when the output is closed,
+        provided that the api directory was already generated by MikeDoc."""
+        self._paths = set()
+        self._written = self._skipped = self._deleted = 0
+        self._prune = os.path.isfile(os.path.join(self._path, "MIKEDOC"))
+        self._ensure_dir(os.path.join(self._path, "modules"))
+        if self._writers > 0:
+            self._queue = _WriteQueue(self._writers)
+
+    def write(self, path, text):
+        """Write a page unless the file already exists with the same contents
+
+        [param]
+        - path: Path of the page, relative to the api directory. Slash is the only
+        allowed separator. Example: "modules/package/module/README.md".
+        - text: The contents of the page
+
+        [return]
+        Return True if the file has been written, False if it was left untouched,
+        or None if the write was handed over to the writer threads"""
+        self._paths.add(path)
+        filename = os.path.join(self._path, *path.split("/"))
+        return self._submit(self._write_file, filename, encode_text(text))
+
+    def keep(self, path):
+        """Mark an existing page as part of the build, so that it won't be deleted
+
+        [param]
+        - path: Path of the page, relative to the api directory"""
+        self._paths.add(path)
+        with self._lock:
+            self._skipped += 1
+
+    def flush(self):
+        """Wait until the writer threads have written the queued pages
+
+        [raise]
+        - OSError: The first error raised while writing a queued page"""
+        write_queue, self._queue = self._queue, None
+        if write_queue is not None:
+            write_queue.join()
+
+    def close(self):
+        """End the build by deleting the obsolete files of the `modules`
+        and `search` directories
+
+        [return]
+        Return the `mikedoc.OutputStats` of the build"""
+        self.flush()
+        if self._prune:
+            for dirname in PRUNED_DIRS:
+                self._prune_dir(dirname)
+        return self.stats
+
+    def abort(self):
+        """End a failed build. Files already written are left in place."""
+        try:
+            self.flush()
+        except BaseException as e:
+            pass
+
+    def _write_file(self, filename, data):
+        if has_contents(filename, data):
+            with self._lock:
+                self._skipped += 1
+            return False
+        # writer threads may create the same directory, which misc.ensure_dir tolerates
+        self._ensure_dir(os.path.dirname(filename))
+        with open(filename, "wb") as file:
+            file.write(data)
+        with self._lock:
+            self._written += 1
+        return True
+
+    def _prune_dir(self, name):
+        top = os.path.join(self._path, name)
+        for dirname, _, filenames in os.walk(top, topdown=False):
+            for basename in filenames:
+                filename = os.path.join(dirname, basename)
+                path = os.path.relpath(filename, self._path).replace(os.sep, "/")
+                if path in self._paths:
+                    continue
+                os.remove(filename)
+                self._deleted += 1
+            misc.remove_empty_dirs(dirname, self._root_dir, self._api_dir)
+        # the modules directory is the only one required in the api directory
+        if name != "modules" and os.path.isdir(top):
+            try:
+                os.rmdir(top)
+            except OSError as e:
+                pass
+
+    def _ensure_dir(self, dirname):
+        if dirname in self._dirs:
+            return
+        misc.ensure_dir(dirname)
+        self._dirs.add(dirname)
+
+    def _submit(self, func, *args):
+        if self._queue is None:
+            return func(*args)
+        self._queue.put(func, *args)
+
+
+class StagedOutput:
+    """Write pages to a staging directory next to the api directory, then swap it into
+    place when the build succeeds, so that readers never see a partial reference.
+    A file whose contents are identical to the file in the api directory is hard-linked
+    into the staging directory instead of being written again.
+
+    The swap takes two renames (the api directory is moved aside, then the staging
+    directory takes its place), so the api directory is missing for a very short time."""
+    def __init__(self, root_dir, api_dir, writers=0):
+        """Init
+
+        [param]
+        - root_dir: The project root directory
+        - api_dir: Relative path to the root_dir indicating the api reference directory.
+        Slash is the only allowed separator. Example: "docs/api".
+        - writers: Number of writer threads. See `mikedoc.output.DirectoryOutput`.
+        """
+        self._root_dir = root_dir
+        self._api_dir = api_dir
+        self._writers = writers
+        self._path = misc.build_absolute_path(root_dir, api_dir)
+        self._work_dir = _build_sibling_dir(api_dir, STAGING_SUFFIX)
+        self._staging_path = misc.build_absolute_path(root_dir, self._work_dir)
+        self._backup_path = misc.build_absolute_path(root_dir,
+                                                     _build_sibling_dir(api_dir, BACKUP_SUFFIX))
+        self._paths = set()
+        self._dirs = set()
+        self._queue = None
+        self._lock = threading.Lock()
+        self._written = 0
+        self._skipped = 0
+        self._deleted = 0
+
+    @property
+    def root_dir(self):
+        return self._root_dir
+
+    @property
+    def api_dir(self):
+        return self._api_dir
+
+    @property
+    def writers(self):
+        return self._writers
+
+    @property
+    def work_dir(self):
+        """Relative path to the root_dir indicating the staging directory"""
+        return self._work_dir
+
+    @property
+    def stats(self):
+        """The `mikedoc.OutputStats` of the current build"""
+        return OutputStats(self._written, self._skipped, self._deleted)
+
+    def open(self):
+        """Start a build by creating an empty staging directory
+
+        [raise]
+        - Error: the api directory exists but contains files not generated by MikeDoc"""
+        if os.path.exists(self._path) and not misc.is_api_dir(self._path):
+            msg = "The directory '{}' wasn't generated by MikeDoc".format(self._api_dir)
+            raise errors.Error(msg)
+        self._paths = set()
+        self._dirs = set()
+        self._written = self._skipped = self._deleted = 0
+        for path in (self._staging_path, self._backup_path):
+            shutil.rmtree(path, ignore_errors=True)
+        self._ensure_dir(os.path.join(self._staging_path, "modules"))
+        if self._writers > 0:
+            self._queue = _WriteQueue(self._writers)
+
+    def write(self, path, text):
+        """Write a page to the staging directory. The file of the api directory is
+        hard-linked instead if it already has the same contents.
+
+        [param]
+        - path: Path of the page, relative to the api directory. Slash is the only
+        allowed separator. Example: "modules/package/module/README.md".
+        - text: The contents of the page
+
+        [return]
+        Return True if the file has been written, False if it was hard-linked,
+        or None if the write was handed over to the writer threads"""
+        self._paths.add(path)
+        parts = path.split("/")
+        filename = os.path.join(self._staging_path, *parts)
+        live_filename = os.path.join(self._path, *parts)
+        self._ensure_dir(os.path.dirname(filename))
+        return self._submit(self._write_file, live_filename, filename, encode_text(text))
+
+    def keep(self, path):
+        """Carry an existing page of the api directory over to the staging directory
+
+        [param]
+        - path: Path of the page, relative to the api directory"""
+        self._paths.add(path)
+        with self._lock:
+            self._skipped += 1
+        parts = path.split("/")
+        filename = os.path.join(self._staging_path, *parts)
+        self._ensure_dir(os.path.dirname(filename))
+        self._submit(_link_file, os.path.join(self._path, *parts), filename)
+
+    def flush(self):
+        """Wait until the writer threads have written the queued pages
+
+        [raise]
+        - OSError: The first error raised while writing a queued page"""
+        write_queue, self._queue = self._queue, None
+        if write_queue is not None:
+            write_queue.join()
+
+    def close(self):
+        """End the build by swapping the staging directory into place
+
+        [return]
+        Return the `mikedoc.OutputStats` of the build"""
+        self.flush()
+        self._count_deleted_files()
+        if os.path.exists(self._path):
+            os.rename(self._path, self._backup_path)
+            os.rename(self._staging_path, self._path)
+            shutil.rmtree(self._backup_path, ignore_errors=True)
+        else:
+            misc.ensure_dir(os.path.dirname(self._path))
+            os.rename(self._staging_path, self._path)
+        return self.stats
+
+    def abort(self):
+        """End a failed build by deleting the staging directory.
+        The api directory is left untouched."""
+        try:
+            self.flush()
+        except BaseException as e:
+            pass
+        shutil.rmtree(self._staging_path, ignore_errors=True)
+
+    def _write_file(self, live_filename, filename, data):
+        if has_contents(live_filename, data):
+            _link_file(live_filename, filename)
+            with self._lock:
+                self._skipped += 1
+            return False
+        with open(filename, "wb") as file:
+            file.write(data)
+        with self._lock:
+            self._written += 1
+        return True
+
+    def _count_deleted_files(self):
+        for name in PRUNED_DIRS:
+            for dirname, _, filenames in os.walk(os.path.join(self._path, name)):
+                for basename in filenames:
+                    filename = os.path.join(dirname, basename)
+                    path = os.path.relpath(filename, self._path).replace(os.sep, "/")
+                    if path not in self._paths:
+                        self._deleted += 1
+
+    def _ensure_dir(self, dirname):
+        if dirname in self._dirs:
+            return
+        misc.ensure_dir(dirname)
+        self._dirs.add(dirname)
+
+    def _submit(self, func, *args):
+        if self._queue is None:
+            return func(*args)
+        self._queue.put(func, *args)
+
+
+class ArchiveOutput:
+    """Stream pages into a single zip or tar.gz archive instead of a directory.
+    Members have the layout of the api directory (for example `README.md` and
+    `modules/package/module/README.md`), and nothing else is written.
+
+    Archives are reproducible: members are stored in the order of the build, which
+    is the same from one build to the next, with a fixed timestamp, fixed permissions,
+    and no owner, so that building the same reference twice gives the same bytes.
+    The archive is written to a temporary file placed next to it, then renamed
+    into place when the build succeeds."""
+    def __init__(self, root_dir, filename):
+        """Init
+
+        [param]
+        - root_dir: The project root directory
+        - filename: Path (relative to the root_dir, with slash as separator, or absolute)
+        to the archive. The format depends on the extension: ".zip", ".tar.gz", or ".tgz".
+
+        [raise]
+        - Error: the extension of the filename isn't supported"""
+        self._root_dir = root_dir
+        self._filename = filename
+        self._format = get_archive_format(filename)
+        if self._format is None:
+            msg = "Unsupported archive format '{}'. Use {}.".format(
+                filename, ", ".join(sorted(ARCHIVE_FORMATS)))
+            raise errors.Error(msg)
+        if os.path.isabs(filename):
+            self._path = filename
+        else:
+            self._path = misc.build_absolute_path(root_dir, filename)
+        dirname, basename = os.path.split(self._path)
+        self._tmp_path = os.path.join(dirname, "." + basename + STAGING_SUFFIX)
+        self._file = None
+        self._gzip = None
+        self._archive = None
+        self._paths = set()
+        self._written = 0
+
+    @property
+    def root_dir(self):
+        return self._root_dir
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @property
+    def format(self):
+        """Either "zip" or "tar.gz" """
+        return self._format
+
+    @property
+    def work_dir(self):
+        """None, since pages aren't stored in a directory"""
+        return None
+
+    @property
+    def stats(self):
+        """The `mikedoc.OutputStats` of the current build. Every page is written."""
+        return OutputStats(self._written, 0, 0)
+
+    def open(self):
+        """Start a build by creating the temporary archive
+
+        [raise]
+        - mikedoc.errors.Error: Raised when the temporary archive can't be created"""
+        self._paths = set()
+        self._written = 0
+        dirname = os.path.dirname(self._tmp_path)
+        try:
+            if dirname:
+                misc.ensure_dir(dirname)
+            self._file = open(self._tmp_path, "wb")
+        except OSError as e:
+            msg = "Failed to create the archive '{}': {}".format(self._filename, e)
+            raise errors.Error(msg)
+        if self._format == "zip":
+            self._archive = zipfile.ZipFile(self._file, "w", zipfile.ZIP_DEFLATED)
+        else:
+            # neither the name nor the modification time goes into the gzip header
+            self._gzip = gzip.GzipFile(filename="", mode="wb", fileobj=self._file, mtime=0)
+            self._archive = tarfile.open(fileobj=self._gzip, mode="w",
+                                         format=tarfile.PAX_FORMAT)
+
+    def write(self, path, text):
+        """Add a page to the archive
+
+        [param]
+        - path: Path of the page, relative to the api directory. Slash is the only
+        allowed separator. Example: "modules/package/module/README.md".
+        - text: The contents of the page
+
+        [return]
+        Return True"""
+        if path in self._paths:
+            raise errors.Error("The page '{}' is already in the archive".format(path))
+        self._paths.add(path)
+        # pages are encoded the same way on every platform
+        data = text.encode("utf-8")
+        if self._format == "zip":
+            info = zipfile.ZipInfo(path, date_time=ARCHIVE_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.create_system = 3
+            info.external_attr = 0o644 << 16
+            self._archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(path)
+            info.size = len(data)
+            info.mtime = ARCHIVE_MTIME
+            info.mode = 0o644
+            self._archive.addfile(info, io.BytesIO(data))
+        self._written += 1
+        return True
+
+    def keep(self, path):
+        """Not supported, since builds made with an archive output aren't incremental
+
+        [raise]
+        - Error: always raised"""
+        raise errors.Error("Pages of a previous build can't be kept in an archive")
+
+    def flush(self):
+        """Do nothing, since pages are added to the archive as they are written"""
+        pass
+
+    def close(self):
+        """End the build by closing the archive and moving it into place
+
+        [return]
+        Return the `mikedoc.OutputStats` of the build"""
+        self._close_archive()
+        os.replace(self._tmp_path, self._path)
+        return self.stats
+
+    def abort(self):
+        """End a failed build by deleting the temporary archive.
+        An existing archive is left untouched."""
+        try:
+            self._close_archive()
+        except BaseException as e:
+            pass
+        try:
+            os.remove(self._tmp_path)
+        except OSError as e:
+            pass
+
+    def _close_archive(self):
+        archive, self._archive = self._archive, None
+        if archive is None:
+            return
+        try:
+            archive.close()
+            if self._format != "zip":
+                self._gzip.close()
+        finally:
+            self._file.close()
+            self._file = self._gzip = None
+
+
+class MemoryOutput:
+    """Keep pages in memory instead of writing them, so that an application can
+    build an API reference and use its pages without any file I/O"""
+    def __init__(self, callback=None):
+        """Init
+
+        [param]
+        - callback: Optional function called with the path and the text of each page
+        as soon as it is produced, for example to serve or index pages while the
+        build goes on"""
+        self._callback = callback
+        self._pages = dict()
+
+    @property
+    def callback(self):
+        return self._callback
+
+    @property
+    def pages(self):
+        """Dictionary whose keys are paths of pages relative to the api directory
+        (with slash as separator) and whose values are texts"""
+        return self._pages
+
+    @property
+    def work_dir(self):
+        """None, since pages aren't stored in a directory"""
+        return None
+
+    @property
+    def stats(self):
+        """The `mikedoc.OutputStats` of the current build. Every page is written."""
+        return OutputStats(len(self._pages), 0, 0)
+
+    def open(self):
+        """Start a build with no pages"""
+        self._pages = dict()
+
+    def write(self, path, text):
+        """Keep a page
+
+        [param]
+        - path: Path of the page, relative to the api directory. Slash is the only
+        allowed separator. Example: "modules/package/module/README.md".
+        - text: The contents of the page
+
+        [return]
+        Return True"""
+        self._pages[path] = text
+        if self._callback:
+            self._callback(path, text)
+        return True
+
+    def keep(self, path):
+        """Not supported, since builds made with a memory output aren't incremental
+
+        [raise]
+        - Error: always raised"""
+        raise errors.Error("Pages of a previous build can't be kept in memory")
+
+    def flush(self):
+        """Do nothing, since pages are kept as they are written"""
+        pass
+
+    def close(self):
+        """End the build
+
+        [return]
+        Return the `mikedoc.OutputStats` of the build"""
+        return self.stats
+
+    def abort(self):
+        """End a failed build. Pages already produced are left in `pages`."""
+        pass
+
+
+def get_archive_format(filename):
+    """Return the archive format ("zip" or "tar.gz") of a filename
+    according to its extension, or None if the extension isn't supported"""
+    lowered = filename.lower()
+    for extension, archive_format in ARCHIVE_FORMATS.items():
+        if lowered.endswith(extension):
+            return archive_format
+
+
+def encode_text(text):
+    """Encode text as it would be written to a file opened in text mode"""
+    if os.linesep != "\n":
+        text = text.replace("\n", os.linesep)
+    return text.encode("utf-8")
+
+
+def has_contents(filename, data):
+    """Tell whether a file exists with exactly these bytes.
+    The size of the file is compared before its contents."""
+    try:
+        if os.path.getsize(filename) != len(data):
+            return False
+        with open(filename, "rb") as file:
+            return file.read() == data
+    except OSError as e:
+        return False
+
+
+class _WriteQueue:
+    """Bounded queue of file operations drained by writer threads. Once an operation
+    fails, the remaining ones are dropped, and `join` raises the error."""
+    def __init__(self, writers):
+        self._queue = queue.Queue(writers * QUEUE_SIZE_PER_WRITER)
+        self._error = None
+        self._threads = [threading.Thread(target=self._drain, daemon=True)
+                         for _ in range(writers)]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, func, *args):
+        self._queue.put((func, args))
+
+    def join(self):
+        """Wait for the queued operations, stop the writer threads, then
+        raise the first error if any"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            func, args = item
+            try:
+                func(*args)
+            except BaseException as e:
+                self._error = e
+
+
+def _link_file(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        shutil.copy2(src, dst)
+
+
+def _build_sibling_dir(api_dir, suffix):
+    parts = misc.split_relative_path(api_dir)
+    parts[-1] = "." + parts[-1] + suffix
+    return "/".join(parts)
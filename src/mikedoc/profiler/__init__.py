@@ -0,0 +1,232 @@
+"""Instrumentation of the build. The `Profiler` class accumulates the wall time
+and the CPU time spent in each phase of the build, per module and per page."""
+import time
+import json
+import threading
+import contextlib
+
+
+__all__ = ["Profiler", "activate", "measure"]
+
+
+# "import" covers the loading of modules, "introspect" the creation of member infos,
+# "parse" the parsing of docstrings, "render" the building of pages,
+# and "write" the writing of files
+PHASES = ("import", "introspect", "parse", "render", "write")
+# number of modules and pages listed in the report
+REPORT_SIZE = 10
+
+
+_active = None
+
+
+@contextlib.contextmanager
+def activate(profiler):
+    """Context manager to make a profiler the active one. Measures taken
+    with `mikedoc.profiler.measure` are accumulated in the active profiler.
+
+    [param]
+    - profiler: A `mikedoc.profiler.Profiler` instance or None"""
+    global _active
+    previous = _active
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = previous
+
+
+def measure(phase, module_name=None, page=None):
+    """Return a context manager that measures a phase of the build with the
+    active profiler. Without active profiler, the context manager does nothing.
+
+    [param]
+    - phase: One of the strings of `mikedoc.profiler.PHASES`
+    - module_name: The dotted name of the module or None to inherit it
+    from the enclosing measure
+    - page: The basename of the page or None to inherit it from the enclosing measure"""
+    if _active is None:
+        return _null_context
+    return _active.measure(phase, module_name, page)
+
+
+class Profiler:
+    """Accumulate wall time and CPU time per phase, per module, and per page.
+    When phases are nested (for example, docstrings are parsed while pages are
+    rendered), the time of the inner phase is subtracted from the outer one."""
+    def __init__(self):
+        self._phases = {phase: [0.0, 0.0] for phase in PHASES}
+        self._modules = dict()
+        self._pages = dict()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def phases(self):
+        """Dictionary whose keys are phases and whose values are 2-item lists
+        made of the wall time and the CPU time in seconds"""
+        return self._phases
+
+    def measure(self, phase, module_name=None, page=None):
+        """Return a context manager that measures a phase of the build.
+        See `mikedoc.profiler.measure`."""
+        return _Measure(self, phase, module_name, page)
+
+    def get_data(self):
+        """Return the raw measures as a picklable object that can be
+        merged into another profiler with `merge`"""
+        with self._lock:
+            return {"phases": {key: list(val) for key, val in self._phases.items()},
+                    "modules": {key: {k: list(v) for k, v in val.items()}
+                                for key, val in self._modules.items()},
+                    "pages": {key: list(val) for key, val in self._pages.items()}}
+
+    def merge(self, data):
+        """Merge the raw measures returned by the `get_data` method of another profiler,
+        for example, a profiler used in a worker process"""
+        with self._lock:
+            for phase, (wall, cpu) in data["phases"].items():
+                _add(self._phases.setdefault(phase, [0.0, 0.0]), wall, cpu)
+            for module_name, phases in data["modules"].items():
+                cache = self._modules.setdefault(module_name, dict())
+                for phase, (wall, cpu) in phases.items():
+                    _add(cache.setdefault(phase, [0.0, 0.0]), wall, cpu)
+            for key, (wall, cpu) in data["pages"].items():
+                _add(self._pages.setdefault(key, [0.0, 0.0]), wall, cpu)
+
+    def create_report(self, size=REPORT_SIZE):
+        """Create the report of the build
+
+        [param]
+        - size: Number of modules and pages to list
+
+        [return]
+        Return a JSON-serializable dictionary with the keys "phases", "total",
+        "slowest_modules" and "slowest_pages". Times are in seconds. Note that
+        times measured in worker processes are summed."""
+        with self._lock:
+            phases = {phase: {"wall": wall, "cpu": cpu}
+                      for phase, (wall, cpu) in self._phases.items()}
+            modules = list()
+            for module_name, data in self._modules.items():
+                wall = sum(x[0] for x in data.values())
+                cpu = sum(x[1] for x in data.values())
+                modules.append({"name": module_name, "wall": wall, "cpu": cpu,
+                                "phases": {phase: {"wall": w, "cpu": c}
+                                           for phase, (w, c) in data.items()}})
+            pages = [{"module": module_name, "page": page, "wall": wall, "cpu": cpu}
+                     for (module_name, page), (wall, cpu) in self._pages.items()]
+        modules.sort(key=lambda x: x["wall"], reverse=True)
+        pages.sort(key=lambda x: x["wall"], reverse=True)
+        total = {"wall": sum(x["wall"] for x in phases.values()),
+                 "cpu": sum(x["cpu"] for x in phases.values())}
+        return {"phases": phases, "total": total,
+                "slowest_modules": modules[:size], "slowest_pages": pages[:size]}
+
+    def create_summary(self, size=REPORT_SIZE):
+        """Create a human-readable summary of the report
+
+        [param]
+        - size: Number of modules and pages to list
+
+        [return]
+        Return a string"""
+        report = self.create_report(size)
+        lines = ["{:<24}{:>10}{:>10}".format("phase", "wall (s)", "cpu (s)")]
+        for phase, data in report["phases"].items():
+            lines.append("{:<24}{:>10.3f}{:>10.3f}".format(phase, data["wall"], data["cpu"]))
+        lines.append("{:<24}{:>10.3f}{:>10.3f}".format("total", report["total"]["wall"],
+                                                       report["total"]["cpu"]))
+        if report["slowest_modules"]:
+            lines.extend(("", "Slowest modules:"))
+            for data in report["slowest_modules"]:
+                lines.append("    {:.3f}s  {}".format(data["wall"], data["name"]))
+        if report["slowest_pages"]:
+            lines.extend(("", "Slowest pages:"))
+            for data in report["slowest_pages"]:
+                name = "/".join(x for x in (data["module"], data["page"]) if x)
+                lines.append("    {:.3f}s  {}".format(data["wall"], name))
+        return "\n".join(lines)
+
+    def save_report(self, filename, size=REPORT_SIZE):
+        """Save the report in a JSON file
+
+        [param]
+        - filename: The path to the JSON file
+        - size: Number of modules and pages to list"""
+        report = self.create_report(size)
+        with open(filename, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+            file.write("\n")
+
+    def _get_stack(self):
+        try:
+            return self._local.stack
+        except AttributeError as e:
+            self._local.stack = stack = list()
+            return stack
+
+    def _record(self, phase, module_name, page, wall, cpu):
+        with self._lock:
+            _add(self._phases.setdefault(phase, [0.0, 0.0]), wall, cpu)
+            if module_name is not None:
+                cache = self._modules.setdefault(module_name, dict())
+                _add(cache.setdefault(phase, [0.0, 0.0]), wall, cpu)
+            if page is not None:
+                _add(self._pages.setdefault((module_name, page), [0.0, 0.0]), wall, cpu)
+
+
+class _Measure:
+    __slots__ = ("_profiler", "_phase", "_module_name", "_page", "_start",
+                 "_child")
+
+    def __init__(self, profiler, phase, module_name, page):
+        self._profiler = profiler
+        self._phase = phase
+        self._module_name = module_name
+        self._page = page
+        self._start = None
+        # wall time and CPU time spent in nested measures
+        self._child = [0.0, 0.0]
+
+    def __enter__(self):
+        stack = self._profiler._get_stack()
+        if stack:
+            parent = stack[-1]
+            if self._module_name is None:
+                self._module_name = parent._module_name
+            if self._page is None:
+                self._page = parent._page
+        stack.append(self)
+        self._start = (time.perf_counter(), time.process_time())
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall = time.perf_counter() - self._start[0]
+        cpu = time.process_time() - self._start[1]
+        stack = self._profiler._get_stack()
+        stack.pop()
+        if stack:
+            _add(stack[-1]._child, wall, cpu)
+        self._profiler._record(self._phase, self._module_name, self._page,
+                               wall - self._child[0], cpu - self._child[1])
+        return False
+
+
+class _NullMeasure:
+    # measure taken without active profiler ('contextlib.nullcontext' is new in Python 3.7)
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_null_context = _NullMeasure()
+
+
+def _add(cache, wall, cpu):
+    cache[0] += wall
+    cache[1] += cpu
@@ -0,0 +1,139 @@
+"""Bounded representations of values. Field values, enum members, and default values
+of parameters are documented with their representation, which can be huge (a table
+of thousands of entries) or deeply nested. `ValueRepr` limits the depth, the number
+of items, and the length of a representation, and computes it once per object."""
+import reprlib
+from mikedoc import errors, stubs
+
+
+__all__ = ["ValueRepr"]
+
+
+# maximum depth of nested containers
+DEFAULT_DEPTH = 6
+# maximum number of items of a container
+DEFAULT_ITEMS = 100
+# maximum length of a representation
+DEFAULT_LENGTH = 1000
+FILL_VALUE = "..."
+
+
+class ValueRepr(reprlib.Repr):
+    """Representation of values with limits. Containers are represented item by item,
+    up to the depth limit and the items limit, and any representation longer than the
+    length limit is shortened in the middle, so that its beginning and its end are kept.
+    Values that fit the limits are represented like the `repr` builtin does.
+
+    Representations are memoized per object identity until `clear` is called.
+    Memoized objects are kept alive so that their identities can't be reused."""
+    def __init__(self, depth=None, items=None, length=None):
+        """Init
+
+        [param]
+        - depth: Maximum depth of nested containers. Defaults to DEFAULT_DEPTH.
+        - items: Maximum number of items of a container. Defaults to DEFAULT_ITEMS.
+        - length: Maximum length of a representation. Defaults to DEFAULT_LENGTH.
+
+        [raise]
+        - mikedoc.errors.Error: Raised when a limit isn't a positive integer"""
+        super().__init__()
+        depth = DEFAULT_DEPTH if depth is None else depth
+        items = DEFAULT_ITEMS if items is None else items
+        length = DEFAULT_LENGTH if length is None else length
+        for name, value in (("depth", depth), ("items", items), ("length", length)):
+            if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                msg = "The repr {} limit must be a positive integer".format(name)
+                raise errors.Error(msg)
+        self._depth = depth
+        self._items = items
+        self._length = length
+        self.fillvalue = FILL_VALUE
+        self.maxlevel = depth
+        self.maxtuple = self.maxlist = self.maxarray = self.maxdict = items
+        self.maxset = self.maxfrozenset = self.maxdeque = items
+        self.maxstring = self.maxlong = self.maxother = length
+        # id of object -> (object, representation)
+        self._memo = dict()
+
+    @property
+    def depth(self):
+        return self._depth
+
+    @property
+    def items(self):
+        return self._items
+
+    @property
+    def length(self):
+        return self._length
+
+    def repr(self, obj):
+        """Return the bounded representation of an object"""
+        cached = self._memo.get(id(obj))
+        if cached is not None and cached[0] is obj:
+            return cached[1]
+        text = _shorten(super().repr(obj), self._length)
+        self._memo[id(obj)] = (obj, text)
+        return text
+
+    def format_signature(self, signature):
+        """Return the text of a signature whose default values are bounded
+        representations
+
+        [param]
+        - signature: An `inspect.Signature` instance, a signature string, or None
+
+        [return]
+        Return a string, or None if the signature is None"""
+        if signature is None or isinstance(signature, str):
+            return signature
+        parameters = list(signature.parameters.values())
+        if all(param.default is param.empty for param in parameters):
+            return str(signature)
+        parameters = [param if param.default is param.empty
+                      else param.replace(default=stubs.StaticValue(self.repr(param.default)))
+                      for param in parameters]
+        return str(signature.replace(parameters=parameters))
+
+    def clear(self):
+        """Forget the memoized representations"""
+        self._memo.clear()
+
+    def repr_dict(self, x, level):
+        # the order of items is kept, like the repr builtin does
+        if not x:
+            return "{}"
+        if level <= 0:
+            return "{" + self.fillvalue + "}"
+        pieces = list()
+        for i, (key, value) in enumerate(x.items()):
+            if i == self.maxdict:
+                pieces.append(self.fillvalue)
+                break
+            pieces.append("{}: {}".format(self.repr1(key, level - 1),
+                                          self.repr1(value, level - 1)))
+        return "{" + ", ".join(pieces) + "}"
+
+    def repr_set(self, x, level):
+        if not x:
+            return "set()"
+        return self._repr_iterable(x, level, "{", "}", self.maxset)
+
+    def repr_frozenset(self, x, level):
+        if not x:
+            return "frozenset()"
+        return self._repr_iterable(x, level, "frozenset({", "})", self.maxfrozenset)
+
+    def __getstate__(self):
+        # memoized objects aren't sent to worker processes
+        state = self.__dict__.copy()
+        state["_memo"] = dict()
+        return state
+
+
+def _shorten(text, length):
+    if len(text) <= length:
+        return text
+    i = max(0, (length - len(FILL_VALUE)) // 2)
+    j = max(0, length - len(FILL_VALUE) - i)
+    return text[:i] + FILL_VALUE + text[len(text)-j:]
@@ -0,0 +1,579 @@
+"""This module exposes the `Scanner` class that builds stand-ins for the modules
+of a codebase from their source text, without importing them"""
+import os.path
+import re
+import ast
+import abc
+import enum
+import types
+import typing
+import inspect
+import builtins
+import warnings
+import functools
+import importlib
+import collections
+from mikedoc import misc, stubs, errors
+
+
+__all__ = ["Scanner", "UnresolvedBaseWarning"]
+
+
+# modules that are imported for real to resolve names such as `Enum` or `ABC`.
+# Classes of other modules (standard library included) are replaced by placeholders.
+REAL_MODULES = ("abc", "builtins", "collections", "collections.abc",
+                "enum", "functools", "typing")
+
+
+# callables free of side effects that are applied to stand-ins
+# ('functools.cached_property' is new in Python 3.8)
+PURE_CALLABLES = tuple(obj for obj in (property, staticmethod, classmethod,
+                                       getattr(functools, "cached_property", None),
+                                       abc.abstractmethod, enum.auto, enum.unique,
+                                       collections.namedtuple, typing.TypeVar)
+                       if obj is not None)
+
+
+_MISSING = object()
+
+
+class UnresolvedBaseWarning(UserWarning):
+    """Warning issued when a base class can't be resolved from the source text,
+    so that the members inherited from it aren't documented"""
+    pass
+
+
+class Scanner:
+    """Build stand-ins for the modules of a codebase with the `ast` module.
+    The stand-in of a module can be inspected like the module itself:
+    functions are stubs that carry the docstring and the signature, classes
+    are rebuilt with their bases, methods, properties and fields, and the values
+    of fields are either evaluated literals or `mikedoc.stubs.StaticValue` instances."""
+    def __init__(self, root_dir, pkg_dir):
+        """Init
+
+        [param]
+        - root_dir: The project root directory
+        - pkg_dir: Relative path to the root_dir indicating the package directory.
+        Slash is the only allowed separator. Example: "my_package" or "src/my_package".
+        """
+        self._root_dir = root_dir
+        self._pkg_dir = pkg_dir
+        self._pkg_path = misc.build_absolute_path(root_dir, pkg_dir)
+        self._pkg_name = misc.split_relative_path(pkg_dir)[-1]
+        self._modules = dict()
+        self._sources = dict()
+        self._placeholders = dict()
+
+    @property
+    def root_dir(self):
+        return self._root_dir
+
+    @property
+    def pkg_dir(self):
+        return self._pkg_dir
+
+    def load(self, module_name):
+        """Return the stand-in of a module of the project. Stand-ins are cached.
+
+        [param]
+        - module_name: The dotted name of the module. Example: "package.module"
+        or "package.__init__".
+
+        [return]
+        Return a module object.
+
+        [raise]
+        - mikedoc.errors.Error: Raised when the module isn't part of the project
+        """
+        module = self._modules.get(module_name)
+        if module is not None:
+            return module
+        filename = self.find_source(module_name)
+        if filename is None:
+            raise errors.Error("Module '{}' not found in the package".format(module_name))
+        source, tree = self._parse(filename)
+        module = stubs.create_module(module_name, ast.get_docstring(tree, clean=False))
+        module.__file__ = filename
+        # cached before the scan to support circular imports
+        self._modules[module_name] = module
+        _ModuleScanner(self, module, source, tree).run()
+        return module
+
+    def unload(self, module_name):
+        """Release the stand-in of a module and its parsed source text. The stand-in is
+        built again if the module is loaded again. Parent packages are kept.
+
+        [param]
+        - module_name: The dotted name of the module"""
+        module = self._modules.pop(module_name, None)
+        if module is not None:
+            self._sources.pop(module.__file__, None)
+
+    def find_source(self, module_name):
+        """Return the path to the source file of a module of the project, or None"""
+        parts = module_name.split(".")
+        if parts[0] != self._pkg_name:
+            return
+        parts = parts[1:]
+        if parts and parts[-1] == "__init__":
+            filename = os.path.join(self._pkg_path, *parts)
+            filename += ".py"
+        else:
+            filename = os.path.join(self._pkg_path, *parts, "__init__.py")
+            if parts and not os.path.isfile(filename):
+                filename = os.path.join(self._pkg_path, *parts) + ".py"
+        return filename if os.path.isfile(filename) else None
+
+    def owns(self, obj):
+        """Tell whether an object is the stand-in of a module of the project"""
+        return self._modules.get(getattr(obj, "__name__", None)) is obj
+
+    def get_placeholder(self, module_name, qualname):
+        """Return the placeholder class that stands for a class that can't be resolved.
+        Placeholders are empty, so an `UnresolvedBaseWarning` is issued the first time
+        a placeholder is created."""
+        if (module_name, qualname) not in self._placeholders:
+            msg = ("Base class '{}.{}' isn't resolved by the 'ast' engine, "
+                   "members inherited from it aren't documented").format(module_name,
+                                                                          qualname)
+            warnings.warn(msg, UnresolvedBaseWarning)
+        return stubs.create_placeholder_class(module_name, qualname, self._placeholders)
+
+    def _parse(self, filename):
+        cache = self._sources.get(filename)
+        if cache is None:
+            with open(filename, "r", encoding="utf-8") as file:
+                source = file.read()
+            cache = source, ast.parse(source, filename)
+            self._sources[filename] = cache
+        return cache
+
+
+class _ExternalRef:
+    """Reference to an object that is neither part of the project nor
+    part of the modules listed in REAL_MODULES"""
+    __slots__ = ("module_name", "qualname")
+
+    def __init__(self, module_name, qualname=None):
+        self.module_name = module_name
+        self.qualname = qualname
+
+    def child(self, name):
+        qualname = name if self.qualname is None else self.qualname + "." + name
+        return _ExternalRef(self.module_name, qualname)
+
+
+class _ModuleScanner:
+    def __init__(self, scanner, module, source, tree):
+        self._scanner = scanner
+        self._module = module
+        self._module_name = module.__name__
+        self._source = source
+        self._tree = tree
+        self._namespace = module.__dict__
+        self._lines = None
+        if os.path.basename(module.__file__) == "__init__.py":
+            name = self._module_name
+            if name.endswith(".__init__"):
+                name = name[:-len(".__init__")]
+            self._package = name
+        else:
+            self._package = self._module_name.rpartition(".")[0]
+
+    def run(self):
+        scopes = (self._namespace, )
+        for node in self._tree.body:
+            self._exec(node, self._namespace, "", scopes)
+        # imports aren't members of the module
+        for name, obj in list(self._namespace.items()):
+            if name.startswith("__") and name.endswith("__"):
+                continue
+            if isinstance(obj, (types.ModuleType, _ExternalRef)):
+                del self._namespace[name]
+        names = self._namespace.get("__all__")
+        if names is not None and not isinstance(names, (list, tuple)):
+            del self._namespace["__all__"]
+
+    def _exec(self, node, namespace, prefix, scopes):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.asname:
+                    namespace[alias.asname] = self._import(alias.name)
+                else:
+                    name = alias.name.split(".")[0]
+                    namespace[name] = self._import(name)
+        elif isinstance(node, ast.ImportFrom):
+            self._exec_import_from(node, namespace)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            obj = self._create_function(node.name, prefix + node.name, node)
+            namespace[node.name] = self._decorate(obj, node.decorator_list, scopes)
+        elif isinstance(node, ast.ClassDef):
+            obj = self._create_class(node, prefix, scopes)
+            namespace[node.name] = self._decorate(obj, node.decorator_list, scopes)
+        elif isinstance(node, ast.Assign):
+            for target in node.targets:
+                self._bind(target, node.value, namespace, prefix, scopes)
+        elif isinstance(node, ast.AnnAssign):
+            if node.value is not None:
+                self._bind(node.target, node.value, namespace, prefix, scopes)
+        elif isinstance(node, ast.AugAssign):
+            self._exec_aug_assign(node, namespace)
+        elif isinstance(node, ast.If):
+            for child in node.body + node.orelse:
+                self._exec(child, namespace, prefix, scopes)
+        elif isinstance(node, ast.Try):
+            for child in node.body + node.orelse + node.finalbody:
+                self._exec(child, namespace, prefix, scopes)
+
+    def _exec_import_from(self, node, namespace):
+        module_name = self._resolve_module_name(node.module, node.level)
+        if module_name is None:
+            return
+        module = self._import(module_name)
+        for alias in node.names:
+            if alias.name == "*":
+                self._import_star(module, namespace)
+                continue
+            obj = self._getattr(module, alias.name)
+            if obj is _MISSING:
+                continue
+            namespace[alias.asname if alias.asname else alias.name] = obj
+
+    def _import_star(self, module, namespace):
+        if isinstance(module, _ExternalRef):
+            return
+        names = getattr(module, "__all__", None)
+        if names is None:
+            names = [name for name in vars(module) if not name.startswith("_")]
+        for name in names:
+            obj = self._getattr(module, name)
+            if obj is not _MISSING:
+                namespace[name] = obj
+
+    def _exec_aug_assign(self, node, namespace):
+        target = node.target
+        if not isinstance(target, ast.Name) or not isinstance(node.op, ast.Add):
+            return
+        value = namespace.get(target.id)
+        try:
+            extra = ast.literal_eval(node.value)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError) as e:
+            return
+        if isinstance(value, (list, tuple)) and isinstance(extra, (list, tuple)):
+            namespace[target.id] = list(value) + list(extra)
+
+    def _bind(self, target, value_node, namespace, prefix, scopes):
+        if isinstance(target, ast.Attribute) and target.attr == "__doc__":
+            self._set_doc(target.value, value_node, scopes)
+        elif isinstance(target, ast.Name):
+            namespace[target.id] = self._evaluate(value_node, target.id,
+                                                  prefix + target.id, scopes)
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            if not isinstance(value_node, (ast.Tuple, ast.List)):
+                return
+            if len(target.elts) != len(value_node.elts):
+                return
+            for sub_target, sub_value in zip(target.elts, value_node.elts):
+                self._bind(sub_target, sub_value, namespace, prefix, scopes)
+
+    def _set_doc(self, node, value_node, scopes):
+        """Support assignments such as `MyClass.__doc__ = "..."` or
+        `MyNamedTuple.field.__doc__ = "..."` for objects defined in the module"""
+        root = node
+        while isinstance(root, ast.Attribute):
+            root = root.value
+        owner = self._resolve(root, scopes)
+        if not isinstance(owner, (type, types.FunctionType)):
+            return
+        if owner.__module__ != self._module_name:
+            return
+        obj = self._resolve(node, scopes)
+        try:
+            doc = ast.literal_eval(value_node)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError) as e:
+            return
+        if obj is _MISSING or not isinstance(doc, str):
+            return
+        try:
+            obj.__doc__ = doc
+        except (AttributeError, TypeError) as e:
+            pass
+
+    def _import(self, module_name):
+        if self._scanner.find_source(module_name):
+            return self._scanner.load(module_name)
+        if module_name in REAL_MODULES:
+            return importlib.import_module(module_name)
+        return _ExternalRef(module_name)
+
+    def _resolve_module_name(self, module_name, level):
+        if not level:
+            return module_name
+        parts = self._package.split(".") if self._package else list()
+        if level > 1:
+            if level - 1 > len(parts):
+                return
+            parts = parts[:len(parts) - (level - 1)]
+        if module_name:
+            parts.append(module_name)
+        return ".".join(parts) if parts else None
+
+    def _getattr(self, obj, name):
+        if isinstance(obj, _ExternalRef):
+            return obj.child(name)
+        if self._scanner.owns(obj):
+            if name in obj.__dict__:
+                return obj.__dict__[name]
+            package = obj.__name__
+            if package.endswith(".__init__"):
+                package = package[:-len(".__init__")]
+            submodule_name = package + "." + name
+            if self._scanner.find_source(submodule_name):
+                return self._scanner.load(submodule_name)
+            return _MISSING
+        if isinstance(obj, types.ModuleType) and obj.__name__ not in REAL_MODULES:
+            return _MISSING
+        # other objects are either stand-ins or objects of REAL_MODULES
+        return getattr(obj, name, _MISSING)
+
+    def _resolve(self, node, scopes):
+        if isinstance(node, ast.Name):
+            for scope in scopes:
+                if node.id in scope:
+                    return scope[node.id]
+            return getattr(builtins, node.id, _MISSING)
+        if isinstance(node, ast.Attribute):
+            obj = self._resolve(node.value, scopes)
+            if obj is _MISSING:
+                return _MISSING
+            return self._getattr(obj, node.attr)
+        return _MISSING
+
+    def _evaluate(self, node, name, qualname, scopes):
+        try:
+            return ast.literal_eval(node)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError) as e:
+            pass
+        if isinstance(node, (ast.Name, ast.Attribute)):
+            obj = self._resolve(node, scopes)
+            if obj is not _MISSING and not isinstance(obj, _ExternalRef):
+                return obj
+        elif isinstance(node, ast.Call):
+            obj = self._call(node, name, scopes)
+            if obj is not _MISSING:
+                return obj
+        elif isinstance(node, ast.Lambda):
+            return self._create_function("<lambda>", qualname, node)
+        return stubs.StaticValue(self._get_source(node))
+
+    def _call(self, node, name, scopes):
+        func = self._resolve(node.func, scopes)
+        if not _is_pure(func):
+            return _MISSING
+        args = list()
+        kwargs = dict()
+        for arg in node.args:
+            if isinstance(arg, ast.Starred):
+                return _MISSING
+            args.append(self._evaluate(arg, name, name, scopes))
+        for keyword in node.keywords:
+            if keyword.arg is None:
+                return _MISSING
+            kwargs[keyword.arg] = self._evaluate(keyword.value, name, name, scopes)
+        if func is collections.namedtuple:
+            kwargs["module"] = self._module_name
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            return _MISSING
+
+    def _decorate(self, obj, decorator_list, scopes):
+        for node in reversed(decorator_list):
+            decorator = self._resolve(node, scopes)
+            if not _is_pure(decorator):
+                continue
+            try:
+                obj = decorator(obj)
+            except Exception as e:
+                continue
+        return obj
+
+    def _create_function(self, name, qualname, node):
+        doc = None
+        if not isinstance(node, ast.Lambda):
+            doc = ast.get_docstring(node, clean=False)
+        signature = self._create_signature(node.args, getattr(node, "returns", None))
+        return stubs.create_function(name, qualname, self._module_name, doc, signature)
+
+    def _create_signature(self, args, returns):
+        Parameter = inspect.Parameter
+        parameters = list()
+        posonlyargs = getattr(args, "posonlyargs", list())
+        positional = posonlyargs + args.args
+        defaults = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+        for i, arg in enumerate(positional):
+            kind = (Parameter.POSITIONAL_ONLY if i < len(posonlyargs)
+                    else Parameter.POSITIONAL_OR_KEYWORD)
+            parameters.append(self._create_parameter(arg, kind, defaults[i]))
+        if args.vararg:
+            parameters.append(self._create_parameter(args.vararg, Parameter.VAR_POSITIONAL))
+        for arg, default in zip(args.kwonlyargs, args.kw_defaults):
+            parameters.append(self._create_parameter(arg, Parameter.KEYWORD_ONLY, default))
+        if args.kwarg:
+            parameters.append(self._create_parameter(args.kwarg, Parameter.VAR_KEYWORD))
+        try:
+            return inspect.Signature(parameters,
+                                     return_annotation=self._create_annotation(returns))
+        except (ValueError, TypeError) as e:
+            return
+
+    def _create_parameter(self, arg, kind, default=None):
+        if default is None:
+            default = inspect.Parameter.empty
+        else:
+            try:
+                default = ast.literal_eval(default)
+            except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError) as e:
+                default = stubs.StaticValue(self._get_source(default))
+        return inspect.Parameter(arg.arg, kind, default=default,
+                                 annotation=self._create_annotation(arg.annotation))
+
+    def _create_annotation(self, node):
+        if node is None:
+            return inspect.Signature.empty
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        return stubs.StaticValue(self._get_source(node))
+
+    def _create_class(self, node, prefix, scopes):
+        qualname = prefix + node.name
+        bases = list()
+        for base_node in node.bases:
+            base = self._resolve_base(base_node, scopes)
+            if base is not None:
+                bases.append(base)
+        if typing.NamedTuple in bases:
+            return self._create_typed_namedtuple(node, qualname)
+        kwds = dict()
+        for keyword in node.keywords:
+            if keyword.arg != "metaclass":
+                continue
+            metaclass = self._resolve(keyword.value, scopes)
+            if isinstance(metaclass, type) and metaclass.__module__ in REAL_MODULES:
+                kwds["metaclass"] = metaclass
+        doc = ast.get_docstring(node, clean=False)
+
+        def exec_body(namespace):
+            namespace["__module__"] = self._module_name
+            namespace["__qualname__"] = qualname
+            namespace["__doc__"] = doc
+            for child in node.body:
+                self._exec(child, namespace, qualname + ".",
+                           (namespace, self._namespace))
+        try:
+            cls = types.new_class(node.name, tuple(bases), kwds, exec_body)
+        except Exception as e:
+            # metaclass conflicts, invalid enum members, inconsistent MRO...
+            cls = types.new_class(node.name, (), dict(), exec_body)
+        _inherit_docs(cls)
+        return cls
+
+    def _create_typed_namedtuple(self, node, qualname):
+        fields = list()
+        defaults = list()
+        namespace = dict()
+        scopes = (namespace, self._namespace)
+        for child in node.body:
+            if (isinstance(child, ast.AnnAssign)
+                    and isinstance(child.target, ast.Name)):
+                fields.append(child.target.id)
+                if child.value is not None:
+                    value = self._evaluate(child.value, child.target.id,
+                                           qualname + "." + child.target.id, scopes)
+                    defaults.append(value)
+            else:
+                self._exec(child, namespace, qualname + ".", scopes)
+        cls = collections.namedtuple(node.name, fields, defaults=defaults,
+                                     module=self._module_name)
+        cls.__qualname__ = qualname
+        cls.__doc__ = ast.get_docstring(node, clean=False)
+        for name, obj in namespace.items():
+            setattr(cls, name, obj)
+        return cls
+
+    def _resolve_base(self, node, scopes):
+        if isinstance(node, ast.Subscript):
+            base = self._subscript(node, scopes)
+            if base is not _MISSING:
+                return base
+            node = node.value
+        base = self._resolve(node, scopes)
+        if isinstance(base, _ExternalRef):
+            if base.qualname is None:
+                return
+            return self._scanner.get_placeholder(base.module_name, base.qualname)
+        if base is typing.NamedTuple:
+            return base
+        if not isinstance(base, type) or base is typing.Generic:
+            return
+        return base
+
+    def _subscript(self, node, scopes):
+        """Evaluate subscriptions such as `Generic[T]` made of objects of REAL_MODULES"""
+        obj = self._resolve(node.value, scopes)
+        if getattr(obj, "__module__", None) != "typing":
+            return _MISSING
+        items = node.slice.elts if isinstance(node.slice, ast.Tuple) else [node.slice]
+        args = list()
+        for item in items:
+            arg = self._resolve(item, scopes)
+            if arg is _MISSING or isinstance(arg, _ExternalRef):
+                return _MISSING
+            args.append(arg)
+        try:
+            return obj[tuple(args) if len(args) > 1 else args[0]]
+        except Exception as e:
+            return _MISSING
+
+    def _get_source(self, node):
+        # same as 'ast.get_source_segment' without splitting the source at each call
+        if getattr(node, "end_lineno", None) is None:
+            return "..."
+        if self._lines is None:
+            self._lines = _split_lines(self._source)
+        first, last = node.lineno - 1, node.end_lineno - 1
+        start, end = node.col_offset, node.end_col_offset
+        if first == last:
+            lines = [self._lines[first].encode()[start:end].decode()]
+        else:
+            lines = [self._lines[first].encode()[start:].decode()]
+            lines.extend(self._lines[first + 1:last])
+            lines.append(self._lines[last].encode()[:end].decode())
+        return " ".join(line.strip() for line in lines)
+
+
+def _split_lines(source):
+    # like the parser, only CR, LF and CRLF end lines (unlike str.splitlines)
+    return re.split(r"(?<=\n)|(?<=\r)(?!\n)", source)
+
+
+def _inherit_docs(cls):
+    """Methods without docstring inherit the docstring of the
+    overridden method, as with `inspect.getdoc` on live objects"""
+    for name, obj in cls.__dict__.items():
+        func = getattr(obj, "__func__", obj)
+        if not isinstance(func, types.FunctionType) or func.__doc__ is not None:
+            continue
+        for base in cls.__mro__[1:]:
+            doc = getattr(base.__dict__.get(name), "__doc__", None)
+            if doc is not None:
+                func.__doc__ = doc
+                break
+
+
+def _is_pure(obj):
+    if obj in PURE_CALLABLES:
+        return True
+    # the 'getter', 'setter' and 'deleter' methods of a property
+    return isinstance(getattr(obj, "__self__", None), property)
@@ -0,0 +1,174 @@
+"""The search index of the API reference. It is a set of compact JSON files stored in
+the `search` directory of the api directory, so that a static page can search the
+reference without a server, by loading only the files that a query needs:
+
+- `search/index.json`: the metadata of the index (version, number of documents,
+number of documents per shard, and the range of terms of each terms shard).
+- `search/docs-N.json`: the N-th shard of documents. Each document is a list made of
+the kind ("module", "class", "function", "method", or "property"), the dotted name,
+the URL, and the short description of a symbol. The document whose id is `i` is the
+item `i % docs_per_shard` of the shard `i // docs_per_shard`.
+- `search/terms-N.json`: the N-th shard of terms, a dictionary whose keys are terms
+and whose values are lists of document ids. Documents whose names contain the term
+come first, then documents whose descriptions contain it.
+
+Terms are lowercase words of at least two characters. The last part of the dotted
+name of a symbol (its own name) is a term, and so are its words, split on underscores
+and camel case boundaries, so that `ClassDocPage` is found with "class", "doc",
+"page", or "classdocpage". The other parts of the name (the package and module names
+shared by many symbols) aren't indexed.
+
+Shards of terms are sized rather than keyed by a fixed prefix: sorted terms are grouped
+by their first PREFIX_LENGTH characters, and adjacent groups are merged into a shard
+until it reaches about TERMS_SHARD_SIZE bytes, so that a small reference has a single
+shard. A group larger than that is split between terms. The item N of the
+`term_shards` list of the metadata is the range `[first, last]` of the terms of the
+shard N, so the shard of a term is found with a binary search, and prefix search
+(completion) loads the shards whose ranges overlap the prefix, most often one."""
+import re
+import json
+from mikedoc import misc
+
+
+__all__ = ["SearchIndex", "get_name_terms", "get_text_terms"]
+
+
+SEARCH_DIRNAME = misc.SEARCH_DIRNAME
+SEARCH_VERSION = 2
+# number of documents per docs shard
+DOCS_PER_SHARD = 1000
+# length of the prefixes by which terms are grouped into shards
+PREFIX_LENGTH = 2
+# approximate size (in bytes) of a terms shard
+TERMS_SHARD_SIZE = 32768
+# minimal length of a term
+MIN_TERM_LENGTH = 2
+# words of descriptions that aren't indexed
+STOP_WORDS = frozenset(("a", "an", "and", "are", "as", "at", "be", "by", "for",
+                        "from", "if", "in", "into", "is", "it", "its", "of", "on",
+                        "or", "that", "the", "this", "to", "with"))
+
+
+_WORD_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+_TEXT_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class SearchIndex:
+    """Inverted index of the symbols of the API reference"""
+    def __init__(self):
+        self._docs = list()
+        # term -> (ids of documents matched by name, ids matched by description)
+        self._terms = dict()
+
+    @property
+    def docs(self):
+        """List of documents. See `mikedoc.search`."""
+        return self._docs
+
+    def add(self, kind, name, url, description=""):
+        """Add a document to the index
+
+        [param]
+        - kind: The kind of the symbol, for example "class" or "method"
+        - name: The dotted name of the symbol
+        - url: The URL of the page documenting the symbol, possibly with an anchor
+        - description: The short description of the symbol
+
+        [return]
+        Return the id of the document"""
+        doc_id = len(self._docs)
+        self._docs.append([kind, name, url, description])
+        name_terms = get_name_terms(name)
+        for term in name_terms:
+            self._get_postings(term)[0].append(doc_id)
+        for term in get_text_terms(description):
+            if term not in name_terms:
+                self._get_postings(term)[1].append(doc_id)
+        return doc_id
+
+    def create_files(self):
+        """Create the files of the index
+
+        [return]
+        Return a list of 2-tuples made of the path of a file (relative to the
+        api directory, with slash as separator) and its text"""
+        files = list()
+        n = len(self._docs)
+        for i in range(0, n, DOCS_PER_SHARD):
+            path = "{}/docs-{}.json".format(SEARCH_DIRNAME, i // DOCS_PER_SHARD)
+            files.append((path, _dumps(self._docs[i:i+DOCS_PER_SHARD])))
+        postings = {term: by_name + by_description
+                    for term, (by_name, by_description) in self._terms.items()}
+        ranges = list()
+        for i, shard in enumerate(_split_terms(postings)):
+            path = "{}/terms-{}.json".format(SEARCH_DIRNAME, i)
+            files.append((path, _dumps(shard)))
+            terms = sorted(shard)
+            ranges.append([terms[0], terms[-1]])
+        meta = {"version": SEARCH_VERSION, "docs": n,
+                "docs_per_shard": DOCS_PER_SHARD,
+                "term_shards": ranges}
+        files.insert(0, ("{}/index.json".format(SEARCH_DIRNAME), _dumps(meta)))
+        return files
+
+    def _get_postings(self, term):
+        postings = self._terms.get(term)
+        if postings is None:
+            postings = self._terms[term] = (list(), list())
+        return postings
+
+
+def get_name_terms(name):
+    """Get the terms of a dotted name. The last part of the name is a term, and so are
+    its words, split on underscores and camel case boundaries.
+
+    [param]
+    - name: The dotted name, for example "mikedoc.builder.ClassDocPage"
+
+    [return]
+    Return a set of terms"""
+    part = name.rsplit(".", 1)[-1]
+    terms = {part.strip("_").lower()}
+    for word in _WORD_PATTERN.findall(part):
+        terms.add(word.lower())
+    return {term for term in terms if len(term) >= MIN_TERM_LENGTH}
+
+
+def get_text_terms(text):
+    """Get the terms of a text, stop words aside
+
+    [param]
+    - text: The text, for example a short description
+
+    [return]
+    Return a set of terms"""
+    if not text:
+        return set()
+    return {word for word in _TEXT_PATTERN.findall(text.lower())
+            if len(word) >= MIN_TERM_LENGTH and word not in STOP_WORDS}
+
+
+def _split_terms(postings):
+    # adjacent groups of terms sharing a prefix are merged into shards of about
+    # TERMS_SHARD_SIZE bytes, and larger groups are split between terms
+    groups = dict()
+    for term in sorted(postings):
+        groups.setdefault(term[:PREFIX_LENGTH], list()).append(term)
+    shard, size = dict(), 0
+    for prefix in sorted(groups):
+        sizes = [len(_dumps({term: postings[term]})) for term in groups[prefix]]
+        if shard and size + sum(sizes) > TERMS_SHARD_SIZE:
+            yield shard
+            shard, size = dict(), 0
+        for term, term_size in zip(groups[prefix], sizes):
+            shard[term] = postings[term]
+            size += term_size
+            if size >= TERMS_SHARD_SIZE:
+                yield shard
+                shard, size = dict(), 0
+    if shard:
+        yield shard
+
+
+def _dumps(data):
+    return json.dumps(data, separators=(",", ":"), sort_keys=True) + "\n"
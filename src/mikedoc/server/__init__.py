@@ -0,0 +1,290 @@
+"""Local preview server of the API reference. The package is browsed once, then each
+page is rendered the first time it is requested and kept in a cache. Before each
+request, the source files are checked: the cached pages of a module whose source file
+changed (or that depends on a module whose source file changed) are dropped, and the
+module is browsed again. Nothing is written to the api directory."""
+import os
+import os.path
+import sys
+import importlib
+import mimetypes
+import http.server
+import urllib.parse
+from collections import namedtuple
+from mikedoc import misc
+from mikedoc.browser import browse, ModuleInfo
+from mikedoc.builder import Builder, find_module_deps
+
+
+__all__ = ["serve", "Server"]
+
+
+HOST = "127.0.0.1"
+PORT = 8000
+# Markdown pages are sent as plain text, so that browsers display them
+PAGE_CONTENT_TYPE = "text/plain; charset=utf-8"
+
+
+# info and members of a browsed module, and the modules its pages depend on
+_BrowsedModule = namedtuple("_BrowsedModule", ["info", "members", "deps"])
+
+
+def serve(root_dir, project_name, project_url, pkg_dir, api_dir, host=HOST, port=PORT,
+          callback=None, **options):
+    """Serve the API reference over HTTP, rendering pages on demand. This function
+    runs until it is interrupted (KeyboardInterrupt).
+
+    [param]
+    - root_dir: The project root directory
+    - project_name: The public (stylized or not) name of the project.
+    - project_url: The url to the project, it might be the relative url to the README.md file
+    - pkg_dir: Relative path to the root_dir indicating the package directory.
+    Slash is the only allowed separator. Example: "my_package" or "src/my_package
+    - api_dir: Relative path to the root_dir indicating the api reference directory.
+    Slash is the only allowed separator. Example: "docs/api".
+    - host: The address to listen on
+    - port: The port to listen on
+    - callback: Function called with the URL of the home page once the server listens
+    - **options: Keyword arguments of `mikedoc.Builder`. See `mikedoc.server.Server`.
+    """
+    server = Server(root_dir, project_name, project_url, pkg_dir, api_dir, **options)
+    server.serve(host, port, callback)
+
+
+class Server:
+    """Class to preview the API reference without building it. The time to the first
+    page is the time to browse the package plus the time to render one module, and
+    editing a module only costs browsing it again and rendering the pages requested.
+    Names aren't linked (autolink) and no search index is generated."""
+    def __init__(self, root_dir, project_name, project_url, pkg_dir, api_dir, **options):
+        """Init
+
+        [param]
+        - root_dir: The project root directory
+        - project_name: The public (stylized or not) name of the project.
+        - project_url: The url to the project, it might be the relative url to the README.md file
+        - pkg_dir: Relative path to the root_dir indicating the package directory.
+        Slash is the only allowed separator. Example: "my_package" or "src/my_package
+        - api_dir: Relative path to the root_dir indicating the api reference directory.
+        Pages are served under this path, since links in pages point to it.
+        - **options: Keyword arguments of `mikedoc.Builder`, such as `engine` or
+        `workers`. Options about the api directory (incremental, atomic, since,
+        writers, archive, and output) and the autolink and search options don't apply.
+        Custom templates are loaded once. With the "import" engine, the modules of the
+        package are removed from `sys.modules` before modules are browsed again,
+        so that they are imported from their current source.
+        """
+        self._root_dir = root_dir
+        self._project_url = project_url
+        self._pkg_dir = pkg_dir
+        self._api_dir = api_dir
+        self._builder = Builder(root_dir, project_name, project_url, pkg_dir, api_dir,
+                                **options)
+        # module name -> (modification time, size) of the source file
+        self._states = dict()
+        # module name -> _BrowsedModule
+        self._modules = dict()
+        # module name -> dictionary of pages (basename and text)
+        self._pages = dict()
+        self._home_page = None
+
+    @property
+    def root_dir(self):
+        return self._root_dir
+
+    @property
+    def project_url(self):
+        return self._project_url
+
+    @property
+    def pkg_dir(self):
+        return self._pkg_dir
+
+    @property
+    def api_dir(self):
+        return self._api_dir
+
+    @property
+    def builder(self):
+        """The `mikedoc.Builder` instance that renders pages"""
+        return self._builder
+
+    def get_page(self, path):
+        """Get a page of the API reference. The page is rendered (along with the other
+        pages of its module) unless it is cached and its module didn't change.
+
+        [param]
+        - path: Path of the page, relative to the api directory. Slash is the only
+        allowed separator. Example: "README.md" or "modules/package/module/README.md".
+
+        [return]
+        Return the text of the page, or None if there is no such page"""
+        self.refresh()
+        if path == "README.md":
+            return self._get_home_page()
+        parts = path.split("/")
+        if len(parts) < 3 or parts[0] != "modules":
+            return
+        module_name = ".".join(parts[1:-1])
+        module = self._modules.get(module_name)
+        if module is None:
+            return
+        pages = self._pages.get(module_name)
+        if pages is None:
+            pages = dict(self._builder.render_module(module.info, module.members))
+            self._pages[module_name] = pages
+        return pages.get(parts[-1])
+
+    def refresh(self):
+        """Check the source files of the package, then browse again the modules
+        whose source file was created or modified (and the modules that depend on them),
+        and drop their cached pages. Every module is browsed on the first call.
+
+        [return]
+        Return the set of dotted names of the modules browsed again"""
+        states = self._scan()
+        changed = {module_name for module_name, state in states.items()
+                   if self._states.get(module_name) != state}
+        deleted = set(self._states.keys()) - set(states.keys())
+        if not changed and not deleted:
+            return set()
+        stale = changed | deleted
+        for module_name, module in self._modules.items():
+            if not stale.isdisjoint(module.deps):
+                changed.add(module_name)
+        for module_name in changed | deleted:
+            self._modules.pop(module_name, None)
+            self._pages.pop(module_name, None)
+        self._home_page = None
+        self._states = states
+        builder = self._builder
+        # the memo keeps the values of the previous import alive
+        builder.value_repr.clear()
+        if builder.engine == "import":
+            self._unload_package()
+        project_modules = list(states.keys())
+        for module_info, members in browse(self._root_dir, self._pkg_dir, changed,
+                                           builder.engine, builder.lazy, builder.workers,
+                                           builder.timeout, builder.memory_limit,
+                                           value_repr=builder.value_repr):
+            members = list(members)
+            deps = find_module_deps(module_info.name, members, project_modules)
+            self._modules[module_info.name] = _BrowsedModule(module_info, members, deps)
+        return changed
+
+    def serve(self, host=HOST, port=PORT, callback=None):
+        """Serve the API reference over HTTP until interrupted (KeyboardInterrupt).
+        Pages are served under the api directory, for example
+        `/docs/api/modules/package/module/README.md`. The only other files served
+        are the source files of the package (targets of the Source links) and the
+        file of the project url, if it is a path. Paths with a component starting
+        with a dot are rejected. Requests are handled one at a time.
+
+        [param]
+        - host: The address to listen on
+        - port: The port to listen on
+        - callback: Function called with the URL of the home page once the server listens"""
+        httpd = http.server.HTTPServer((host, port), _RequestHandler)
+        httpd.preview = self
+        try:
+            if callback is not None:
+                url = "http://{}:{}/{}/README.md".format(host, httpd.server_port,
+                                                         self._api_dir.strip("/"))
+                callback(url)
+            httpd.serve_forever()
+        finally:
+            httpd.server_close()
+
+    def _get_home_page(self):
+        if self._home_page is None:
+            # modules are listed in the order of the build, and only those with pages
+            modules = [ModuleInfo(module_name, None, self._modules[module_name].info.doc)
+                       for module_name in self._states
+                       if module_name in self._modules
+                       and self._modules[module_name].members]
+            text = self._builder.render_home_page(modules)
+            self._home_page = text if text else ""
+        return self._home_page
+
+    def _scan(self):
+        states = dict()
+        path = misc.build_absolute_path(self._root_dir, self._pkg_dir)
+        for filename in misc.iter_py_files(path):
+            module_name = misc.build_module_name(self._root_dir, self._pkg_dir, filename)
+            try:
+                stat = os.stat(filename)
+            except FileNotFoundError as e:
+                continue
+            states[module_name] = (stat.st_mtime_ns, stat.st_size)
+        return states
+
+    def _unload_package(self):
+        pkg_name = misc.split_relative_path(self._pkg_dir)[-1]
+        prefix = pkg_name + "."
+        for name in list(sys.modules.keys()):
+            if name == pkg_name or name.startswith(prefix):
+                del sys.modules[name]
+        importlib.invalidate_caches()
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        preview = self.server.preview
+        path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        if any(part.startswith(".") for part in path.split("/")):
+            self._send(404, b"File not found", PAGE_CONTENT_TYPE)
+            return
+        prefix = "/" + preview.api_dir.strip("/") + "/"
+        if path in ("/", prefix, prefix.rstrip("/")):
+            self._send(302, b"", headers={"Location": prefix + "README.md"})
+        elif path.startswith(prefix):
+            try:
+                text = preview.get_page(path[len(prefix):])
+            except Exception as e:
+                msg = "Failed to render the page: {}: {}".format(type(e).__name__, e)
+                self._send(500, msg.encode("utf-8"), PAGE_CONTENT_TYPE)
+                return
+            if text is None:
+                self._send(404, b"Page not found", PAGE_CONTENT_TYPE)
+            else:
+                self._send(200, text.encode("utf-8"), PAGE_CONTENT_TYPE)
+        elif self._is_public_file(preview, path):
+            self._send_file(preview.root_dir, path)
+        else:
+            self._send(404, b"File not found", PAGE_CONTENT_TYPE)
+
+    def _is_public_file(self, preview, path):
+        # source files of the package and the file of the project url
+        pkg_prefix = "/" + preview.pkg_dir.strip("/") + "/"
+        if path.startswith(pkg_prefix) and path.endswith(".py"):
+            return True
+        project_url = urllib.parse.urlsplit(preview.project_url)
+        return (not project_url.scheme and not project_url.netloc
+                and project_url.path.startswith("/")
+                and path == urllib.parse.unquote(project_url.path))
+
+    def _send_file(self, root_dir, path):
+        root_dir = os.path.abspath(root_dir)
+        filename = os.path.abspath(os.path.join(root_dir, *path.split("/")))
+        if (os.path.commonpath((root_dir, filename)) != root_dir
+                or not os.path.isfile(filename)):
+            self._send(404, b"File not found", PAGE_CONTENT_TYPE)
+            return
+        with open(filename, "rb") as file:
+            data = file.read()
+        if filename.endswith((".md", ".py")):
+            content_type = PAGE_CONTENT_TYPE
+        else:
+            content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        self._send(200, data, content_type)
+
+    def _send(self, status, data, content_type=None, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or dict()).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
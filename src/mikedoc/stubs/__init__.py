@@ -0,0 +1,90 @@
+"""Stand-in objects used to represent a codebase that isn't imported.
+These objects can be inspected like their live counterparts."""
+import types
+
+
+__all__ = ["StaticValue", "create_function", "create_placeholder_class",
+           "create_module"]
+
+
+class StaticValue:
+    """Stand-in for a value that is only known by its source text.
+    The representation of the object is the source text itself."""
+    __slots__ = ("_text",)
+
+    def __init__(self, text):
+        """Init
+
+        [param]
+        - text: The source text of the value"""
+        self._text = text
+
+    @property
+    def text(self):
+        return self._text
+
+    def __repr__(self):
+        return self._text
+
+    def __str__(self):
+        return self._text
+
+
+def _stub(*args, **kwargs):
+    pass
+
+
+def create_function(name, qualname, module_name, doc=None, signature=None):
+    """Create a function object that stands for a function that isn't imported
+
+    [param]
+    - name: The name of the function
+    - qualname: The qualified name of the function
+    - module_name: The dotted name of the module in which the function is defined
+    - doc: The docstring or None
+    - signature: An `inspect.Signature` instance or None
+
+    [return]
+    Return a function object"""
+    func = types.FunctionType(_stub.__code__, {"__name__": module_name}, name)
+    func.__qualname__ = qualname
+    func.__module__ = module_name
+    func.__doc__ = doc
+    if signature is not None:
+        func.__signature__ = signature
+    return func
+
+
+def create_placeholder_class(module_name, qualname, cache=None):
+    """Create an empty class that stands for a class that can't be resolved.
+    Its dotted name is the same as the dotted name of the class it stands for.
+
+    [param]
+    - module_name: The dotted name of the module in which the class is defined
+    - qualname: The qualified name of the class
+    - cache: Optional dictionary to reuse placeholders
+
+    [return]
+    Return a class object"""
+    key = (module_name, qualname)
+    if cache is not None and key in cache:
+        return cache[key]
+    name = qualname.split(".")[-1]
+    cls = type(name, (), {"__module__": module_name,
+                          "__qualname__": qualname,
+                          "__doc__": None})
+    if cache is not None:
+        cache[key] = cls
+    return cls
+
+
+def create_module(name, doc=None):
+    """Create an empty module object
+
+    [param]
+    - name: The dotted name of the module
+    - doc: The docstring of the module or None
+
+    [return]
+    Return a module object"""
+    return types.ModuleType(name, doc)
@@ -0,0 +1,98 @@
+"""The symbol index of the API reference. It maps the dotted name of each documented
+module, field, function, class, and class member to the URL of its page (and anchor),
+so that names written between backticks in pages are turned into links."""
+import re
+
+
+__all__ = ["SymbolIndex", "find_refs"]
+
+
+# a fenced code block, or a code span holding a dotted name that isn't already
+# the text of a link. Fenced code blocks are matched to be left untouched.
+_PATTERN = re.compile(r"(?P<fence>^```.*?^```)"
+                      r"|(?<![\[`\w])`(?P<name>[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)+)`(?![\]`])",
+                      re.MULTILINE | re.DOTALL)
+
+
+class SymbolIndex:
+    """Dictionary-like index of symbols. Looking up a name costs the same whatever
+    the number of symbols, and linking a text takes a single pass over it."""
+    def __init__(self, symbols=None):
+        """Init
+
+        [param]
+        - symbols: Optional dictionary whose keys are dotted names and whose values are URLs"""
+        self._symbols = dict(symbols) if symbols else dict()
+
+    @property
+    def symbols(self):
+        """Dictionary whose keys are dotted names and whose values are URLs"""
+        return self._symbols
+
+    def add(self, name, url):
+        """Add a symbol to the index
+
+        [param]
+        - name: The dotted name, for example "my_package.my_module.MyClass"
+        - url: The URL of the page documenting the symbol, possibly with an anchor"""
+        self._symbols[name] = url
+
+    def update(self, symbols):
+        """Add symbols to the index
+
+        [param]
+        - symbols: Dictionary whose keys are dotted names and whose values are URLs"""
+        self._symbols.update(symbols)
+
+    def get(self, name):
+        """Return the URL of a symbol, or None if the symbol isn't indexed"""
+        return self._symbols.get(name)
+
+    def link(self, text):
+        """Turn each dotted name written between backticks into a link to its page.
+        Fenced code blocks, links, and names that aren't indexed are left untouched.
+
+        [param]
+        - text: Markdown text
+
+        [return]
+        Return the new text"""
+        if not text:
+            return text
+        symbols = self._symbols
+
+        def replace(match):
+            name = match.group("name")
+            if name is None:
+                return match.group(0)
+            url = symbols.get(name)
+            if url is None:
+                return match.group(0)
+            return "[`{}`]({})".format(name, url)
+        return _PATTERN.sub(replace, text)
+
+    def __contains__(self, name):
+        return name in self._symbols
+
+    def __len__(self):
+        return len(self._symbols)
+
+
+def find_refs(text):
+    """Find the dotted names written between backticks in a text, outside fenced
+    code blocks and links. These names are the ones that `SymbolIndex.link` would
+    look up.
+
+    [param]
+    - text: Markdown text
+
+    [return]
+    Return a set of dotted names"""
+    refs = set()
+    if not text:
+        return refs
+    for match in _PATTERN.finditer(text):
+        name = match.group("name")
+        if name is not None:
+            refs.add(name)
+    return refs
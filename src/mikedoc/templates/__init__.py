@@ -1,4 +1,19 @@
-__all__ = []
+"""Templates of the pages of the API reference. Each template is a text whose fields
+are written between braces, like with `str.format`. Templates are compiled once into
+render functions (see `Template`) that append the parts of the rendered text to a buffer,
+so that the sections of a page are assembled without intermediate strings.
+
+Custom templates can replace the templates of this module: see `TemplateSet`
+and `load_templates`."""
+import os
+import os.path
+import string
+import keyword
+from mikedoc import errors
+
+
+__all__ = ["Template", "TemplateSet", "load_templates"]
+
 
 HOME_PAGE = """\
 # {project_name} API Reference
@@ -224,3 +239,209 @@ Here are fields exposed in the class:
 {contents}
 
 {back_to_top}"""
+
+
+# names of the templates of this module
+TEMPLATE_NAMES = ("HOME_PAGE", "OVERVIEW_PAGE", "FIELDS_PAGE", "FUNCS_DOC_PAGE",
+                  "CLASS_DOC_PAGE", "HEADER_DIV_1", "HEADER_DIV_2", "MODULE_LINE",
+                  "ALL_FUNCTIONS_SECTION", "ALL_CLASSES_SECTION", "ALL_FIELDS_SECTION",
+                  "FUNC_LINE", "CLASS_SECTION", "CLASS_MEMBER_LINE", "FIELD_LINE",
+                  "TWO_COLUMNS_TABLE_ENTRY", "THREE_COLUMNS_TABLE_ENTRY",
+                  "METHODS_SECTION", "FUNC_DOC_SECTION", "BACK_TO_TOP",
+                  "FUNC_PARAMS_TABLE", "FUNC_EXCEPTIONS_SECTION", "FUNC_EXCEPTIONS_TABLE",
+                  "FUNC_RETURNS_LINE", "FUNC_YIELDS_LINE", "FIELDS_EXPOSED_IN_CLASS",
+                  "PROPERTIES_EXPOSED_IN_CLASS", "FIELDS_EXPOSED_IN_NAMEDTUPLE",
+                  "FIELDS_EXPOSED_IN_ENUM")
+# extension of the files of custom templates
+TEMPLATE_FILE_EXTENSION = ".md"
+
+
+_FORMATTER = string.Formatter()
+_CONVERTERS = {"r": "repr", "s": "str", "a": "ascii"}
+# compiled default templates, shared by template sets
+_DEFAULT_TEMPLATES = dict()
+
+
+class Template:
+    """Template compiled once into a render function. The render function appends
+    the literal parts of the template and the values of its fields to a buffer (a list
+    of strings) in a single pass, and the text is joined once the page is complete.
+    Fields are written like with `str.format`: `{name}`, with an optional conversion
+    (`{name!r}`) and format specification (`{name:>10}`)."""
+    def __init__(self, text, name="template"):
+        """Init
+
+        [param]
+        - text: The text of the template
+        - name: The name of the template, used in error messages
+
+        [raise]
+        - mikedoc.errors.Error: Raised when the template is malformed or when the name
+        of a field isn't a valid identifier (positional and nested fields aren't supported)
+        """
+        self._text = text
+        self._name = name
+        self._fields, self._render = _compile(text, name)
+
+    @property
+    def text(self):
+        return self._text
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def fields(self):
+        """Tuple of the names of the fields of the template, in order of appearance"""
+        return self._fields
+
+    @property
+    def render(self):
+        """The render function of the template, `render(buffer, **values)`, which
+        appends the parts of the rendered text to a buffer (a list of strings).
+        The value of a field is either a string, a list of strings (a fragment, for
+        example a buffer filled by another template) whose items are appended as they
+        are, or another object, formatted with `format`. Values of fields that aren't
+        part of the template are ignored, and a missing value raises a `TypeError`.
+        The function returns the buffer."""
+        return self._render
+
+    def format(self, **values):
+        """Render the template as a string, like `str.format` would. See `render`."""
+        return "".join(self._render(list(), **values))
+
+
+class TemplateSet:
+    """The templates used to build the pages: the templates of this module,
+    some of which may be replaced with custom templates. Templates are compiled
+    once, when they are first used."""
+    def __init__(self, custom=None):
+        """Init
+
+        [param]
+        - custom: Optional dictionary whose keys are names of templates of this
+        module (see `TEMPLATE_NAMES`), for example "CLASS_DOC_PAGE", and whose values
+        are the texts that replace them. A custom template can use any field of the
+        template it replaces, and only those fields.
+
+        [raise]
+        - mikedoc.errors.Error: Raised when a name isn't the name of a template,
+        when a custom template is malformed, or when it uses an unknown field
+        """
+        self._custom = dict(custom) if custom else dict()
+        self._templates = dict()
+        for name, text in sorted(self._custom.items()):
+            default = self._get_default(name)
+            template = Template(text, name)
+            unknown = [field for field in template.fields if field not in default.fields]
+            if unknown:
+                msg = "Unknown field '{}' in the custom template '{}'"
+                raise errors.Error(msg.format(unknown[0], name))
+            self._templates[name] = template
+
+    @property
+    def custom(self):
+        """Dictionary of the texts of custom templates"""
+        return self._custom
+
+    def get(self, name):
+        """Return the `Template` instance whose name is `name`
+
+        [raise]
+        - mikedoc.errors.Error: Raised when the name isn't the name of a template"""
+        template = self._templates.get(name)
+        if template is None:
+            template = self._templates[name] = self._get_default(name)
+        return template
+
+    def _get_default(self, name):
+        template = _DEFAULT_TEMPLATES.get(name)
+        if template is None:
+            if name not in TEMPLATE_NAMES:
+                raise errors.Error("Unknown template '{}'".format(name))
+            template = _DEFAULT_TEMPLATES[name] = Template(globals()[name], name)
+        return template
+
+
+def load_templates(path):
+    """Load the custom templates stored in a directory. Each file is named after the
+    template it replaces, with the ".md" extension, for example `CLASS_DOC_PAGE.md`.
+    Line feeds at the end of a file are normalized to match the template it replaces,
+    since most templates are fragments that don't end with a line feed.
+
+    [param]
+    - path: The path to the directory
+
+    [return]
+    Return a dictionary whose keys are names of templates and whose values are texts,
+    to be passed to `TemplateSet`
+
+    [raise]
+    - mikedoc.errors.Error: Raised when the directory can't be read, or when a file
+    isn't named after a template"""
+    custom = dict()
+    try:
+        filenames = sorted(os.listdir(path))
+    except OSError as e:
+        raise errors.Error("Failed to read the templates directory '{}': {}".format(path, e))
+    for filename in filenames:
+        name, ext = os.path.splitext(filename)
+        if ext != TEMPLATE_FILE_EXTENSION:
+            continue
+        if name not in TEMPLATE_NAMES:
+            msg = "The file '{}' isn't named after a template".format(filename)
+            raise errors.Error(msg)
+        with open(os.path.join(path, filename), "r", encoding="utf-8") as file:
+            text = file.read().rstrip("\n")
+        if globals()[name].endswith("\n"):
+            text += "\n"
+        custom[name] = text
+    return custom
+
+
+def _compile(text, name):
+    """Generate the source of the render function of a template, then compile it.
+    The function is straight-line code: literal parts are constants, and each field
+    is appended (or extended with, when its value is a list) without any lookup."""
+    fields = list()
+    body = list()
+    try:
+        items = list(_FORMATTER.parse(text))
+    except ValueError as e:
+        raise errors.Error("Malformed template '{}': {}".format(name, e))
+    for literal, field, spec, conversion in items:
+        if literal:
+            body.append("    _append({!r})".format(literal))
+        if field is None:
+            continue
+        if (not field.isidentifier() or keyword.iskeyword(field)
+                or field.startswith("_") or "{" in spec):
+            msg = "Unsupported field '{}' in the template '{}'".format(field, name)
+            raise errors.Error(msg)
+        if field not in fields:
+            fields.append(field)
+        if conversion or spec:
+            value = field
+            if conversion:
+                value = "{}({})".format(_CONVERTERS[conversion], field)
+            body.append("    _append(format({}, {!r}))".format(value, spec))
+            continue
+        body.extend(("    if {}.__class__ is _str:".format(field),
+                     "        _append({})".format(field),
+                     "    elif {}.__class__ is _list:".format(field),
+                     "        _extend({})".format(field),
+                     "    else:",
+                     "        _append(format({}))".format(field)))
+    params = "".join("{}, ".format(field) for field in fields)
+    if params:
+        params = "*, " + params
+    lines = ["def render(_buffer, {}**_):".format(params),
+             "    _append = _buffer.append",
+             "    _extend = _buffer.extend"]
+    lines.extend(body)
+    lines.append("    return _buffer")
+    namespace = {"_str": str, "_list": list}
+    filename = "<template {}>".format(name)
+    exec(compile("\n".join(lines), filename, "exec"), namespace)
+    return tuple(fields), namespace["render"]
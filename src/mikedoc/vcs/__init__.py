@@ -0,0 +1,83 @@
+"""Change detection with git. The local git repository is asked for the files changed
+since a reference (a commit, a branch, or a tag), so that a build renders again only
+the modules touched since that reference instead of checking every source file."""
+import os
+import os.path
+import subprocess
+from mikedoc import misc, errors
+
+
+__all__ = ["list_changed_files", "find_changed_modules"]
+
+
+GIT_COMMAND = "git"
+
+
+def list_changed_files(root_dir, ref):
+    """List the files changed since a git reference, that is, the files that differ
+    between the reference and the working tree (modified, added, deleted, or renamed
+    files), and the untracked files that aren't ignored
+
+    [param]
+    - root_dir: A directory of the git repository, for example the project root directory
+    - ref: The git reference, for example "HEAD~1", "origin/main", or a commit hash
+
+    [return]
+    Return a set of absolute paths
+
+    [raise]
+    - mikedoc.errors.Error: Raised when git can't be run, when the directory isn't
+    part of a git repository, or when the reference is unknown"""
+    toplevel = os.fsdecode(_run_git(root_dir, "rev-parse", "--show-toplevel").strip())
+    diff = _run_git(root_dir, "diff", "--name-only", "--no-renames", "-z", ref, "--")
+    untracked = _run_git(root_dir, "ls-files", "--others", "--exclude-standard",
+                         "--full-name", "-z")
+    filenames = set()
+    for output in (diff, untracked):
+        for path in output.split(b"\0"):
+            if path:
+                filename = os.path.join(toplevel, os.fsdecode(path))
+                filenames.add(os.path.normpath(filename))
+    return filenames
+
+
+def find_changed_modules(root_dir, pkg_dir, ref):
+    """Find the modules of a package whose source files changed since a git reference
+
+    [param]
+    - root_dir: The project root directory
+    - pkg_dir: Relative path to the root_dir indicating the package directory.
+    Slash is the only allowed separator. Example: "my_package" or "src/my_package".
+    - ref: The git reference. See `list_changed_files`.
+
+    [return]
+    Return a set of dotted module names, deleted modules included
+
+    [raise]
+    - mikedoc.errors.Error: Raised when git fails. See `list_changed_files`."""
+    # git reports paths from the real location of the repository
+    root_dir = os.path.realpath(root_dir)
+    path = misc.build_absolute_path(root_dir, pkg_dir)
+    modules = set()
+    for filename in list_changed_files(root_dir, ref):
+        if not filename.endswith(".py"):
+            continue
+        if os.path.commonpath((path, filename)) != path:
+            continue
+        module_name = misc.build_module_name(root_dir, pkg_dir, filename)
+        if module_name:
+            modules.add(module_name)
+    return modules
+
+
+def _run_git(root_dir, *args):
+    command = (GIT_COMMAND, ) + args
+    try:
+        result = subprocess.run(command, cwd=root_dir, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE)
+    except OSError as e:
+        raise errors.Error("Failed to run git: {}".format(e))
+    if result.returncode != 0:
+        msg = result.stderr.decode("utf-8", "replace").strip()
+        raise errors.Error("Failed to run '{}': {}".format(" ".join(command), msg))
+    return result.stdout
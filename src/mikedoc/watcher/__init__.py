@@ -0,0 +1,178 @@
+"""The `Watcher` class and the `watch` function are defined in this module."""
+import os
+import sys
+import time
+import importlib
+from mikedoc.builder import Builder
+from mikedoc.templates import TEMPLATE_FILE_EXTENSION
+from mikedoc import misc
+
+
+__all__ = ["watch", "Watcher"]
+
+
+# seconds between two scans of the package directory
+POLL_INTERVAL = 0.1
+
+
+def watch(root_dir, project_name, project_url, pkg_dir, api_dir,
+          interval=POLL_INTERVAL, callback=None, **options):
+    """Build the API reference, then rebuild it incrementally each time a source
+    file of the package is created, modified, or deleted. This function runs
+    until it is interrupted (KeyboardInterrupt).
+
+    [param]
+    - root_dir: The project root directory
+    - project_name: The public (stylized or not) name of the project.
+    - project_url: The url to the project, it might be the relative url to the README.md file
+    - pkg_dir: Relative path to the root_dir indicating the package directory.
+    Slash is the only allowed separator. Example: "my_package" or "src/my_package
+    - api_dir: Relative path to the root_dir indicating the api reference directory.
+    Slash is the only allowed separator. Example: "docs/api".
+    - interval: Number of seconds between two scans of the package directory
+    - callback: Function called after each build. See `mikedoc.watcher.Watcher.watch`.
+    - **options: Keyword arguments of `mikedoc.Builder`. See `mikedoc.watcher.Watcher`.
+    """
+    watcher = Watcher(root_dir, project_name, project_url, pkg_dir, api_dir,
+                      interval=interval, **options)
+    watcher.watch(callback)
+
+
+class Watcher:
+    """Class to keep the API reference up to date while source files are edited.
+    Builds are incremental, so only the pages of modules that changed (and of the
+    modules depending on them) are rendered again, along with the home page."""
+    def __init__(self, root_dir, project_name, project_url, pkg_dir, api_dir,
+                 interval=POLL_INTERVAL, **options):
+        """Init
+
+        [param]
+        - root_dir: The project root directory
+        - project_name: The public (stylized or not) name of the project.
+        - project_url: The url to the project, it might be the relative url to the README.md file
+        - pkg_dir: Relative path to the root_dir indicating the package directory.
+        Slash is the only allowed separator. Example: "my_package" or "src/my_package
+        - api_dir: Relative path to the root_dir indicating the api reference directory.
+        Slash is the only allowed separator. Example: "docs/api".
+        - interval: Number of seconds between two scans of the package directory.
+        Source files are polled by modification time and size.
+        - **options: Keyword arguments of `mikedoc.Builder`, such as `engine` or
+        `workers`. Builds are always incremental, so the `incremental` option is ignored.
+        With a `templates_dir`, editing a template triggers a build too.
+        """
+        self._root_dir = root_dir
+        self._project_name = project_name
+        self._project_url = project_url
+        self._pkg_dir = pkg_dir
+        self._api_dir = api_dir
+        self._interval = interval
+        self._options = options
+        self._options["incremental"] = True
+
+    @property
+    def root_dir(self):
+        return self._root_dir
+
+    @property
+    def project_name(self):
+        return self._project_name
+
+    @property
+    def project_url(self):
+        return self._project_url
+
+    @property
+    def pkg_dir(self):
+        return self._pkg_dir
+
+    @property
+    def api_dir(self):
+        return self._api_dir
+
+    @property
+    def interval(self):
+        return self._interval
+
+    @property
+    def options(self):
+        """Dictionary of the keyword arguments given to `mikedoc.Builder`"""
+        return dict(self._options)
+
+    def scan(self):
+        """Take a snapshot of the source files of the package, and of the
+        custom templates if any
+
+        [return]
+        Return a dictionary whose keys are absolute filenames and whose values
+        are 2-tuples made of the modification time (in nanoseconds) and the size"""
+        snapshot = dict()
+        path = misc.build_absolute_path(self._root_dir, self._pkg_dir)
+        filenames = list(misc.iter_py_files(path))
+        if self._options.get("templates_dir"):
+            filenames.extend(self._list_templates())
+        for filename in filenames:
+            try:
+                stat = os.stat(filename)
+            except FileNotFoundError as e:
+                continue
+            snapshot[filename] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def rebuild(self):
+        """Build the API reference incrementally. With the "import" engine, the
+        modules of the package are first removed from `sys.modules`, so that
+        the modules to render again are imported from their current source.
+
+        [return]
+        Return a `mikedoc.OutputStats` named tuple"""
+        if self._options.get("engine", "import") == "import":
+            self._unload_package()
+        builder = Builder(self._root_dir, self._project_name, self._project_url,
+                          self._pkg_dir, self._api_dir, **self._options)
+        return builder.build()
+
+    def watch(self, callback=None):
+        """Build the API reference, then rebuild it each time the snapshot of the
+        source files changes. This method runs until it is interrupted (KeyboardInterrupt).
+
+        [param]
+        - callback: Function called after each build with two arguments: the
+        `mikedoc.OutputStats` of the build (or None) and the exception raised
+        during the build (or None). Without callback, exceptions are propagated."""
+        snapshot = self.scan()
+        self._run(callback)
+        while True:
+            time.sleep(self._interval)
+            new_snapshot = self.scan()
+            if new_snapshot == snapshot:
+                continue
+            snapshot = new_snapshot
+            self._run(callback)
+
+    def _run(self, callback):
+        try:
+            stats = self.rebuild()
+        except Exception as e:
+            if callback is None:
+                raise
+            callback(None, e)
+        else:
+            if callback is not None:
+                callback(stats, None)
+
+    def _unload_package(self):
+        pkg_name = misc.split_relative_path(self._pkg_dir)[-1]
+        prefix = pkg_name + "."
+        for name in list(sys.modules.keys()):
+            if name == pkg_name or name.startswith(prefix):
+                del sys.modules[name]
+        importlib.invalidate_caches()
+
+    def _list_templates(self):
+        path = misc.build_absolute_path(self._root_dir, self._options["templates_dir"])
+        try:
+            basenames = os.listdir(path)
+        except OSError as e:
+            return list()
+        return [os.path.join(path, basename) for basename in basenames
+                if basename.endswith(TEMPLATE_FILE_EXTENSION)]
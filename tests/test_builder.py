@@ -0,0 +1,223 @@
+import os
+import os.path
+import sys
+import shutil
+import tempfile
+import unittest
+import mikedoc
+from mikedoc import ir, misc
+
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "my-project")
+PROJECT_NAME = "MyProject"
+PROJECT_URL = "/README.md"
+PKG_DIR = "src/my_project"
+API_DIR = "docs/api"
+PKG_NAME = "my_project"
+
+
+def copy_project(dirname):
+    """Copy the test project into a directory, without its api directory.
+    Return the root directory of the copy."""
+    root_dir = os.path.join(dirname, "my-project")
+    shutil.copytree(PROJECT_DIR, root_dir)
+    shutil.rmtree(os.path.join(root_dir, "docs"), ignore_errors=True)
+    return root_dir
+
+
+def build(root_dir, **options):
+    # modules are imported again, like in a new process
+    unload_package()
+    return mikedoc.build(root_dir, PROJECT_NAME, PROJECT_URL, PKG_DIR, API_DIR, **options)
+
+
+def unload_package():
+    for name in list(sys.modules.keys()):
+        if name == PKG_NAME or name.startswith(PKG_NAME + "."):
+            del sys.modules[name]
+
+
+def read_tree(path, exclude=(misc.MANIFEST_FILENAME, )):
+    """Return a dictionary whose keys are the relative paths of the files
+    of a directory and whose values are their contents"""
+    tree = dict()
+    for dirname, _, filenames in os.walk(path):
+        for basename in filenames:
+            if basename in exclude:
+                continue
+            filename = os.path.join(dirname, basename)
+            key = os.path.relpath(filename, path).replace(os.sep, "/")
+            with open(filename, "rb") as file:
+                tree[key] = file.read()
+    return tree
+
+
+def edit_file(filename, old, new):
+    with open(filename, "r", encoding="utf-8") as file:
+        text = file.read()
+    if old not in text:
+        raise ValueError("'{}' not found in '{}'".format(old, filename))
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write(text.replace(old, new, 1))
+
+
+class TestIncrementalBuild(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root_dir = copy_project(self._tmp.name)
+        self.api_path = os.path.join(self.root_dir, *API_DIR.split("/"))
+
+    def tearDown(self):
+        unload_package()
+        self._tmp.cleanup()
+
+    def test_rebuild_after_edit_matches_full_build(self):
+        extra = os.path.join(self.root_dir, "src", "my_project", "extra.py")
+        with open(extra, "w", encoding="utf-8") as file:
+            file.write('"""Module deleted by the test"""\n\n\ndef extra_func():\n    pass\n')
+        build(self.root_dir, incremental=True)
+        self.assertIn("modules/my_project/extra/README.md", read_tree(self.api_path))
+        module1 = os.path.join(self.root_dir, "src", "my_project",
+                               "package1", "module1.py")
+        with open(module1, "a", encoding="utf-8") as file:
+            file.write('\n\ndef new_func(x):\n    """Function added by the test"""\n')
+        os.remove(extra)
+        stats = build(self.root_dir, incremental=True)
+        self.assertGreater(stats.skipped, 0)
+        expected = self._build_full_copy()
+        self.assertEqual(expected, read_tree(self.api_path))
+        self.assertIn(b"new_func", expected["modules/my_project/package1/module1/funcs.md"])
+
+    def test_rebuild_without_changes_writes_nothing(self):
+        build(self.root_dir, incremental=True)
+        stats = build(self.root_dir, incremental=True)
+        self.assertEqual(0, stats.written)
+        self.assertEqual(0, stats.deleted)
+
+    def test_manifest_only_for_incremental_builds(self):
+        manifest_file = os.path.join(self.api_path, misc.MANIFEST_FILENAME)
+        build(self.root_dir)
+        self.assertFalse(os.path.exists(manifest_file))
+        build(self.root_dir, incremental=True)
+        self.assertTrue(os.path.exists(manifest_file))
+        build(self.root_dir)
+        self.assertFalse(os.path.exists(manifest_file))
+
+    def _build_full_copy(self):
+        root_dir = os.path.join(self._tmp.name, "full")
+        shutil.copytree(self.root_dir, root_dir)
+        shutil.rmtree(os.path.join(root_dir, "docs"))
+        build(root_dir)
+        return read_tree(os.path.join(root_dir, *API_DIR.split("/")))
+
+
+class TestEngines(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root_dir = copy_project(self._tmp.name)
+        self.api_path = os.path.join(self.root_dir, *API_DIR.split("/"))
+        build(self.root_dir)
+        self.expected = read_tree(self.api_path)
+        shutil.rmtree(self.api_path)
+
+    def tearDown(self):
+        unload_package()
+        self._tmp.cleanup()
+
+    def test_ast_engine(self):
+        build(self.root_dir, engine="ast")
+        self.assertEqual(self.expected, read_tree(self.api_path))
+
+    def test_isolated_engine(self):
+        build(self.root_dir, engine="isolated", workers=2)
+        self.assertEqual(self.expected, read_tree(self.api_path))
+
+    def test_ir_file(self):
+        filename = os.path.join(self._tmp.name, "ir.json")
+        unload_package()
+        ir.save_ir(ir.create_ir(self.root_dir, PKG_DIR), filename)
+        build(self.root_dir, ir_file=filename)
+        self.assertEqual(self.expected, read_tree(self.api_path))
+
+    def test_workers(self):
+        build(self.root_dir, workers=2)
+        self.assertEqual(self.expected, read_tree(self.api_path))
+
+
+class TestArchiveBuild(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root_dir = copy_project(self._tmp.name)
+
+    def tearDown(self):
+        unload_package()
+        self._tmp.cleanup()
+
+    def test_zip_archive_is_reproducible(self):
+        self._check_reproducible("api.zip")
+
+    def test_tar_archive_is_reproducible(self):
+        self._check_reproducible("api.tar.gz")
+
+    def test_archive_contains_the_pages(self):
+        filename = os.path.join(self._tmp.name, "api.zip")
+        build(self.root_dir, archive=filename)
+        path = os.path.join(self._tmp.name, "unpacked")
+        shutil.unpack_archive(filename, path)
+        build(self.root_dir)
+        api_path = os.path.join(self.root_dir, *API_DIR.split("/"))
+        self.assertEqual(read_tree(api_path), read_tree(path))
+
+    def _check_reproducible(self, basename):
+        filename = os.path.join(self._tmp.name, basename)
+        build(self.root_dir, archive=filename)
+        with open(filename, "rb") as file:
+            first = file.read()
+        os.remove(filename)
+        # source files touched between builds don't change the archive
+        for dirname, _, filenames in os.walk(os.path.join(self.root_dir, "src")):
+            for name in filenames:
+                os.utime(os.path.join(dirname, name))
+        build(self.root_dir, archive=filename)
+        with open(filename, "rb") as file:
+            self.assertEqual(first, file.read())
+        self.assertFalse(os.path.exists(os.path.join(self.root_dir, "docs")))
+
+
+class TestAtomicBuild(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root_dir = copy_project(self._tmp.name)
+        self.api_path = os.path.join(self.root_dir, *API_DIR.split("/"))
+
+    def tearDown(self):
+        unload_package()
+        self._tmp.cleanup()
+
+    def test_failed_build_leaves_api_dir_untouched(self):
+        build(self.root_dir, atomic=True)
+        expected = read_tree(self.api_path, exclude=())
+        edit_file(os.path.join(self.root_dir, "src", "my_project", "__init__.py"),
+                  '"""', '"""Edited. ')
+        filename = os.path.join(self.root_dir, "src", "my_project", "broken.py")
+        with open(filename, "w", encoding="utf-8") as file:
+            file.write('raise RuntimeError("broken module")\n')
+        with self.assertRaises(RuntimeError):
+            build(self.root_dir, atomic=True)
+        self.assertEqual(expected, read_tree(self.api_path, exclude=()))
+        self.assertEqual(["api"], os.listdir(os.path.dirname(self.api_path)))
+
+    def test_build_matches_direct_build(self):
+        build(self.root_dir, atomic=True)
+        expected = read_tree(self.api_path)
+        shutil.rmtree(self.api_path)
+        build(self.root_dir)
+        self.assertEqual(expected, read_tree(self.api_path))
+
+
+if __name__ == "__main__":
+    unittest.main()